@@ -0,0 +1,37 @@
+"""Compare per-field getter decoding with the single pass decoder over 10k elements
+
+Run with: python -m benchmarks.bench_decode
+"""
+import timeit
+
+from benchmarks.payloads import make_payload
+from product_decode import EpicFreeGames, Game, ProductDecodeException
+
+ELEMENT_COUNT = 10_000
+REPEAT = 5
+
+
+def legacy_process_products(products) -> list[Game]:
+    """The original decoder, which builds an EpicFreeGames for every field lookup"""
+    free_games = []
+    for product in products:
+        try:
+            game = Game(EpicFreeGames().get_title_of_product(product),
+                        EpicFreeGames().get_description_of_product(product),
+                        EpicFreeGames().get_price_of_product(product),
+                        EpicFreeGames().get_product_url(product),
+                        EpicFreeGames().get_thumbnail_of_product(product))
+        except ProductDecodeException:
+            continue
+        if game.free:
+            free_games.append(game)
+    return free_games
+
+
+if __name__ == '__main__':
+    products = EpicFreeGames.get_products_from_response(make_payload(ELEMENT_COUNT))
+    legacy = min(timeit.repeat(lambda: legacy_process_products(products), number=1, repeat=REPEAT))
+    single_pass = min(timeit.repeat(lambda: EpicFreeGames.process_products(products), number=1, repeat=REPEAT))
+    print(f"{ELEMENT_COUNT} elements")
+    print(f"per-field getters: {legacy * 1000:8.2f} ms")
+    print(f"single pass:       {single_pass * 1000:8.2f} ms ({legacy / single_pass:.1f}x)")
@@ -0,0 +1,31 @@
+"""Compare logging every decode failure with collecting them into a DecodeReport on a 50% malformed payload
+
+Failures are logged to a discarded stream, as a poller writing to a log file would
+
+Run with: python -m benchmarks.bench_decode_report
+"""
+import io
+import logging
+import timeit
+
+import product_decode
+from benchmarks.payloads import make_payload
+from product_decode import EpicFreeGames, LogRateLimiter
+
+ELEMENT_COUNT = 10_000
+MALFORMED_RATIO = 0.5
+REPEAT = 5
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=io.StringIO(), level=logging.WARNING)
+    # Every run logs its summary, as the first poll of each interval would
+    product_decode.decode_summary_limiter = LogRateLimiter(0)
+    products = EpicFreeGames.get_products_from_response(make_payload(ELEMENT_COUNT, malformed_ratio=MALFORMED_RATIO))
+    logged = min(timeit.repeat(lambda: EpicFreeGames.process_products(products), number=1, repeat=REPEAT))
+    reported = min(timeit.repeat(lambda: EpicFreeGames.process_products_with_report(products), number=1, repeat=REPEAT))
+    _, report = EpicFreeGames.process_products_with_report(products)
+    print(f"{ELEMENT_COUNT} elements, {MALFORMED_RATIO:.0%} malformed")
+    print(f"error per element: {logged * 1000:8.2f} ms")
+    print(f"decode report:     {reported * 1000:8.2f} ms ({logged / reported:.1f}x)")
+    print(report.summary())
@@ -0,0 +1,64 @@
+"""Compare per-object filtering of decoded games with the GameBatch column filters
+
+Run with: python -m benchmarks.bench_filters
+"""
+import random
+import timeit
+
+import product_decode
+from product_decode import Game, GameBatch
+
+GAME_COUNT = 100_000
+REPEAT = 5
+NOW = 1_700_000_000
+
+
+def make_games(count: int) -> list[Game]:
+    generator = random.Random(0)
+    games = []
+    for i in range(count):
+        original = generator.choice((999, 1999, 2999))
+        price = generator.choice((0, original // 10, original))
+        start = NOW + generator.randint(-86400 * 7, 86400 * 7)
+        window = (start, start + 86400 * 7, generator.choice((0, 50, 100)))
+        current, upcoming = ((window,), ()) if start <= NOW else ((), (window,))
+        games.append(Game(f"Game {i}", "", price, f"game-{i}", None, original, *window,
+                          promotion_windows=current, upcoming_windows=upcoming))
+    return games
+
+
+def loop_filters(games: list[Game]) -> tuple:
+    free = [game for game in games if game.free]
+    discounted = [game for game in games
+                  if game.original_price > 0 and (game.original_price - game.price) * 100 >= game.original_price * 90]
+    upcoming = [game for game in games if game.next_free_window(NOW) is not None]
+    return free, discounted, upcoming
+
+
+def column_masks(batch: GameBatch) -> tuple:
+    return batch.free_mask(), batch.discount_mask(90), batch.upcoming_free_mask(NOW)
+
+
+def column_filters(batch: GameBatch) -> tuple:
+    return (batch.compress(batch.free_mask()),
+            batch.compress(batch.discount_mask(90)),
+            batch.compress(batch.upcoming_free_mask(NOW)))
+
+
+if __name__ == '__main__':
+    games = make_games(GAME_COUNT)
+    batch = GameBatch.from_games(games)
+    loop = min(timeit.repeat(lambda: loop_filters(games), number=1, repeat=REPEAT))
+    print(f"{GAME_COUNT} games, free / 90% off / upcoming free filters")
+    print(f"per-object loops:                {loop * 1000:8.2f} ms")
+    backends = [("array fallback", None)]
+    numpy_module = product_decode.load_numpy()
+    if numpy_module is not None:
+        backends.insert(0, ("numpy", numpy_module))
+    for name, backend in backends:
+        product_decode.numpy = backend
+        masks = min(timeit.repeat(lambda: column_masks(batch), number=1, repeat=REPEAT))
+        filters = min(timeit.repeat(lambda: column_filters(batch), number=1, repeat=REPEAT))
+        print(f"{name + ' masks:':<32} {masks * 1000:8.2f} ms ({loop / masks:.1f}x)")
+        print(f"{name + ' masks + batches:':<32} {filters * 1000:8.2f} ms ({loop / filters:.1f}x)")
+    product_decode.numpy = numpy_module
@@ -0,0 +1,66 @@
+"""Compare decoding every poll with process_products against the incremental FreeGamesIndex over 20k elements
+
+Each poll decodes a freshly parsed copy of the payload, as a new response would be, and
+failures are logged to a discarded stream
+
+Run with: python -m benchmarks.bench_game_diff
+"""
+import io
+import json
+import logging
+import time
+
+from benchmarks.payloads import encode_payload, load_recorded_payload, make_payload, scale_payload
+from game_diff import FreeGamesIndex
+from product_decode import EpicFreeGames
+
+ELEMENT_COUNT = 20_000
+REPEAT = 5
+# One in CHANGED_EVERY elements changes price between the polls of the changed run
+CHANGED_EVERY = 100
+
+
+def parsed_copies(data: bytes) -> list[list]:
+    return [EpicFreeGames.get_products_from_response(json.loads(data)) for _ in range(REPEAT + 1)]
+
+
+def best_of(decode, copies: list[list]) -> float:
+    """Time decode on each copy but the first, which warms the index, and keep the fastest"""
+    decode(copies[0])
+    timings = []
+    for products in copies[1:]:
+        start = time.perf_counter()
+        decode(products)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def change_prices(payload: dict) -> bytes:
+    for element in payload["data"]["Catalog"]["searchStore"]["elements"][::CHANGED_EVERY]:
+        if element:
+            element["price"]["totalPrice"]["discountPrice"] += 1
+    return encode_payload(payload)
+
+
+def run(label: str, payload: dict) -> None:
+    data = encode_payload(payload)
+    full = best_of(EpicFreeGames.process_products, parsed_copies(data))
+    first = best_of(lambda products: FreeGamesIndex().update(products), parsed_copies(data))
+    index = FreeGamesIndex()
+    unchanged = best_of(index.update, parsed_copies(data))
+    # Alternating between the two payloads changes the same 1 in CHANGED_EVERY prices every poll
+    changed_data = change_prices(payload)
+    copies = [EpicFreeGames.get_products_from_response(json.loads(changed_data if i % 2 else data))
+              for i in range(REPEAT + 1)]
+    changed = best_of(FreeGamesIndex().update, copies)
+    print(f"{label}, {ELEMENT_COUNT} elements")
+    print(f"  process_products:      {full * 1000:8.2f} ms")
+    print(f"  index, first poll:     {first * 1000:8.2f} ms")
+    print(f"  index, unchanged poll: {unchanged * 1000:8.2f} ms ({full / unchanged:.1f}x)")
+    print(f"  index, 1% changed:     {changed * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=io.StringIO(), level=logging.ERROR)
+    run("synthetic", make_payload(ELEMENT_COUNT))
+    run("recorded", scale_payload(load_recorded_payload(), ELEMENT_COUNT))
@@ -0,0 +1,61 @@
+"""Compare the memory used by 100k games as dict backed objects, slotted objects and a GameBatch
+
+Run with: python -m benchmarks.bench_game_memory
+"""
+import tracemalloc
+
+from product_decode import Game, GameBatch
+
+GAME_COUNT = 100_000
+
+
+class DictGame:
+    """The original Game, with a per-instance __dict__"""
+
+    def __init__(self, title, description, price, product_url, thumbnail_url) -> None:
+        self.title = title
+        self.description = description
+        self.price = price
+        self.free = price == 0
+        self.product_url = product_url
+        self.thumbnail_url = thumbnail_url
+
+
+def make_fields(count: int) -> list[tuple]:
+    """Build the Game constructor arguments of count games, each with one promotion window"""
+    fields = []
+    for i in range(count):
+        thumbnail_url = f"https://cdn.example/{i}/thumb.jpg"
+        window = (1704384000, 1704988800, 0 if i % 4 == 0 else 50)
+        fields.append((f"Game {i}", f"Description of game {i}", 0 if i % 4 == 0 else 1999 + i,
+                       f"game-{i}", thumbnail_url, 1999 + i, *window, "GBP", (window,), (), {"Thumbnail": thumbnail_url}))
+    return fields
+
+
+def measure(build, fields) -> int:
+    tracemalloc.start()
+    result = build(fields)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def build_batch(fields) -> GameBatch:
+    batch = GameBatch()
+    for game_fields in fields:
+        batch.append_fields(game_fields)
+    return batch
+
+
+if __name__ == '__main__':
+    fields = make_fields(GAME_COUNT)
+    # The strings are shared by every representation, so only the containers are measured
+    builds = (
+        ("dict Game", lambda rows: [DictGame(*row[:5]) for row in rows]),
+        ("slotted Game", lambda rows: [Game(*row) for row in rows]),
+        ("GameBatch", build_batch),
+    )
+    print(f"{GAME_COUNT} games")
+    for name, build in builds:
+        print(f"{name:<13} {measure(build, fields) / 1e6:6.2f} MB")
@@ -0,0 +1,29 @@
+"""Compare the installed JSON backends on promotion payloads of real and full catalog size
+
+Run with: python -m benchmarks.bench_json
+"""
+import timeit
+
+import json_backend
+from benchmarks.payloads import encode_payload, load_recorded_payload, scale_payload
+from product_decode import EpicFreeGames
+
+# The live endpoint returns around a dozen elements, full catalog queries tens of thousands
+SIZES = [12, 1_000, 20_000]
+REPEAT = 5
+
+
+if __name__ == '__main__':
+    recorded = load_recorded_payload()
+    print(f"backends installed: {', '.join(json_backend.AVAILABLE)}")
+    for size in SIZES:
+        payload = encode_payload(scale_payload(recorded, size))
+        number = max(1, 2_000 // size)
+        print(f"{size} elements, {len(payload) / 1e6:.2f} MB")
+        baseline = None
+        for name in json_backend.AVAILABLE[::-1]:
+            json_backend.use(name)
+            seconds = min(timeit.repeat(lambda: EpicFreeGames.get_products_from_payload(payload),
+                                        number=number, repeat=REPEAT)) / number
+            baseline = baseline or seconds
+            print(f"  {name:<9} {seconds * 1000:9.3f} ms ({baseline / seconds:.1f}x)")
@@ -0,0 +1,43 @@
+"""Find the response body size where decoding across a process pool beats the serial decode
+
+The crossover depends on the core count, so run this on the machine that will poll and
+pass the size it reports to ParallelDecoder as threshold_bytes
+
+Run with: python -m benchmarks.bench_parallel
+"""
+import logging
+import timeit
+
+from benchmarks.payloads import encode_payload, make_payload
+from parallel_decode import ParallelDecoder
+from product_decode import EpicFreeGames
+
+SIZES = [1_000, 5_000, 10_000, 20_000, 50_000, 100_000, 200_000]
+REPEAT = 3
+
+
+def serial_decode(payload: bytes) -> list:
+    return EpicFreeGames.process_products(EpicFreeGames.get_products_from_payload(payload))
+
+
+if __name__ == '__main__':
+    logging.disable(logging.CRITICAL)
+    crossover = None
+    with ParallelDecoder(threshold_bytes=0) as decoder:
+        # Start the workers before timing, as a long running poller would have them already
+        decoder.process_payload(encode_payload(make_payload(decoder.max_workers)))
+        print(f"{decoder.max_workers} workers")
+        if decoder.max_workers < 2:
+            # Both columns would time the same serial decode, and any "crossover" would be noise
+            raise SystemExit("only one CPU is available, so there is no crossover to measure")
+        print(f"{'elements':>9} {'MiB':>7} {'serial ms':>10} {'parallel ms':>12} {'speedup':>8}")
+        for size in SIZES:
+            payload = encode_payload(make_payload(size))
+            serial = min(timeit.repeat(lambda: serial_decode(payload), number=1, repeat=REPEAT))
+            parallel = min(timeit.repeat(lambda: decoder.process_payload(payload), number=1, repeat=REPEAT))
+            print(f"{size:>9} {len(payload) / (1 << 20):>7.1f} {serial * 1000:>10.1f} {parallel * 1000:>12.1f} "
+                  f"{serial / parallel:>7.2f}x")
+            if crossover is None and parallel < serial:
+                crossover = len(payload)
+    print(f"parallel decode is faster from {crossover} bytes, use threshold_bytes={crossover}" if crossover
+          else "parallel decode never won")
@@ -0,0 +1,41 @@
+"""Compare sequential and concurrent multi-region fetches against a local stub server
+
+Run with: python -m benchmarks.bench_regions
+"""
+import time
+
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import StubPromotionsServer
+from product_decode import EpicFreeGames
+from region_fetch import fetch_regions
+
+LATENCY = 0.05
+REGION_COUNTS = [1, 5, 10, 20, 40]
+
+
+def make_targets(count: int) -> list[tuple[str, str]]:
+    return [(f"C{i:02d}", "en-US") for i in range(count)]
+
+
+def time_sequential(targets, base_url) -> float:
+    start = time.perf_counter()
+    for country, locale in targets:
+        EpicFreeGames(country, locale, base_url).make_request()
+    return time.perf_counter() - start
+
+
+def time_concurrent(targets, base_url) -> float:
+    start = time.perf_counter()
+    fetch_regions(targets, base_url=base_url)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    body = encode_payload(make_payload(50))
+    with StubPromotionsServer(body, latency=LATENCY) as server:
+        print(f"{'regions':>8} {'sequential (s)':>15} {'concurrent (s)':>15} {'speedup':>8}")
+        for count in REGION_COUNTS:
+            targets = make_targets(count)
+            sequential = time_sequential(targets, server.base_url)
+            concurrent = time_concurrent(targets, server.base_url)
+            print(f"{count:>8} {sequential:>15.3f} {concurrent:>15.3f} {sequential / concurrent:>7.1f}x")
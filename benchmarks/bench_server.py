@@ -0,0 +1,88 @@
+"""Load test the free games server against a local upstream stub
+
+A burst of concurrent requests for a region that is not cached yet is sent first, showing
+how many upstream fetches it took, then keep-alive clients request cached regions for a
+fixed time and the requests per second are reported
+
+Run with: python -m benchmarks.bench_server
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import StubPromotionsServer
+from free_games_server import FreeGamesService
+
+CLIENTS = 64
+DURATION = 5.0
+BURST = 500
+UPSTREAM_LATENCY = 0.2
+REGIONS = [("US", "en-US"), ("GB", "en-GB"), ("DE", "de-DE"), ("FR", "fr-FR")]
+
+
+def start_service(base_url: str) -> tuple[FreeGamesService, int, asyncio.AbstractEventLoop]:
+    """Run the service on its own event loop thread, so clients do not share its loop"""
+    loop = asyncio.new_event_loop()
+    service = FreeGamesService(base_url)
+    server = loop.run_until_complete(service.serve("127.0.0.1", 0))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return service, server.sockets[0].getsockname()[1], loop
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str) -> int:
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("ascii"))
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+    await reader.readexactly(length)
+    return status
+
+
+async def burst(port: int, target: str) -> list[int]:
+    async def one():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return await request(reader, writer, target)
+        finally:
+            writer.close()
+    return await asyncio.gather(*(one() for _ in range(BURST)))
+
+
+async def client(port: int, targets: list[str], deadline: float, latencies: list[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        index = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await request(reader, writer, targets[index % len(targets)])
+            latencies.append(time.perf_counter() - start)
+            index += 1
+    finally:
+        writer.close()
+
+
+async def load(port: int) -> list[float]:
+    targets = [f"/free-games?country={country}&locale={locale}" for country, locale in REGIONS]
+    latencies = []
+    deadline = time.perf_counter() + DURATION
+    await asyncio.gather(*(client(port, targets[i:] + targets[:i], deadline, latencies) for i in range(CLIENTS)))
+    return latencies
+
+
+if __name__ == '__main__':
+    logging.disable(logging.CRITICAL)
+    with StubPromotionsServer(encode_payload(make_payload(200)), latency=UPSTREAM_LATENCY) as upstream:
+        service, port, loop = start_service(upstream.base_url)
+        start = time.perf_counter()
+        statuses = asyncio.run(burst(port, "/free-games?country=US&locale=en-US"))
+        print(f"cold burst of {BURST} requests: {statuses.count(200)} ok in {time.perf_counter() - start:.3f} s, "
+              f"{upstream.request_count} upstream fetch(es)")
+        latencies = sorted(asyncio.run(load(port)))
+        print(f"{CLIENTS} keep-alive clients over {len(REGIONS)} regions for {DURATION:.0f} s: "
+              f"{len(latencies) / DURATION:,.0f} requests/s, "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+        print(f"{upstream.request_count} upstream fetches in total")
+        loop.call_soon_threadsafe(loop.stop)
+        service.close()
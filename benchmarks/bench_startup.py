@@ -0,0 +1,67 @@
+"""Measure the startup cost of the checker with python -X importtime
+
+Runs main.py on the recorded payload in --from-file mode, reports its wall clock time and
+heaviest imports, and compares it with importing requests, which the network path loads
+
+Run with: python -m benchmarks.bench_startup
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.payloads import RECORDED_PAYLOAD_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FROM_FILE_COMMAND = [os.path.join(ROOT, "main.py"), "--from-file", RECORDED_PAYLOAD_PATH]
+REQUESTS_COMMAND = ["-c", "import requests"]
+REPEAT = 10
+TOP_IMPORTS = 10
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """Get (module, self us, cumulative us, nesting depth) for every import reported by -X importtime"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        name = module.rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def import_profile(command: list[str]) -> list[tuple[str, int, int, int]]:
+    result = subprocess.run([sys.executable, "-X", "importtime", *command],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return parse_importtime(result.stderr)
+
+
+def wall_clock(command: list[str]) -> float:
+    """Get the median seconds taken to run a fresh interpreter on command"""
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *command], cwd=ROOT, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def report(name: str, command: list[str]) -> None:
+    imports = import_profile(command)
+    # The cumulative times of the top level imports add up to the total
+    total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+    print(f"{name}: {wall_clock(command) * 1000:.1f} ms wall clock, "
+          f"{total / 1000:.1f} ms importing {len(imports)} modules")
+    for module, self_us, cumulative, _ in sorted(imports, key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]:
+        print(f"  {module:<40} {self_us / 1000:7.2f} ms self {cumulative / 1000:7.2f} ms cumulative")
+
+
+if __name__ == '__main__':
+    report("main.py --from-file", FROM_FILE_COMMAND)
+    report("import requests", REQUESTS_COMMAND)
+    loaded = {module for module, _, _, _ in import_profile(FROM_FILE_COMMAND)}
+    heavy = sorted(name for name in ("requests", "urllib3", "numpy", "sqlite3", "orjson", "simdjson") if name in loaded)
+    print(f"optional or network modules loaded by --from-file: {', '.join(heavy) or 'none'}")
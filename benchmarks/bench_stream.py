@@ -0,0 +1,44 @@
+"""Compare the peak memory of a full JSON decode with streaming the elements
+
+Run with: python -m benchmarks.bench_stream
+"""
+import json
+import time
+import tracemalloc
+
+from benchmarks.payloads import encode_payload, make_payload
+from product_decode import EpicFreeGames
+from stream_decode import DEFAULT_CHUNK_SIZE, iter_elements
+
+ELEMENT_COUNT = 50_000
+
+
+def chunks_of(data: bytes):
+    for i in range(0, len(data), DEFAULT_CHUNK_SIZE):
+        yield data[i:i + DEFAULT_CHUNK_SIZE]
+
+
+def full_decode(data: bytes):
+    return EpicFreeGames.process_products(EpicFreeGames.get_products_from_response(json.loads(data)))
+
+
+def streaming_decode(data: bytes):
+    return EpicFreeGames.process_products(iter_elements(chunks_of(data)))
+
+
+def measure(decode, data: bytes) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    decode(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    data = encode_payload(make_payload(ELEMENT_COUNT))
+    print(f"{ELEMENT_COUNT} elements, {len(data) / 1e6:.1f} MB payload")
+    for name, decode in (("full decode", full_decode), ("streaming", streaming_decode)):
+        elapsed, peak = measure(decode, data)
+        print(f"{name:<12} {elapsed * 1000:8.1f} ms  peak {peak / 1e6:6.1f} MB")
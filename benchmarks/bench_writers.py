@@ -0,0 +1,61 @@
+"""Compare writing 100k decoded games with Game.display against the bulk writers, and loading a snapshot
+
+Game.display and the text writer print four fields, jsonl every field and csv the scalar ones
+
+Run with: python -m benchmarks.bench_writers
+"""
+import contextlib
+import io
+import os
+import tempfile
+import timeit
+
+from benchmarks.payloads import make_payload
+from game_writers import GameSnapshot, write_csv, write_jsonl, write_snapshot, write_text
+from product_decode import EpicFreeGames, GameBatch
+
+GAME_COUNT = 100_000
+REPEAT = 3
+# Games read one by one from the mapped snapshot, as a lookup would
+SAMPLED_GAMES = 100
+
+
+def display_all(games) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        for game in games:
+            game.display()
+
+
+if __name__ == '__main__':
+    products = EpicFreeGames.get_products_from_response(make_payload(GAME_COUNT, free_every=1))
+    batch = GameBatch.from_products(products)
+    games = list(batch)
+    print(f"{GAME_COUNT} games")
+    baseline = min(timeit.repeat(lambda: display_all(games), number=1, repeat=REPEAT))
+    print(f"{'Game.display':<16} {baseline * 1000:9.2f} ms")
+    for name, writer in (("text", write_text), ("jsonl", write_jsonl), ("csv", write_csv)):
+        seconds = min(timeit.repeat(lambda: writer(games, io.StringIO()), number=1, repeat=REPEAT))
+        print(f"{name:<16} {seconds * 1000:9.2f} ms ({baseline / seconds:.1f}x)")
+    seconds = min(timeit.repeat(lambda: write_snapshot(batch, io.BytesIO()), number=1, repeat=REPEAT))
+    print(f"{'snapshot':<16} {seconds * 1000:9.2f} ms ({baseline / seconds:.1f}x)")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.snapshot")
+        with open(path, "wb") as output:
+            write_snapshot(batch, output)
+        print(f"snapshot size    {os.path.getsize(path) / 1e6:9.2f} MB")
+
+        def load() -> None:
+            with GameSnapshot(path) as snapshot:
+                snapshot.to_batch()
+
+        def read_some() -> None:
+            with GameSnapshot(path) as snapshot:
+                for index in range(0, len(snapshot), len(snapshot) // SAMPLED_GAMES):
+                    snapshot[index]
+
+        seconds = min(timeit.repeat(load, number=1, repeat=REPEAT))
+        print(f"{'snapshot load':<16} {seconds * 1000:9.2f} ms")
+        seconds = min(timeit.repeat(read_some, number=1, repeat=REPEAT))
+        print(f"{f'snapshot {SAMPLED_GAMES} games':<16} {seconds * 1000:9.2f} ms")
+        seconds = min(timeit.repeat(lambda: GameBatch.from_products(products), number=1, repeat=REPEAT))
+        print(f"{'decode products':<16} {seconds * 1000:9.2f} ms")
@@ -0,0 +1,94 @@
+import copy
+import json
+import os
+import random
+
+RECORDED_PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "freeGamesPromotions.json")
+
+# Ways make_malformed_product breaks an element, modelled on the placeholders seen in real payloads
+MALFORMED_KINDS = ("mystery", "float_price", "missing_description", "null_element")
+
+
+def make_offers(start: str, end: str, discount: int) -> list:
+    return [{"promotionalOffers": [
+        {"startDate": start, "endDate": end, "discountSetting": {"discountType": "PERCENTAGE", "discountPercentage": discount}}]}]
+
+
+def make_product(index: int, price: int = 0) -> dict:
+    """Build a well formed searchStore element, with a free promotion when price is 0"""
+    if price == 0:
+        promotions = {"promotionalOffers": make_offers("2024-01-04T16:00:00.000Z", "2024-01-11T16:00:00.000Z", 0),
+                      "upcomingPromotionalOffers": []}
+    else:
+        promotions = None
+    return {
+        "title": f"Game {index}",
+        "description": f"Description of game {index}",
+        "price": {"totalPrice": {"discountPrice": price, "originalPrice": 1999}},
+        "offerMappings": [{"pageSlug": f"game-{index}"}],
+        "keyImages": [
+            {"type": "OfferImageWide", "url": f"https://cdn.example/{index}/wide.jpg"},
+            {"type": "Thumbnail", "url": f"https://cdn.example/{index}/thumb.jpg"}
+        ],
+        "promotions": promotions
+    }
+
+
+def make_malformed_product(index: int, kind: str):
+    """Build an element that fails to decode in the way described by kind"""
+    if kind == "null_element":
+        return None
+    product = make_product(index, 0)
+    if kind == "mystery":
+        product["title"] = "Mystery Game"
+        product["offerMappings"] = []
+    elif kind == "float_price":
+        product["price"]["totalPrice"]["discountPrice"] = 0.0
+    elif kind == "missing_description":
+        del product["description"]
+    return product
+
+
+def make_payload(count: int, free_every: int = 4, malformed_ratio: float = 0.0, seed: int = 0) -> dict:
+    """Build a promotions payload with count elements, every free_every-th one free
+
+    About malformed_ratio of the elements are replaced by elements that fail to decode
+    """
+    generator = random.Random(seed)
+    elements = []
+    for i in range(count):
+        if malformed_ratio and generator.random() < malformed_ratio:
+            elements.append(make_malformed_product(i, MALFORMED_KINDS[i % len(MALFORMED_KINDS)]))
+        else:
+            elements.append(make_product(i, 0 if i % free_every == 0 else 1999))
+    return wrap_elements(elements)
+
+
+def wrap_elements(elements: list) -> dict:
+    return {"data": {"Catalog": {"searchStore": {"elements": elements}}}, "extensions": {}}
+
+
+def load_recorded_payload() -> dict:
+    """Load the payload fixture in the shape returned by the promotions endpoint"""
+    with open(RECORDED_PAYLOAD_PATH, encoding="utf-8") as fixture:
+        return json.load(fixture)
+
+
+def scale_payload(payload: dict, count: int) -> dict:
+    """Repeat the elements of payload until there are count of them, giving each copy its own slug"""
+    source = payload["data"]["Catalog"]["searchStore"]["elements"]
+    elements = []
+    for i in range(count):
+        element = copy.deepcopy(source[i % len(source)])
+        copy_number = i // len(source)
+        if copy_number and element.get("offerMappings"):
+            element["title"] = f"{element['title']} {copy_number}"
+            for mapping in element["offerMappings"]:
+                mapping["pageSlug"] = f"{mapping['pageSlug']}-{copy_number}"
+        elements.append(element)
+    return wrap_elements(elements)
+
+
+def encode_payload(payload: dict) -> bytes:
+    """Serialize a payload the way the promotions endpoint does"""
+    return json.dumps(payload).encode("utf-8")
@@ -0,0 +1,123 @@
+"""Time the decode pipeline over recorded and synthetic payloads and save the results as JSON
+
+Run with: python -m benchmarks.run_benchmarks [--output results.json] [--compare previous.json]
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.payloads import encode_payload, load_recorded_payload, make_payload, scale_payload
+from benchmarks.stub_server import StubPromotionsServer
+from product_decode import EpicFreeGames
+
+DEFAULT_SIZES = [10, 1000, 100_000]
+DEFAULT_MALFORMED_RATIOS = [0.0, 0.1, 0.5]
+DEFAULT_LATENCY = 0.02
+# Larger payloads take longer per run, so they are repeated fewer times
+REPEATS = {10: 200, 1000: 20, 100_000: 3}
+
+
+def time_call(function, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(name: str, payload: str, size: int, malformed_ratio: float, timings: list[float], per: int = 1) -> dict:
+    return {
+        "name": name,
+        "payload": payload,
+        "size": size,
+        "malformed_ratio": malformed_ratio,
+        "repeat": len(timings),
+        "min": min(timings) / per,
+        "median": statistics.median(timings) / per,
+        "max": max(timings) / per
+    }
+
+
+def bench_payload(label: str, payload: dict, malformed_ratio: float, latency: float) -> list[dict]:
+    products = EpicFreeGames.get_products_from_response(payload)
+    size = len(products)
+    repeat = REPEATS.get(size, max(3, 20_000 // max(size, 1)))
+    results = [
+        summarize("get_products_from_response", label, size, malformed_ratio,
+                  time_call(lambda: EpicFreeGames.get_products_from_response(payload), repeat)),
+        summarize("process_products", label, size, malformed_ratio,
+                  time_call(lambda: EpicFreeGames.process_products(products), repeat)),
+        summarize("decode_product", label, size, malformed_ratio,
+                  time_call(lambda: [EpicFreeGames.decode_product(product) for product in products], repeat), per=size)
+    ]
+    with StubPromotionsServer(encode_payload(payload), latency=latency) as server:
+        manager = EpicFreeGames(base_url=server.base_url)
+        results.append(summarize("make_request", label, size, malformed_ratio,
+                                 time_call(manager.make_request, max(3, repeat // 10))))
+    return results
+
+
+def git_revision() -> (str | None):
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result: dict) -> tuple:
+    return result["name"], result["payload"], result["size"], result["malformed_ratio"]
+
+
+def compare(results: list[dict], previous_path: str) -> None:
+    """Print the change in median time against an earlier results file"""
+    with open(previous_path, encoding="utf-8") as previous_file:
+        previous = json.load(previous_file)
+    before = {result_key(result): result for result in previous["results"]}
+    for result in results:
+        old = before.get(result_key(result))
+        if old is not None:
+            change = (result["median"] - old["median"]) / old["median"] * 100
+            print(f"{result['name']:<28} {result['payload']:<10} {result['size']:>7} "
+                  f"{result['malformed_ratio']:>5.0%} {change:+7.1f}%")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the decode benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--malformed-ratios", type=float, nargs="+", default=DEFAULT_MALFORMED_RATIOS)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="stub server latency in seconds")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    logging.disable(logging.CRITICAL)
+    results = []
+    recorded = load_recorded_payload()
+    results.extend(bench_payload("recorded", recorded, 0.0, args.latency))
+    for size in args.sizes:
+        results.extend(bench_payload("recorded", scale_payload(recorded, size), 0.0, args.latency))
+        for ratio in args.malformed_ratios:
+            results.extend(bench_payload("synthetic", make_payload(size, malformed_ratio=ratio), ratio, args.latency))
+    for result in results:
+        print(f"{result['name']:<28} {result['payload']:<10} {result['size']:>7} "
+              f"{result['malformed_ratio']:>5.0%} median {result['median'] * 1000:10.4f} ms")
+    report = {
+        "revision": git_revision(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "created": time.time(),
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,90 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Fault that closes the connection without sending a response
+DROP = "drop"
+
+
+class StubPromotionsServer:
+    """Local HTTP server that mimics the freeGamesPromotions endpoint
+
+    Every GET is answered with the same body after sleeping for latency seconds. When an
+    etag is given it is sent with the body, and a matching If-None-Match gets a 304.
+
+    faults are injected into the first requests, one per request, in order: None answers
+    normally, an int answers with that status code, a float sleeps that many extra seconds
+    first and DROP closes the connection without answering
+    """
+
+    def __init__(self,
+                 body: bytes,
+                 latency: float = 0.0,
+                 etag: (str | None) = None,
+                 faults: (list | None) = None) -> None:
+        self.body = body
+        self.latency = latency
+        self.etag = etag
+        self.faults = list(faults or ())
+        self.request_count = 0
+        self.not_modified_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/freeGamesPromotions"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                    fault = stub.faults.pop(0) if stub.faults else None
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if fault == DROP:
+                    self.close_connection = True
+                    return
+                if isinstance(fault, float):
+                    time.sleep(fault)
+                elif isinstance(fault, int):
+                    self.send_response(fault)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if stub.etag is not None and self.headers.get("If-None-Match") == stub.etag:
+                    with stub._lock:
+                        stub.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", stub.etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                if stub.etag is not None:
+                    self.send_header("ETag", stub.etag)
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
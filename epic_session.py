@@ -0,0 +1,84 @@
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from product_decode import DEFAULT_TIMEOUT, EpicFreeGames, Game
+
+DEFAULT_POOL_SIZE = 8
+
+
+def make_pooled_session(pool_size: int = DEFAULT_POOL_SIZE) -> requests.Session:
+    """Create a session whose connection pool can serve pool_size concurrent requests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class CachedPromotions:
+    def __init__(self,
+                 etag: (str | None),
+                 last_modified: (str | None),
+                 free_games: list[Game]) -> None:
+        self.etag = etag
+        self.last_modified = last_modified
+        self.free_games = free_games
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Build the headers that ask the server to reply 304 if nothing changed"""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class EpicSession:
+    """Long lived HTTP session for polling the promotions endpoint
+
+    Connections are pooled and kept alive between polls, and each URL is requested
+    conditionally using the ETag/Last-Modified of its last good response. A 304 reuses
+    the free games decoded from that response without downloading or parsing anything
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT) -> None:
+        self.session = make_pooled_session(pool_size)
+        self.timeout = timeout
+        self._cache: dict[str, CachedPromotions] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, manager: EpicFreeGames) -> bool:
+        """Update the free games of manager, reusing the cached result when unchanged
+
+        Returns whether the free games were updated
+        """
+        url = manager.URL_FOR_CHECK
+        with self._lock:
+            cached = self._cache.get(url)
+        headers = cached.conditional_headers() if cached is not None else {}
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached is not None:
+            logging.info(f"Promotions for {url} not modified")
+            manager.set_free_games(list(cached.free_games))
+            return True
+        if not manager.process_response(response):
+            return False
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag is not None or last_modified is not None:
+            with self._lock:
+                self._cache[url] = CachedPromotions(etag, last_modified, list(manager.free_games))
+        return True
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import json_backend
+from game_writers import game_record
+from product_decode import DEFAULT_COUNTRY, DEFAULT_LOCALE, PROMOTIONS_URL, EpicFreeGames, Game, expiry_for
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_TTL = 300
+DEFAULT_MAX_REGIONS = 256
+DEFAULT_MAX_WORKERS = 8
+# Seconds an expired response is served after a failed refresh before the next refresh
+DEFAULT_RETRY_INTERVAL = 30
+# Request targets whose parsed region is remembered, so repeat requests skip parsing
+MAX_ROUTES = 4096
+COUNTRY_PATTERN = re.compile(r"[A-Z]{2}")
+LOCALE_PATTERN = re.compile(r"[a-z]{2,3}(-[A-Za-z0-9]{2,4})?")
+
+
+def build_response(status: int, reason: str, body: bytes, content_type: str = "application/json") -> bytes:
+    """Serialize a whole HTTP/1.1 response, headers included"""
+    head = f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
+    return head.encode("ascii") + body
+
+
+def error_response(status: int, reason: str, message: str) -> bytes:
+    return build_response(status, reason, json_backend.dumps({"error": message}).encode("utf-8"))
+
+
+HEALTHY = build_response(200, "OK", b"ok", "text/plain")
+NOT_FOUND = error_response(404, "Not Found", "Not found")
+METHOD_NOT_ALLOWED = error_response(405, "Method Not Allowed", "Only GET is supported")
+BAD_REQUEST = error_response(400, "Bad Request", "Request is invalid")
+INVALID_REGION = error_response(400, "Bad Request", "country must be two letters and locale a language tag such as en-US")
+UPSTREAM_FAILED = error_response(502, "Bad Gateway", "Could not fetch the free games")
+
+
+class CachedRegion:
+    __slots__ = ("response", "expires_at")
+
+    def __init__(self, response: bytes, expires_at: float) -> None:
+        self.response = response
+        self.expires_at = expires_at
+
+
+class FreeGamesService:
+    """Serves the free games of any region over HTTP from an in-memory cache
+
+    Each region's response is serialized once per upstream fetch, so serving it is a
+    single write of ready made bytes. Requests for a region that is missing or expired
+    while a fetch for it is running wait for that fetch rather than starting another.
+    Entries expire after ttl seconds, or when the first of their promotions ends, and
+    only the max_regions most recently requested regions are kept. When a refresh fails
+    the expired response is served, and refreshed again after retry_interval seconds
+    """
+
+    def __init__(self,
+                 base_url: str = PROMOTIONS_URL,
+                 ttl: float = DEFAULT_TTL,
+                 max_regions: int = DEFAULT_MAX_REGIONS,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 session=None,
+                 clock=time.time,
+                 retry_interval: float = DEFAULT_RETRY_INTERVAL) -> None:
+        self.base_url = base_url
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.max_regions = max_regions
+        self.clock = clock
+        if session is None:
+            from epic_session import make_pooled_session
+            session = make_pooled_session(max_workers)
+        self.session = session
+        self.upstream_fetches = 0
+        self._regions: OrderedDict[tuple[str, str], CachedRegion] = OrderedDict()
+        self._flights: dict[tuple[str, str], asyncio.Future] = {}
+        self._routes: dict[str, (tuple[str, str] | bytes)] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def expiry_for(self, games: list[Game]) -> float:
+        """Get when a region's free games go stale: the first promotion end, capped at ttl"""
+        return expiry_for(games, self.clock(), self.ttl)
+
+    async def get_response(self, country: str, locale: str) -> bytes:
+        """Get the serialized response for a region, fetching it at most once at a time"""
+        key = (country, locale)
+        cached = self._regions.get(key)
+        if cached is not None and cached.expires_at > self.clock():
+            self._regions.move_to_end(key)
+            return cached.response
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = asyncio.ensure_future(self._refresh(key, cached))
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        # Shielded so a client that disconnects does not cancel the fetch others wait on
+        return await asyncio.shield(flight)
+
+    async def _refresh(self, key: tuple[str, str], stale: (CachedRegion | None)) -> bytes:
+        country, locale = key
+        manager = EpicFreeGames(country, locale, self.base_url)
+        self.upstream_fetches += 1
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(self._executor, manager.make_request, self.session):
+            if stale is not None:
+                logging.warning(f"Serving expired free games for {country}/{locale}")
+                # Kept fresh for a short while, so requests meanwhile do not each wait on the failing upstream
+                self._store(key, CachedRegion(stale.response, self.clock() + self.retry_interval))
+                return stale.response
+            return UPSTREAM_FAILED
+        body = json_backend.dumps({"country": country, "locale": locale,
+                                   "free_games": [game_record(game) for game in manager.free_games]})
+        response = build_response(200, "OK", body.encode("utf-8"))
+        self._store(key, CachedRegion(response, self.expiry_for(manager.free_games)))
+        return response
+
+    def _store(self, key: tuple[str, str], region: CachedRegion) -> None:
+        self._regions[key] = region
+        self._regions.move_to_end(key)
+        while len(self._regions) > self.max_regions:
+            self._regions.popitem(last=False)
+
+    def route(self, target: str) -> (tuple[str, str] | bytes):
+        """Get the region a request target asks for, or the response to send if it is not a region"""
+        route = self._routes.get(target)
+        if route is not None:
+            return route
+        url = urlsplit(target)
+        if url.path == "/healthz":
+            route = HEALTHY
+        elif url.path != "/free-games":
+            route = NOT_FOUND
+        else:
+            query = parse_qs(url.query)
+            country = query.get("country", [DEFAULT_COUNTRY])[0].upper()
+            locale = query.get("locale", [DEFAULT_LOCALE])[0]
+            if COUNTRY_PATTERN.fullmatch(country) and LOCALE_PATTERN.fullmatch(locale):
+                route = (country, locale)
+            else:
+                route = INVALID_REGION
+        if len(self._routes) >= MAX_ROUTES:
+            self._routes.clear()
+        self._routes[target] = route
+        return route
+
+    async def respond(self, method: str, target: str) -> bytes:
+        if method != "GET":
+            return METHOD_NOT_ALLOWED
+        route = self.route(target)
+        if isinstance(route, bytes):
+            return route
+        return await self.get_response(*route)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the requests of one keep-alive connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, _, headers = head.decode("latin-1").partition("\r\n")
+                parts = request_line.split(" ")
+                if len(parts) != 3:
+                    writer.write(BAD_REQUEST)
+                    break
+                method, target, version = parts
+                response = await self.respond(method, target)
+                writer.write(response)
+                await writer.drain()
+                # Requests with a body are not read, so their connection cannot be reused
+                if (method != "GET" or version == "HTTP/1.0"
+                        or "connection: close" in headers.lower()):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.Server:
+        """Start listening, returns the running server"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the free games of any region over HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="longest seconds a region's free games are cached")
+    parser.add_argument("--base-url", default=PROMOTIONS_URL, help="promotions endpoint to fetch from")
+    return parser.parse_args()
+
+
+async def run(args) -> None:
+    service = FreeGamesService(args.base_url, args.ttl)
+    server = await service.serve(args.host, args.port)
+    logging.info(f"Serving free games on http://{args.host}:{args.port}/free-games")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,173 @@
+import logging
+
+from product_decode import DecodeReport, EpicFreeGames, Game
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+class GameEvent:
+    __slots__ = ("kind", "game")
+
+    def __init__(self, kind: str, game: Game) -> None:
+        self.kind = kind
+        self.game = game
+
+    def __repr__(self) -> str:
+        return f"GameEvent({self.kind!r}, {self.game.product_url!r})"
+
+
+def game_key(game: Game) -> tuple:
+    """The parts of a game whose change is reported: slug, prices, currency and promotion windows"""
+    return (game.product_url, game.price, game.original_price, game.currency_code,
+            game.promotion_windows, game.upcoming_windows)
+
+
+def element_fingerprint(product) -> (tuple[str, tuple] | None):
+    """Get the slug and a fingerprint of a raw product without decoding it
+
+    The fingerprint holds the raw title, prices, currency and promotions, and is compared
+    by equality, so comparing it with the previous poll's runs in C without walking the
+    offers in Python. Returns None when the product is too malformed to read, so it goes
+    through the full decode instead
+    """
+    try:
+        slug = product["offerMappings"][0]["pageSlug"]
+        total_price = product["price"]["totalPrice"]
+        fingerprint = (product["title"], total_price["discountPrice"], total_price.get("originalPrice"),
+                       total_price.get("currencyCode"), product.get("promotions"))
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+    if not isinstance(slug, str):
+        return None
+    return slug, fingerprint
+
+
+class FreeGamesIndex:
+    """Remembers the free games of the previous poll and reports what changed since
+
+    Products whose fingerprint matches the previous poll reuse the previous result
+    instead of being decoded again, and the others are decoded like
+    EpicFreeGames.process_products, which stops at the required fields of paid products
+    """
+
+    def __init__(self) -> None:
+        self.fingerprints: dict[str, tuple] = {}
+        self.games: dict[str, Game] = {}
+        # Games that are not free now but have a current or upcoming free promotion, by slug
+        self.upcoming: dict[str, Game] = {}
+        # Element index of each product that failed to decode, with the product and its (field path, reason)
+        self.failed: dict[int, tuple] = {}
+
+    @property
+    def free_games(self) -> list[Game]:
+        return list(self.games.values())
+
+    @property
+    def upcoming_free_games(self) -> list[Game]:
+        """Games of the last poll that are not free now but have a free promotion window"""
+        return list(self.upcoming.values())
+
+    def update(self, products, report: (DecodeReport | None) = None) -> list[GameEvent]:
+        """Decode the products of a new poll and return the changes to the free games
+
+        When a report is given, decode failures are recorded in it instead of logged. A
+        failure is only logged in the poll where it first appears, while it stays the same
+        element at the same index it is counted but not logged again
+        """
+        previous_fingerprints = self.fingerprints
+        previous_games = self.games
+        previous_upcoming = self.upcoming
+        previous_failed = self.failed
+        fingerprints: dict[str, tuple] = {}
+        games: dict[str, (Game | None)] = {}
+        upcoming: dict[str, Game] = {}
+        failed: dict[int, tuple] = {}
+        reused = 0
+        # The products to decode, with their element index and, when they have one, slug and fingerprint
+        changed = []
+        indexes = []
+        changed_fingerprints = []
+        for index, product in enumerate(products):
+            previous_failure = previous_failed.get(index)
+            if (previous_failure is not None and (report is None or previous_failure[1] is not None)
+                    and previous_failure[0] == product):
+                failed[index] = previous_failure
+                if report is not None:
+                    report.add(index, *previous_failure[1])
+                continue
+            found = element_fingerprint(product)
+            if found is not None:
+                slug, fingerprint = found
+                if previous_fingerprints.get(slug) == fingerprint:
+                    fingerprints[slug] = fingerprint
+                    game = previous_games.get(slug)
+                    if game is not None:
+                        games[slug] = game
+                    else:
+                        game = previous_upcoming.get(slug)
+                        if game is not None:
+                            upcoming[slug] = game
+                    reused += 1
+                    continue
+                if fingerprint[1] == 0:
+                    # Keeps the place of a free game in the order of the poll until it is decoded
+                    games[slug] = None
+            changed.append(product)
+            indexes.append(index)
+            changed_fingerprints.append(found)
+        changed_report = None if report is None else DecodeReport(max_records=len(changed))
+        skipped = []
+        for fields in EpicFreeGames.iter_product_fields(changed, changed_report, free_only=True, skipped=skipped,
+                                                        keep_free_windows=True):
+            game = Game(*fields)
+            if game.free:
+                games[game.product_url] = game
+            else:
+                upcoming[game.product_url] = game
+        games = {slug: game for slug, game in games.items() if game is not None}
+        reasons = {}
+        if changed_report is not None:
+            reasons = {position: (field_path, reason) for position, field_path, reason in changed_report.failures}
+            report.merge(changed_report, indexes)
+            report.decoded += reused
+        skipped = set(skipped)
+        for position, found in enumerate(changed_fingerprints):
+            if position in skipped or (found is not None and (found[0] in games or found[0] in upcoming)):
+                if found is not None:
+                    fingerprints[found[0]] = found[1]
+            else:
+                failed[indexes[position]] = (changed[position], reasons.get(position))
+        logging.info(f"Reused {reused} unchanged products, {len(failed)} products failed to decode")
+        events = self._diff(games)
+        self.fingerprints = fingerprints
+        self.games = games
+        self.upcoming = upcoming
+        self.failed = failed
+        return events
+
+    def update_games(self, free_games: list[Game]) -> list[GameEvent]:
+        """Replace the free games with already decoded ones and return the changes
+
+        The upcoming free games of the last poll are kept, as the decoded games do not include them
+        """
+        games = {game.product_url: game for game in free_games}
+        events = self._diff(games)
+        self.fingerprints = {}
+        self.games = games
+        self.failed = {}
+        return events
+
+    def _diff(self, games: dict[str, Game]) -> list[GameEvent]:
+        events = []
+        for slug, game in games.items():
+            previous = self.games.get(slug)
+            if previous is None:
+                events.append(GameEvent(ADDED, game))
+            elif previous is not game and game_key(previous) != game_key(game):
+                events.append(GameEvent(CHANGED, game))
+        for slug, previous in self.games.items():
+            if slug not in games:
+                events.append(GameEvent(REMOVED, previous))
+        return events
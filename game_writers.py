@@ -0,0 +1,294 @@
+import csv
+import mmap
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+import json_backend
+from product_decode import NO_PROMOTION, Game, GameBatch, ProductDecodeException
+
+FORMATS = ("text", "jsonl", "csv", "snapshot")
+CSV_FIELDS = ("title", "description", "price", "original_price", "currency_code", "product_url", "thumbnail_url",
+              "promotion_start", "promotion_end", "promotion_discount")
+# Lines are joined and written this many at a time
+WRITE_CHUNK = 1024
+
+SNAPSHOT_MAGIC = b"EGSN"
+SNAPSHOT_VERSION = 1
+# Magic, version, game count, string count, then the offset of each section
+SNAPSHOT_HEADER = struct.Struct("<4sHxxII8Q")
+SNAPSHOT_SECTIONS = ("string_offsets", "string_data", "text_columns", "number_columns",
+                     "window_offsets", "window_data", "image_offsets", "image_data")
+# String index of a missing text value
+NO_STRING = 0xFFFFFFFF
+
+
+def game_record(game: Game) -> dict:
+    """Get every field of a game as a JSON serializable dictionary"""
+    return {
+        "title": game.title,
+        "description": game.description,
+        "price": game.price,
+        "original_price": game.original_price,
+        "currency_code": game.currency_code,
+        "product_url": game.product_url,
+        "thumbnail_url": game.thumbnail_url,
+        "promotion_start": game.promotion_start,
+        "promotion_end": game.promotion_end,
+        "promotion_discount": game.promotion_discount,
+        "promotion_windows": game.promotion_windows,
+        "upcoming_windows": game.upcoming_windows,
+        "images": game.images
+    }
+
+
+def _write_chunked(lines, stream) -> int:
+    count = 0
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == WRITE_CHUNK:
+            stream.write("".join(chunk))
+            count += len(chunk)
+            chunk = []
+    stream.write("".join(chunk))
+    return count + len(chunk)
+
+
+def write_text(games, stream) -> int:
+    """Write the games in the format of Game.display, returns how many were written"""
+    return _write_chunked((f"Title:{game.title}\nDescription: {game.description}\nProduct page: {game.product_url}\n"
+                           f"Thumbnail: {game.thumbnail_url}\n" for game in games), stream)
+
+
+def write_jsonl(games, stream) -> int:
+    """Write every game as a line of JSON, returns how many were written"""
+    return _write_chunked((json_backend.dumps(game_record(game)) + "\n" for game in games), stream)
+
+
+def write_csv(games, stream) -> int:
+    """Write the CSV_FIELDS of every game as CSV with a header row, returns how many were written
+
+    The stream should be opened with newline=""
+    """
+    writer = csv.writer(stream)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    rows = []
+    for game in games:
+        rows.append((game.title, game.description, game.price, game.original_price, game.currency_code,
+                     game.product_url, game.thumbnail_url, game.promotion_start, game.promotion_end,
+                     game.promotion_discount))
+        if len(rows) == WRITE_CHUNK:
+            writer.writerows(rows)
+            count += len(rows)
+            rows = []
+    writer.writerows(rows)
+    return count + len(rows)
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def write_snapshot(games, stream) -> int:
+    """Write the games as a binary snapshot that GameSnapshot can map without decoding, returns how many were written
+
+    Every distinct string is stored once in a string table. Text columns hold indexes into
+    it, and number columns, promotion windows and images are stored as packed arrays.
+    The stream must be binary
+    """
+    batch = games if isinstance(games, GameBatch) else GameBatch.from_games(games)
+    count = len(batch)
+    strings: dict[str, int] = {}
+    add = strings.setdefault
+    text_columns = array("I")
+    for column in (batch.titles, batch.descriptions, batch.product_urls, batch.thumbnail_urls, batch.currency_codes):
+        text_columns.extend([NO_STRING if value is None else add(value, len(strings)) for value in column])
+    # Each game has a group of current then a group of upcoming windows
+    groups = [windows for pair in zip(batch.promotion_windows, batch.upcoming_windows) for windows in pair]
+    window_offsets = array("I", accumulate(map(len, groups), initial=0))
+    window_data = array("q", [value for windows in groups for window in windows for value in window])
+    image_offsets = array("I", accumulate(map(len, batch.images), initial=0))
+    image_data = array("I", [add(value, len(strings))
+                             for images in batch.images for image in images.items() for value in image])
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets = array("I", accumulate(map(len, encoded), initial=0))
+    number_columns = array("q")
+    for column in (batch.prices, batch.original_prices, batch.promotion_starts, batch.promotion_ends,
+                   batch.promotion_discounts):
+        number_columns.extend(column)
+    sections = (_little_endian(string_offsets), b"".join(encoded), _little_endian(text_columns),
+                _little_endian(number_columns), _little_endian(window_offsets), _little_endian(window_data),
+                _little_endian(image_offsets), _little_endian(image_data))
+    offsets = []
+    position = SNAPSHOT_HEADER.size
+    for section in sections:
+        # Each section starts 8 byte aligned, so the number arrays can be viewed in place
+        position += -position % 8
+        offsets.append(position)
+        position += len(section)
+    stream.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, count, len(encoded), *offsets))
+    position = SNAPSHOT_HEADER.size
+    for offset, section in zip(offsets, sections):
+        stream.write(b"\0" * (offset - position))
+        stream.write(section)
+        position = offset + len(section)
+    return count
+
+
+class GameSnapshot:
+    """Memory-mapped view of a snapshot written by write_snapshot
+
+    Games are read straight from the mapped file on access, and to_batch copies whole
+    columns into a GameBatch without decoding anything but the strings
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ProductDecodeException("Snapshot is empty")
+        self._views = []
+        try:
+            magic, version, self.count, self.string_count, *offsets = SNAPSHOT_HEADER.unpack_from(self._map)
+        except struct.error:
+            self.close()
+            raise ProductDecodeException("Snapshot header is invalid")
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ProductDecodeException("Snapshot header is invalid")
+        self._offsets = dict(zip(SNAPSHOT_SECTIONS, offsets))
+        self._string_offsets = self._section("string_offsets", "I", self.string_count + 1)
+        self._text_columns = self._section("text_columns", "I", 5 * self.count)
+        self._number_columns = self._section("number_columns", "q", 5 * self.count)
+        self._window_offsets = self._section("window_offsets", "I", 2 * self.count + 1)
+        self._window_data = self._section("window_data", "q", 3 * self._window_offsets[-1])
+        self._image_offsets = self._section("image_offsets", "I", self.count + 1)
+        self._image_data = self._section("image_data", "I", 2 * self._image_offsets[-1])
+
+    def _section(self, name: str, typecode: str, length: int):
+        start = self._offsets[name]
+        end = start + length * array(typecode).itemsize
+        if end > len(self._map):
+            self.close()
+            raise ProductDecodeException(f"Snapshot section {name} is truncated")
+        if sys.byteorder != "little":
+            return _from_little_endian(typecode, self._map[start:end])
+        # Viewed in place, so only the pages that are read are loaded from disk
+        view = memoryview(self._map)[start:end]
+        self._views.append(view)
+        typed_view = view.cast(typecode)
+        self._views.append(typed_view)
+        return typed_view
+
+    def string(self, index: int) -> (str | None):
+        if index == NO_STRING:
+            return None
+        start = self._offsets["string_data"]
+        return self._map[start + self._string_offsets[index]:start + self._string_offsets[index + 1]].decode("utf-8")
+
+    def _windows(self, group: int) -> tuple:
+        start, end = self._window_offsets[group], self._window_offsets[group + 1]
+        data = self._window_data
+        return tuple((data[i], data[i + 1], data[i + 2]) for i in range(3 * start, 3 * end, 3))
+
+    def _images(self, index: int) -> dict[str, str]:
+        start, end = self._image_offsets[index], self._image_offsets[index + 1]
+        data = self._image_data
+        return {self.string(data[i]): self.string(data[i + 1]) for i in range(2 * start, 2 * end, 2)}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> Game:
+        if not 0 <= index < self.count:
+            raise IndexError("Snapshot index out of range")
+        text = [self.string(self._text_columns[column * self.count + index]) for column in range(5)]
+        numbers = [self._number_columns[column * self.count + index] for column in range(5)]
+        start, end, discount = (None if value == NO_PROMOTION else value for value in numbers[2:])
+        return Game(text[0], text[1], numbers[0], text[2], text[3], numbers[1], start, end, discount,
+                    text[4], self._windows(2 * index), self._windows(2 * index + 1), self._images(index))
+
+    def __iter__(self):
+        return map(self.__getitem__, range(self.count))
+
+    def strings(self) -> list[str]:
+        """Decode the whole string table"""
+        start = self._offsets["string_data"]
+        offsets = self._string_offsets.tolist()
+        data = self._map[start:start + offsets[-1]]
+        if data.isascii():
+            # Byte offsets are character offsets, so the table is decoded in one go
+            text = data.decode("ascii")
+            return [text[begin:end] for begin, end in zip(offsets, offsets[1:])]
+        return [data[begin:end].decode("utf-8") for begin, end in zip(offsets, offsets[1:])]
+
+    def to_batch(self) -> GameBatch:
+        """Copy every game into a GameBatch"""
+        batch = GameBatch()
+        strings = self.strings()
+        # A missing value's NO_STRING index is made to pick this None
+        strings.append(None)
+        count = self.count
+        text_indexes = [len(strings) - 1 if index == NO_STRING else index for index in self._text_columns.tolist()]
+        pick = strings.__getitem__
+        text_targets = (batch.titles, batch.descriptions, batch.product_urls, batch.thumbnail_urls, batch.currency_codes)
+        for column, target in enumerate(text_targets):
+            target.extend(map(pick, text_indexes[column * count:(column + 1) * count]))
+        number_targets = (batch.prices, batch.original_prices, batch.promotion_starts, batch.promotion_ends,
+                          batch.promotion_discounts)
+        for column, target in enumerate(number_targets):
+            target.extend(self._number_columns[column * count:(column + 1) * count])
+        window_data = self._window_data.tolist()
+        windows = list(zip(window_data[0::3], window_data[1::3], window_data[2::3]))
+        window_offsets = self._window_offsets.tolist()
+        groups = [tuple(windows[begin:end]) for begin, end in zip(window_offsets, window_offsets[1:])]
+        batch.promotion_windows = groups[0::2]
+        batch.upcoming_windows = groups[1::2]
+        image_data = list(map(pick, self._image_data.tolist()))
+        image_types = image_data[0::2]
+        image_urls = image_data[1::2]
+        image_offsets = self._image_offsets.tolist()
+        batch.images = [dict(zip(image_types[begin:end], image_urls[begin:end]))
+                        for begin, end in zip(image_offsets, image_offsets[1:])]
+        return batch
+
+    def close(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+WRITERS = {"text": write_text, "jsonl": write_jsonl, "csv": write_csv, "snapshot": write_snapshot}
+
+
+def write_games(games, output_format: str, stream) -> int:
+    """Write the games to stream in one of FORMATS, returns how many were written"""
+    try:
+        writer = WRITERS[output_format]
+    except KeyError:
+        raise ValueError(f"Output format {output_format} is not supported")
+    return writer(games, stream)
@@ -0,0 +1,223 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from product_decode import Game
+from epic_session import make_pooled_session
+from region_fetch import DEFAULT_MAX_WORKERS
+
+DEFAULT_IMAGE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "epic-free-games", "images")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TIMEOUT = 10
+
+
+class ImageCache:
+    """Content-addressed on-disk cache of downloaded images
+
+    Every image is stored once under the SHA-256 of its bytes, however many URLs point at it,
+    with resized variants stored next to it. Once the stored files take more than max_bytes,
+    the least recently used are deleted
+    """
+
+    def __init__(self,
+                 directory: str = DEFAULT_IMAGE_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 clock=time.time) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.clock = clock
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+
+    def _file_path(self, name: str) -> str:
+        return os.path.join(self.directory, "objects", name[:2], name)
+
+    def _touch(self, name: str) -> (str | None):
+        path = self._file_path(name)
+        with self._lock:
+            if not os.path.exists(path):
+                with self._connection:
+                    self._connection.execute("DELETE FROM files WHERE name = ?", (name,))
+                return None
+            with self._connection:
+                self._connection.execute("UPDATE files SET last_used = ? WHERE name = ?", (self.clock(), name))
+        return path
+
+    def digest_for(self, url: str) -> (str | None):
+        """Get the digest of the image last downloaded from a URL, if it is known"""
+        with self._lock:
+            row = self._connection.execute("SELECT digest FROM urls WHERE url = ?", (url,)).fetchone()
+        return None if row is None else row[0]
+
+    def path_for(self, url: str) -> (str | None):
+        """Get the local path of the image downloaded from a URL, if it is still cached"""
+        digest = self.digest_for(url)
+        return None if digest is None else self._touch(digest)
+
+    def get(self, url: str) -> (bytes | None):
+        """Get the bytes of the image downloaded from a URL, if it is still cached"""
+        path = self.path_for(url)
+        if path is None:
+            return None
+        with open(path, "rb") as image_file:
+            return image_file.read()
+
+    def put(self, url: str, content: bytes) -> str:
+        """Store the image downloaded from a URL and return its path"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._store(digest, content)
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO urls (url, digest) VALUES (?, ?)", (url, digest))
+        return path
+
+    def _store(self, name: str, content: bytes) -> str:
+        path = self._file_path(name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a unique name then renamed, so readers never see a partial file
+            temporary_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "wb") as image_file:
+                image_file.write(content)
+            os.replace(temporary_path, path)
+        with self._lock, self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO files (name, size, last_used) VALUES (?, ?, ?)",
+                                     (name, len(content), self.clock()))
+            self._evict(keep=name)
+        return path
+
+    def _evict(self, keep: str) -> None:
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM files").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for name, size in self._connection.execute("SELECT name, size FROM files ORDER BY last_used").fetchall():
+            if name == keep:
+                continue
+            try:
+                os.remove(self._file_path(name))
+            except FileNotFoundError:
+                pass
+            self._connection.execute("DELETE FROM files WHERE name = ?", (name,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._connection.execute("DELETE FROM urls WHERE digest NOT IN (SELECT name FROM files)")
+
+    def variant(self, url: str, width: int, height: int) -> (str | None):
+        """Get the path of the cached image from a URL resized to fit width x height
+
+        The variant is made the first time it is asked for, which needs Pillow. Returns None
+        if the image is not cached, Pillow is not installed or the image cannot be read
+        """
+        digest = self.digest_for(url)
+        if digest is None:
+            return None
+        name = f"{digest}-{width}x{height}"
+        path = self._touch(name)
+        if path is not None:
+            return path
+        source_path = self._touch(digest)
+        if source_path is None:
+            return None
+        try:
+            from PIL import Image
+        except ImportError:
+            logging.info("Pillow is not installed, images are not resized")
+            return None
+        try:
+            with Image.open(source_path) as image:
+                image_format = image.format
+                image.thumbnail((width, height))
+                temporary_path = f"{source_path}.{threading.get_ident()}.resized"
+                image.save(temporary_path, format=image_format)
+        except OSError as err:
+            logging.warning(f"Could not resize image from {url}: {err}")
+            return None
+        try:
+            with open(temporary_path, "rb") as image_file:
+                return self._store(name, image_file.read())
+        finally:
+            os.remove(temporary_path)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def image_urls(games: list[Game], image_type: str = "Thumbnail") -> list[str]:
+    """Get the distinct URLs of one keyImages type of the games, in order"""
+    urls = {}
+    for game in games:
+        url = game.images.get(image_type)
+        if url is None and image_type == "Thumbnail":
+            url = game.thumbnail_url
+        if url is not None:
+            urls[url] = None
+    return list(urls)
+
+
+def prefetch_images(games: list[Game],
+                    cache: ImageCache,
+                    image_type: str = "Thumbnail",
+                    sizes: list[tuple[int, int]] = (),
+                    max_workers: int = DEFAULT_MAX_WORKERS,
+                    session: (requests.Session | None) = None,
+                    timeout: float = DEFAULT_TIMEOUT) -> dict[str, str]:
+    """Download the images of the games that are not cached yet, concurrently over one pooled session
+
+    Each image is also resized to every (width, height) in sizes. Returns the local path of
+    every image that is now cached, keyed by its URL
+    """
+    paths = {}
+    missing = []
+    for url in image_urls(games, image_type):
+        path = cache.path_for(url)
+        if path is None:
+            missing.append(url)
+        else:
+            paths[url] = path
+    logging.info(f"{len(paths)} images cached, downloading {len(missing)}")
+    if missing:
+        workers = max(1, min(max_workers, len(missing)))
+        owns_session = session is None
+        if owns_session:
+            session = make_pooled_session(workers)
+
+        def download(url: str) -> (str | None):
+            try:
+                response = session.get(url, timeout=timeout)
+            except requests.RequestException as err:
+                logging.warning(f"Image request for {url} failed with: {err}")
+                return None
+            if not response.ok:
+                logging.warning(f"Image request for {url} failed with code: {response.status_code}")
+                return None
+            return cache.put(url, response.content)
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for url, path in zip(missing, executor.map(download, missing)):
+                    if path is not None:
+                        paths[url] = path
+        finally:
+            if owns_session:
+                session.close()
+    for url in paths:
+        for width, height in sizes:
+            cache.variant(url, width, height)
+    return paths
@@ -0,0 +1,169 @@
+import json
+import time
+
+
+class StageStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class StatsSink:
+    """Keeps stage timings and counters in memory"""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, StageStats] = {}
+        self.counters: dict[tuple[str, str | None], int] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.add(seconds)
+
+    def count(self, name: str, label: (str | None), amount: int) -> None:
+        key = (name, label)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def breakdown(self) -> str:
+        """Format the stage timings and counters as a table"""
+        lines = [f"{'stage':<24} {'calls':>8} {'total ms':>10} {'mean ms':>10} {'max ms':>10}"]
+        for stage, stats in self.stages.items():
+            lines.append(f"{stage:<24} {stats.count:>8} {stats.total * 1000:>10.3f} "
+                         f"{stats.total * 1000 / stats.count:>10.3f} {stats.max * 1000:>10.3f}")
+        for (name, label), value in self.counters.items():
+            lines.append(f"{name}{'' if label is None else f' [{label}]'}: {value}")
+        return "\n".join(lines)
+
+    def prometheus(self) -> str:
+        """Format the stage timings and counters in the Prometheus text exposition format"""
+        lines = ["# TYPE epic_stage_seconds summary"]
+        for stage, stats in self.stages.items():
+            lines.append(f'epic_stage_seconds_count{{stage="{stage}"}} {stats.count}')
+            lines.append(f'epic_stage_seconds_sum{{stage="{stage}"}} {stats.total}')
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            lines.append(f"# TYPE epic_{name}_total counter")
+            for (counter_name, label), value in self.counters.items():
+                if counter_name == name:
+                    label_text = "" if label is None else '{reason="' + label.replace("\\", "\\\\").replace('"', '\\"') + '"}'
+                    lines.append(f"epic_{name}_total{label_text} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class JsonLinesSink:
+    """Writes every timing and counter event as a JSON line to a text stream"""
+
+    def __init__(self, stream) -> None:
+        self.stream = stream
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stream.write(json.dumps({"stage": stage, "seconds": seconds}) + "\n")
+
+    def count(self, name: str, label: (str | None), amount: int) -> None:
+        self.stream.write(json.dumps({"counter": name, "label": label, "amount": amount}) + "\n")
+
+
+class _Stage:
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str) -> None:
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.record(self.name, time.perf_counter() - self.start)
+
+
+class LapTimer:
+    """Records the time between consecutive laps, each under its own stage name"""
+    __slots__ = ("instrumentation", "last")
+
+    def __init__(self, instrumentation: "Instrumentation") -> None:
+        self.instrumentation = instrumentation
+        self.last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.instrumentation.record(stage, now - self.last)
+        self.last = now
+
+
+class Instrumentation:
+    """Sends stage timings and counters to a set of sinks"""
+    enabled = True
+
+    def __init__(self, *sinks) -> None:
+        self.sinks = sinks
+
+    def stage(self, name: str) -> _Stage:
+        """Context manager timing the code inside it as a stage"""
+        return _Stage(self, name)
+
+    def lap_timer(self) -> LapTimer:
+        return LapTimer(self)
+
+    def record(self, stage: str, seconds: float) -> None:
+        for sink in self.sinks:
+            sink.record(stage, seconds)
+
+    def count(self, name: str, label: (str | None) = None, amount: int = 1) -> None:
+        for sink in self.sinks:
+            sink.count(name, label, amount)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+class NullInstrumentation:
+    """Instrumentation that does nothing, used while instrumentation is disabled"""
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def lap_timer(self) -> None:
+        return None
+
+    def record(self, stage: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, label: (str | None) = None, amount: int = 1) -> None:
+        pass
+
+
+# The instrumentation used by the fetch and decode code, disabled unless enable is called
+current = NullInstrumentation()
+
+
+def enable(*sinks) -> Instrumentation:
+    """Start sending timings and counters to sinks"""
+    global current
+    current = Instrumentation(*sinks)
+    return current
+
+
+def disable() -> None:
+    global current
+    current = NullInstrumentation()
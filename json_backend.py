@@ -0,0 +1,67 @@
+import importlib
+import importlib.util
+import json
+import os
+
+# Every backend reports malformed or badly encoded input as a ValueError subclass
+DECODE_ERRORS = (ValueError,)
+
+# Installed backends, fastest first. The stdlib json module is always available. The
+# optional backends are only found here, and are imported the first time they decode
+AVAILABLE = [name for name in ("orjson", "simdjson") if importlib.util.find_spec(name) is not None] + ["json"]
+
+backend = os.environ.get("EPIC_JSON_BACKEND", AVAILABLE[0])
+if backend not in AVAILABLE:
+    backend = "json"
+
+_modules = {"json": json}
+
+
+def _module(name: str):
+    module = _modules.get(name)
+    if module is None:
+        module = _modules[name] = importlib.import_module(name)
+    return module
+
+
+def use(name: str) -> None:
+    """Select the JSON backend used from now on"""
+    global backend
+    if name not in AVAILABLE:
+        raise ValueError(f"JSON backend {name} is not installed")
+    backend = name
+
+
+def loads(data: (bytes | str)):
+    """Decode a whole JSON document with the selected backend"""
+    return _module(backend).loads(data)
+
+
+def dumps(value) -> str:
+    """Encode a value as compact JSON text, with orjson when it is the selected backend"""
+    if backend == "orjson":
+        return _module("orjson").dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def supports_pointer() -> bool:
+    """Whether the selected backend can decode part of a document without building the rest"""
+    return backend == "simdjson"
+
+
+def load_pointer(data: bytes, pointer: str):
+    """Decode only the value at a JSON pointer, using simdjson's on-demand access
+
+    Raises TypeError if the document is not an object or the path goes through a
+    non-container, and KeyError or IndexError if the path does not exist
+    """
+    simdjson = _module("simdjson")
+    document = simdjson.Parser().parse(data)
+    if not isinstance(document, simdjson.Object):
+        raise TypeError("JSON document is not an object")
+    value = document.at_pointer(pointer)
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    return value
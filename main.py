@@ -1,7 +1,89 @@
+import argparse
+import sys
+
+import instrumentation
+import json_backend
 from product_decode import EpicFreeGames
 
+OUTPUT_BUFFER_SIZE = 1 << 16
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check the Epic Games store for free games")
+    parser.add_argument("--cache", help="path of the decoded promotions cache")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch and decode the promotions")
+    parser.add_argument("--from-file", metavar="PATH",
+                        help="decode a saved promotions response instead of fetching one, - reads stdin")
+    parser.add_argument("--format", choices=["text", "jsonl", "csv", "snapshot"], default="text",
+                        help="how the free games are written, snapshot is a binary file for game_writers.GameSnapshot")
+    parser.add_argument("--output", default="-", help="file the free games are written to, - writes to stdout")
+    parser.add_argument("--stats", choices=["table", "prometheus", "jsonl"],
+                        help="print the time spent in each fetch and decode stage to stderr")
+    parser.add_argument("--decode-report", action="store_true",
+                        help="summarize products that fail to decode instead of logging each, and print the report as JSON to stderr")
+    args = parser.parse_args()
+    if args.from_file is not None:
+        if args.cache is not None or args.no_cache:
+            parser.error("--cache and --no-cache cannot be used with --from-file, a saved response is never cached")
+        # Read here so an unreadable file is reported as a usage error instead of a traceback
+        try:
+            args.payload = read_payload(args.from_file)
+        except OSError as err:
+            parser.error(f"cannot read --from-file {args.from_file}: {err.strerror or err}")
+    return args
+
+
+def open_cache(path: (str | None)):
+    # Imported here so runs without a cache never load sqlite3
+    from promotion_cache import DEFAULT_CACHE_PATH, PromotionCache
+    return PromotionCache(path or DEFAULT_CACHE_PATH)
+
+
+def write_output(games, output_format: str, path: str) -> None:
+    if output_format == "text" and path == "-":
+        for game in games:
+            game.display()
+        return
+    from game_writers import write_games
+    if output_format == "snapshot":
+        if path == "-":
+            write_games(games, output_format, sys.stdout.buffer)
+        else:
+            with open(path, "wb") as output:
+                write_games(games, output_format, output)
+    elif path == "-":
+        write_games(games, output_format, sys.stdout)
+    else:
+        with open(path, "w", encoding="utf-8", newline="", buffering=OUTPUT_BUFFER_SIZE) as output:
+            write_games(games, output_format, output)
+
+
+def read_payload(path: str) -> bytes:
+    if path == "-":
+        return sys.stdin.buffer.read()
+    with open(path, "rb") as payload_file:
+        return payload_file.read()
+
+
 if __name__ == '__main__':
-    manager = EpicFreeGames()
-    manager.make_request()
-    for game in manager.free_games:
-        game.display()
+    args = parse_args()
+    stats = None
+    if args.stats == "jsonl":
+        instrumentation.enable(instrumentation.JsonLinesSink(sys.stderr))
+    elif args.stats is not None:
+        stats = instrumentation.StatsSink()
+        instrumentation.enable(stats)
+    if args.from_file is not None:
+        # A saved response is decoded offline with the stdlib alone, loading neither the
+        # HTTP stack, the cache nor an optional JSON backend
+        json_backend.use("json")
+        manager = EpicFreeGames(decode_report=args.decode_report)
+        manager.process_payload(args.payload)
+    else:
+        manager = EpicFreeGames(cache=None if args.no_cache else open_cache(args.cache), decode_report=args.decode_report)
+        manager.make_request()
+    write_output(manager.free_games, args.format, args.output)
+    if manager.last_report is not None:
+        print(json_backend.dumps(manager.last_report.to_dict()), file=sys.stderr)
+    if stats is not None:
+        print(stats.breakdown() if args.stats == "table" else stats.prometheus(), file=sys.stderr)
@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import instrumentation
+from product_decode import DecodeReport, EpicFreeGames, Game, ProductDecodeException
+from stream_decode import ELEMENTS_PATH, ChunkReader, seek_elements
+
+
+# The start of the elements list and the raw first key of its first element
+ELEMENTS_START = re.compile(rb'"' + re.escape(ELEMENTS_PATH[-1].encode("utf-8")) + rb'"\s*:\s*\[\s*\{\s*("(?:[^"\\]|\\.)*")\s*:')
+
+
+def _split_points(payload: bytes, parts: int) -> list[int]:
+    """Guess the byte offsets of up to parts - 1 commas between elements, spread evenly over the payload
+
+    Each offset is a comma followed by an object with the same first key as the first
+    element. That is only a guess, as nested objects may look the same, so the workers
+    check that their ranges start and end between elements
+    """
+    start = ELEMENTS_START.search(payload)
+    if start is None:
+        return []
+    separator = re.compile(rb",\s*\{\s*" + re.escape(start.group(1)) + rb"\s*:")
+    points = []
+    for part in range(1, parts):
+        found = separator.search(payload, max(part * len(payload) // parts, start.end(), points[-1] + 1 if points else 0))
+        if found is None:
+            break
+        points.append(found.start())
+    return points
+
+
+def _finish_document(reader: ChunkReader, path: tuple[str, ...] = ELEMENTS_PATH) -> None:
+    """Check the rest of the document after the list at path, as the serial decode would read it"""
+    for key in reversed(path):
+        while reader.peek() == ",":
+            reader.pos += 1
+            name = reader.value()
+            # A repeated key replaces the list found first
+            if not isinstance(name, str) or name == key:
+                raise ProductDecodeException("JSON data is invalid")
+            reader.expect(":")
+            reader.value()
+        reader.expect("}")
+    if reader.peek():
+        raise ProductDecodeException("JSON data is invalid")
+
+
+def _parse_range(text: str, first: bool, last: bool) -> (list | None):
+    """Parse the elements in one range of the body, None when the range does not start and end between elements
+
+    The first range holds the start of the document and the last one its end
+    """
+    reader = ChunkReader([text])
+    products = []
+    try:
+        if first:
+            seek_elements(reader)
+        else:
+            reader.expect(",")
+        char = ","
+        if first and reader.peek() == "]":
+            char = "]"
+            reader.pos += 1
+        while char == ",":
+            products.append(reader.value())
+            char = reader.peek()
+            reader.pos += 1
+        if char != ("]" if last else ""):
+            return None
+        if last:
+            _finish_document(reader)
+    except (ProductDecodeException, json.JSONDecodeError):
+        return None
+    return products
+
+
+def _decode_range(memory_name: str,
+                  start: int,
+                  end: int,
+                  first: bool,
+                  last: bool,
+                  with_report: bool = False) -> (tuple[list[tuple], (list[str] | DecodeReport), int] | None):
+    """Decode the elements in bytes start to end of the response body in a shared memory block
+
+    Returns the fields of each free product in the range, the error message of each product
+    that did not decode, or with with_report a DecodeReport numbering the elements from 0,
+    and the number of elements. Returns None when the range was not split between elements
+    """
+    # A forked worker inherits the parent's sinks, which would see the failures counted twice
+    instrumentation.disable()
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        data = bytes(memory.buf[start:end])
+    finally:
+        memory.close()
+    try:
+        products = _parse_range(data.decode("utf-8"), first, last)
+    except UnicodeDecodeError:
+        return None
+    if products is None:
+        return None
+    if with_report:
+        report = DecodeReport()
+        return list(EpicFreeGames.iter_product_fields(products, report, free_only=True)), report, len(products)
+    errors = []
+    return list(EpicFreeGames.iter_product_fields(products, free_only=True, errors=errors)), errors, len(products)
+
+
+class ParallelDecoder:
+    """Decodes large response bodies across a process pool
+
+    The raw body is copied once into a shared memory block, and the parent searches it for
+    the commas between elements to split it into one byte range per worker. Each worker
+    copies, parses and decodes only its own range, and checks that it starts and ends
+    between elements. When a range does not, or the body is invalid, the body is decoded
+    serially instead. Bodies shorter than threshold_bytes are decoded serially. The crossover depends on the machine, so
+    there is no default: measure it with benchmarks.bench_parallel. Results, error logs and
+    reports come out the same as from EpicFreeGames.process_products and
+    process_products_with_report
+    """
+
+    def __init__(self,
+                 threshold_bytes: int,
+                 max_workers: (int | None) = None) -> None:
+        self.threshold_bytes = threshold_bytes
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: (ProcessPoolExecutor | None) = None
+
+    def process_products(self, products) -> list[Game]:
+        """Decode a list of products and return a list of free games
+
+        Products that are already decoded would have to be serialized again to reach the
+        workers, so they are decoded serially
+        """
+        return EpicFreeGames.process_products(products)
+
+    def process_products_with_report(self, products) -> tuple[list[Game], DecodeReport]:
+        """Decode a list of products and return the free games and a DecodeReport of the failures"""
+        return EpicFreeGames.process_products_with_report(products)
+
+    def process_payload(self, payload: (bytes | str)) -> list[Game]:
+        """Decode the free games from the raw body of a promotions response
+
+        Raises ProductDecodeException or one of json_backend.DECODE_ERRORS when the body is invalid
+        """
+        payload = self._encode(payload)
+        results = self._decode_parts(payload, False)
+        if results is None:
+            return EpicFreeGames.process_products(EpicFreeGames.get_products_from_payload(payload))
+        free_games = []
+        for rows, errors, _ in results:
+            for message in errors:
+                logging.error(message)
+                instrumentation.current.count("decode_failures", message)
+            free_games.extend(Game(*fields) for fields in rows)
+        self._log_free(free_games)
+        return free_games
+
+    def process_payload_with_report(self, payload: (bytes | str)) -> tuple[list[Game], DecodeReport]:
+        """Decode the free games from the raw body of a promotions response, with a DecodeReport of the failures
+
+        Raises ProductDecodeException or one of json_backend.DECODE_ERRORS when the body is invalid
+        """
+        payload = self._encode(payload)
+        results = self._decode_parts(payload, True)
+        if results is None:
+            return EpicFreeGames.process_products_with_report(EpicFreeGames.get_products_from_payload(payload))
+        free_games = []
+        report = DecodeReport()
+        offset = 0
+        for rows, part_report, count in results:
+            report.merge(part_report, range(offset, offset + count))
+            offset += count
+            for (field_path, reason), failed in part_report.counts.items():
+                instrumentation.current.count("decode_failures", f"{field_path or 'element'} {reason}", failed)
+            free_games.extend(Game(*fields) for fields in rows)
+        self._log_free(free_games)
+        report.log()
+        return free_games, report
+
+    @staticmethod
+    def _encode(payload: (bytes | str)) -> bytes:
+        return payload.encode("utf-8") if isinstance(payload, str) else payload
+
+    @staticmethod
+    def _log_free(free_games: list[Game]) -> None:
+        for game in free_games:
+            logging.info(f"{game.title} is free")
+
+    def _decode_parts(self, payload: bytes, with_report: bool) -> (list[tuple] | None):
+        """Decode the elements across the pool, None when the body is too small, or could not be split between elements"""
+        if len(payload) < self.threshold_bytes or self.max_workers < 2:
+            return None
+        points = _split_points(payload, self.max_workers)
+        if not points:
+            return None
+        bounds = [0, *points, len(payload)]
+        memory = shared_memory.SharedMemory(create=True, size=len(payload))
+        try:
+            memory.buf[:len(payload)] = payload
+            executor = self._get_executor()
+            futures = [executor.submit(_decode_range, memory.name, bounds[part], bounds[part + 1],
+                                       part == 0, part == len(bounds) - 2, with_report)
+                       for part in range(len(bounds) - 1)]
+            results = [future.result() for future in futures]
+        finally:
+            memory.close()
+            memory.unlink()
+        if None in results:
+            # Invalid bodies land here too, so the serial decode raises the usual errors
+            logging.debug("Could not split the elements between the workers, decoding serially")
+            return None
+        return results
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
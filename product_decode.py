@@ -1,9 +1,147 @@
 import logging
-import requests
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
+from operator import itemgetter
+
+import instrumentation
+import json_backend
+
+# NumPy is optional and slow to import, so it is only loaded once a large batch is
+# filtered. None when it is not installed, or to force the plain Python filters
+_NOT_LOADED = object()
+numpy = _NOT_LOADED
+# Batches smaller than this are filtered in plain Python, where NumPy would not pay off
+NUMPY_MIN_BATCH = 1000
+
+PROMOTIONS_URL = "https://store-site-backend-static-ipv4.ak.epicgames.com/freeGamesPromotions"
+DEFAULT_COUNTRY = "GB"
+DEFAULT_LOCALE = "en-US"
+ELEMENTS_POINTER = "/data/Catalog/searchStore/elements"
+# Seconds to wait for the connection and then between bytes of the response
+DEFAULT_TIMEOUT = (3.05, 10)
+NO_PROMOTION = -1
+# Range of the integers GameBatch can store in its number columns
+INT64_MIN = -(1 << 63)
+INT64_MAX = (1 << 63) - 1
+
+# Fields decoded from every product, in the order they are checked:
+# (path, expected type, message for a missing key, message for a missing index, message for a wrong type)
+# Integers must also fit between INT64_MIN and INT64_MAX
+PRODUCT_FIELD_SPEC = (
+    (("title",), str,
+     "Title does not exist in product", None, "Title value is invalid"),
+    (("description",), str,
+     "Description does not exist in product", None, "Description value is invalid"),
+    (("price", "totalPrice", "discountPrice"), int,
+     "Price does not exist in product", None, "Price data malformed"),
+    (("offerMappings", 0, "pageSlug"), str,
+     "offerMappings does not exist in product data", "Could not find product page in product", "URL: {} is invalid"),
+)
+# Path of each PRODUCT_FIELD_SPEC field, as written in a DecodeReport
+FIELD_PATHS = tuple(".".join(key if isinstance(key, str) else f"[{key}]" for key in path).replace(".[", "[")
+                    for path, *_ in PRODUCT_FIELD_SPEC)
+
+# (path, expected type) of each PRODUCT_FIELD_SPEC field
+_FIELD_CHECKS = tuple((path, field_type) for path, field_type, *_ in PRODUCT_FIELD_SPEC)
+
+# Reason codes of the decode failures in a DecodeReport
+NOT_A_PRODUCT = "not_a_product"
+MISSING_FIELD = "missing_field"
+EMPTY_LIST = "empty_list"
+NOT_A_CONTAINER = "not_a_container"
+WRONG_TYPE = "wrong_type"
+# Most failures a DecodeReport keeps records of, the rest are only counted
+MAX_FAILURE_RECORDS = 10_000
+# Seconds between logged decode failure summaries
+DECODE_SUMMARY_INTERVAL = 60.0
+
+
+def load_numpy():
+    """Import NumPy on first use, returning None if it is not installed"""
+    global numpy
+    if numpy is _NOT_LOADED:
+        try:
+            import numpy as numpy_module
+        except ImportError:
+            numpy_module = None
+        numpy = numpy_module
+    return numpy
+
+
+@lru_cache(maxsize=1024)
+def _epoch_seconds(value: str) -> int:
+    # Promotions of the same week share their dates, so each distinct one is parsed once
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def _is_int64(value) -> bool:
+    return isinstance(value, int) and INT64_MIN <= value <= INT64_MAX
+
+
+def _required_fields(product) -> (list | tuple):
+    """Get the PRODUCT_FIELD_SPEC fields of a product
+
+    Returns their values as a list, or (spec index, reason code, value) for the first field
+    that is missing or invalid, with a spec index of None when the product is not a dict
+    """
+    if not isinstance(product, dict):
+        return None, NOT_A_PRODUCT, product
+    fields = []
+    for spec_index, (path, field_type) in enumerate(_FIELD_CHECKS):
+        value = product
+        try:
+            for key in path:
+                value = value[key]
+        except KeyError:
+            return spec_index, MISSING_FIELD, None
+        except IndexError:
+            return spec_index, EMPTY_LIST, None
+        except TypeError:
+            return spec_index, NOT_A_CONTAINER, None
+        if not (_is_int64(value) if field_type is int else isinstance(value, field_type)):
+            return spec_index, WRONG_TYPE, value
+        fields.append(value)
+    return fields
+
+
+def _has_free_offer(product: dict) -> bool:
+    """Whether any current or upcoming promotional offer of a raw product makes it free"""
+    promotions = product.get("promotions")
+    if not promotions:
+        return False
+    try:
+        for offers_key in ("promotionalOffers", "upcomingPromotionalOffers"):
+            for offer_group in promotions.get(offers_key) or ():
+                for offer in offer_group["promotionalOffers"]:
+                    if offer["discountSetting"]["discountPercentage"] == 0:
+                        return True
+    except (KeyError, TypeError, AttributeError):
+        pass
+    return False
+
+
+def _failure_message(spec_index: (int | None), reason: str, value) -> str:
+    if reason in (NOT_A_PRODUCT, NOT_A_CONTAINER):
+        return "Invalid product input"
+    _, _, missing_msg, index_msg, invalid_msg = PRODUCT_FIELD_SPEC[spec_index]
+    if reason == MISSING_FIELD:
+        return missing_msg
+    if reason == EMPTY_LIST:
+        return index_msg
+    return invalid_msg.format(value)
 
 
 class ProductDecodeException(Exception):
     def __init__(self, msg: str):
+        # Passed on so the exception can be pickled back from pool workers
+        super().__init__(msg)
         self.msg = msg
 
     def __str__(self):
@@ -11,45 +149,557 @@ class ProductDecodeException(Exception):
 
 
 class Game:
+    __slots__ = ("title", "description", "price", "product_url", "thumbnail_url",
+                 "original_price", "promotion_start", "promotion_end", "promotion_discount",
+                 "currency_code", "promotion_windows", "upcoming_windows", "images")
+
     def __init__(self,
                  title: str,
                  description: str,
                  price: int,
                  product_url: str,
-                 thumbnail_url: (str | None)) -> None:
+                 thumbnail_url: (str | None),
+                 original_price: (int | None) = None,
+                 promotion_start: (int | None) = None,
+                 promotion_end: (int | None) = None,
+                 promotion_discount: (int | None) = None,
+                 currency_code: (str | None) = None,
+                 promotion_windows: tuple[tuple[int, int, int], ...] = (),
+                 upcoming_windows: tuple[tuple[int, int, int], ...] = (),
+                 images: (dict[str, str] | None) = None) -> None:
         self.title = title
         self.description = description
         self.price = price
-        self.free = price == 0
         self.product_url = product_url
         self.thumbnail_url = thumbnail_url
+        self.original_price = price if original_price is None else original_price
+        # Epoch seconds of the current, or else the next, promotion and the percentage of
+        # the original price paid during it. None when the product has no promotion
+        self.promotion_start = promotion_start
+        self.promotion_end = promotion_end
+        self.promotion_discount = promotion_discount
+        self.currency_code = currency_code
+        # Every current and upcoming promotion as (start, end, discount percentage) tuples
+        self.promotion_windows = promotion_windows
+        self.upcoming_windows = upcoming_windows
+        # The first URL of each keyImages type, such as Thumbnail or OfferImageWide
+        self.images = {} if images is None else images
+
+    @property
+    def free(self) -> bool:
+        return self.price == 0
+
+    def free_window(self, now: int) -> (tuple[int, int, int] | None):
+        """Get the promotion making the game free at now, if there is one"""
+        for window in self.promotion_windows + self.upcoming_windows:
+            start, end, discount = window
+            if discount == 0 and start <= now < end:
+                return window
+        return None
+
+    def next_free_window(self, now: int) -> (tuple[int, int, int] | None):
+        """Get the earliest promotion making the game free that starts after now, if there is one"""
+        return min((window for window in self.promotion_windows + self.upcoming_windows
+                    if window[2] == 0 and window[0] > now), default=None)
 
     def display(self):
         print(f"Title:{self.title}\nDescription: {self.description}\nProduct page: {self.product_url}\nThumbnail: {self.thumbnail_url}")
 
 
-class EpicFreeGames:
+def expiry_for(games: list[Game], now: float, ttl: float) -> float:
+    """Get when a set of free games goes stale: the first promotion end after now, capped at now + ttl"""
+    expires_at = now + ttl
+    for game in games:
+        if game.promotion_end is not None and now < game.promotion_end < expires_at:
+            expires_at = game.promotion_end
+    return expires_at
+
+
+class LogRateLimiter:
+    """Lets a log message through at most once every interval seconds"""
+
+    def __init__(self, interval: float = DECODE_SUMMARY_INTERVAL, clock=time.monotonic) -> None:
+        self.interval = interval
+        self.clock = clock
+        self.last_allowed: (float | None) = None
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> (int | None):
+        """Get how many messages were held back since the last one let through, None to hold this one back"""
+        with self._lock:
+            now = self.clock()
+            if self.last_allowed is not None and now - self.last_allowed < self.interval:
+                self.suppressed += 1
+                return None
+            self.last_allowed = now
+            suppressed, self.suppressed = self.suppressed, 0
+            return suppressed
+
+
+# Shared by every DecodeReport, so polling many regions logs one summary per interval
+decode_summary_limiter = LogRateLimiter()
+
+
+class DecodeReport:
+    """Decode failures of a list of products, recorded instead of logged one by one
+
+    failures holds an (element index, field path, reason code) record for each of the
+    first max_records products that failed, and counts how many failed for each
+    (field path, reason code). The field path is empty for elements that are not a dict
+    """
+
+    def __init__(self, max_records: int = MAX_FAILURE_RECORDS) -> None:
+        self.max_records = max_records
+        self.decoded = 0
+        self.failures: list[tuple[int, str, str]] = []
+        self.counts: Counter[tuple[str, str]] = Counter()
+
+    def add(self, index: int, field_path: str, reason: str) -> None:
+        if len(self.failures) < self.max_records:
+            self.failures.append((index, field_path, reason))
+        self.counts[(field_path, reason)] += 1
+
+    def merge(self, other: "DecodeReport", indexes: (list[int] | None) = None) -> None:
+        """Add the decoded products and failures of a report on other elements
+
+        When indexes is given, the element numbered i in other is element indexes[i] here
+        """
+        self.decoded += other.decoded
+        failures = other.failures[:max(0, self.max_records - len(self.failures))]
+        if indexes is not None:
+            failures = [(indexes[index], field_path, reason) for index, field_path, reason in failures]
+        self.failures.extend(failures)
+        self.counts.update(other.counts)
+
+    @property
+    def failed(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def total(self) -> int:
+        return self.decoded + self.failed
+
+    def summary(self, limit: int = 5) -> str:
+        """Describe how many products failed to decode, and the limit most common reasons"""
+        text = f"{self.failed} of {self.total} products failed to decode"
+        if not self.counts:
+            return text
+        common = self.counts.most_common()
+        reasons = ", ".join(f"{field_path or 'element'} {reason}: {count}" for (field_path, reason), count in common[:limit])
+        if len(common) > limit:
+            reasons += f", {len(common) - limit} more reasons"
+        return f"{text} ({reasons})"
+
+    def to_dict(self) -> dict:
+        """Get the report as a JSON serializable dictionary"""
+        return {
+            "total": self.total,
+            "failed": self.failed,
+            "reasons": [{"field": field_path, "reason": reason, "count": count}
+                        for (field_path, reason), count in self.counts.most_common()],
+            "failures": [{"index": index, "field": field_path, "reason": reason}
+                         for index, field_path, reason in self.failures]
+        }
+
+    def log(self, limiter: (LogRateLimiter | None) = None) -> bool:
+        """Log the summary as a warning if any product failed and the limiter allows it, returns whether it was logged"""
+        if not self.counts:
+            return False
+        suppressed = (limiter or decode_summary_limiter).allow()
+        if suppressed is None:
+            return False
+        held_back = f", {suppressed} earlier summaries were not logged" if suppressed else ""
+        logging.warning(f"{self.summary()}{held_back}")
+        return True
+
+
+class GameBatch:
+    """A batch of games stored column-wise, one parallel array per Game attribute
+
+    Prices and promotion windows are kept in typed arrays so filtering and serializing
+    a batch never touches a Game object. With NumPy installed the filters on batches of
+    at least NUMPY_MIN_BATCH games compare whole columns at once, otherwise they fall back
+    to plain loops over the arrays. Missing promotion values are stored as NO_PROMOTION
+    """
+    TEXT_COLUMNS = ("title", "description", "product_url", "thumbnail_url", "currency_code")
+    NUMBER_COLUMNS = ("price", "original_price", "promotion_start", "promotion_end", "promotion_discount")
+    # Per game collections, kept as Python objects: promotion windows as tuples and images as a dict
+    RECORD_COLUMNS = ("promotion_windows", "upcoming_windows", "images")
 
     def __init__(self) -> None:
+        self.titles: list[str] = []
+        self.descriptions: list[str] = []
+        self.product_urls: list[str] = []
+        self.thumbnail_urls: list[str | None] = []
+        self.currency_codes: list[str | None] = []
+        self.prices = array("q")
+        self.original_prices = array("q")
+        self.promotion_starts = array("q")
+        self.promotion_ends = array("q")
+        self.promotion_discounts = array("q")
+        self.promotion_windows: list[tuple] = []
+        self.upcoming_windows: list[tuple] = []
+        self.images: list[dict[str, str]] = []
+
+    def columns(self) -> tuple:
+        """Get every column, in TEXT_COLUMNS, NUMBER_COLUMNS then RECORD_COLUMNS order"""
+        return (self.titles, self.descriptions, self.product_urls, self.thumbnail_urls, self.currency_codes,
+                self.prices, self.original_prices, self.promotion_starts, self.promotion_ends, self.promotion_discounts,
+                self.promotion_windows, self.upcoming_windows, self.images)
+
+    @staticmethod
+    def from_games(games) -> "GameBatch":
+        """Build a batch from an iterable of Game objects"""
+        batch = GameBatch()
+        for game in games:
+            batch.append(game)
+        return batch
+
+    @staticmethod
+    def from_products(products, report: (DecodeReport | None) = None) -> "GameBatch":
+        """Decode raw products straight into a batch, skipping any that fail to decode
+
+        Each failure is logged as an error, or when a report is given, recorded in it instead
+        """
+        return GameBatch.from_rows(list(EpicFreeGames.iter_product_fields(products, report)))
+
+    @staticmethod
+    def from_rows(rows: list[tuple]) -> "GameBatch":
+        """Build a batch from tuples of Game constructor arguments, one column at a time"""
+        batch = GameBatch()
+        if not rows:
+            return batch
+        (titles, descriptions, prices, product_urls, thumbnail_urls,
+         original_prices, promotion_starts, promotion_ends, promotion_discounts,
+         currency_codes, promotion_windows, upcoming_windows, images) = zip(*rows)
+        batch.titles = list(titles)
+        batch.descriptions = list(descriptions)
+        batch.product_urls = list(product_urls)
+        batch.thumbnail_urls = list(thumbnail_urls)
+        batch.currency_codes = list(currency_codes)
+        batch.promotion_windows = list(promotion_windows)
+        batch.upcoming_windows = list(upcoming_windows)
+        batch.images = list(images)
+        batch.prices = array("q", prices)
+        batch.original_prices = array("q", [price if original is None else original
+                                            for price, original in zip(prices, original_prices)])
+        for column, values in ((batch.promotion_starts, promotion_starts),
+                               (batch.promotion_ends, promotion_ends),
+                               (batch.promotion_discounts, promotion_discounts)):
+            column.extend([NO_PROMOTION if value is None else value for value in values])
+        return batch
+
+    def append(self, game: Game) -> None:
+        self.append_fields((game.title, game.description, game.price, game.product_url, game.thumbnail_url,
+                            game.original_price, game.promotion_start, game.promotion_end, game.promotion_discount,
+                            game.currency_code, game.promotion_windows, game.upcoming_windows, game.images))
+
+    def append_fields(self, fields: tuple) -> None:
+        """Append one game given as a tuple of Game constructor arguments"""
+        (title, description, price, product_url, thumbnail_url,
+         original_price, promotion_start, promotion_end, promotion_discount,
+         currency_code, promotion_windows, upcoming_windows, images) = fields
+        self.titles.append(title)
+        self.descriptions.append(description)
+        self.product_urls.append(product_url)
+        self.thumbnail_urls.append(thumbnail_url)
+        self.currency_codes.append(currency_code)
+        self.promotion_windows.append(promotion_windows)
+        self.upcoming_windows.append(upcoming_windows)
+        self.images.append(images)
+        self.prices.append(price)
+        self.original_prices.append(price if original_price is None else original_price)
+        self.promotion_starts.append(NO_PROMOTION if promotion_start is None else promotion_start)
+        self.promotion_ends.append(NO_PROMOTION if promotion_end is None else promotion_end)
+        self.promotion_discounts.append(NO_PROMOTION if promotion_discount is None else promotion_discount)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __getitem__(self, index: int) -> Game:
+        promotion = (self.promotion_starts[index], self.promotion_ends[index], self.promotion_discounts[index])
+        start, end, discount = (None if value == NO_PROMOTION else value for value in promotion)
+        return Game(self.titles[index], self.descriptions[index], self.prices[index],
+                    self.product_urls[index], self.thumbnail_urls[index], self.original_prices[index],
+                    start, end, discount, self.currency_codes[index],
+                    self.promotion_windows[index], self.upcoming_windows[index], self.images[index])
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self)))
+
+    def select(self, indexes) -> "GameBatch":
+        """Build a new batch from the games at the given indexes"""
+        batch = GameBatch()
+        indexes = list(indexes)
+        if not indexes:
+            return batch
+        pick = itemgetter(*indexes)
+        for source, target in zip(self.columns(), batch.columns()):
+            picked = pick(source)
+            target.extend(picked if len(indexes) > 1 else (picked,))
+        return batch
+
+    def compress(self, mask) -> "GameBatch":
+        """Build a new batch from the games where mask is true"""
+        np = self._numpy()
+        if np is None or not isinstance(mask, np.ndarray):
+            return self.select([index for index, keep in enumerate(mask) if keep])
+        indexes = np.flatnonzero(mask).tolist()
+        batch = GameBatch()
+        if not indexes:
+            return batch
+        pick = itemgetter(*indexes)
+        for source, target in zip(self.columns(), batch.columns()):
+            if isinstance(source, array):
+                target.frombytes(self._number_column(source, np)[mask].tobytes())
+            else:
+                picked = pick(source)
+                target.extend(picked if len(indexes) > 1 else (picked,))
+        return batch
+
+    def _numpy(self):
+        if len(self) < NUMPY_MIN_BATCH:
+            return None
+        return load_numpy()
+
+    @staticmethod
+    def _number_column(column: array, np):
+        if np is not None:
+            return np.frombuffer(column, dtype=np.int64) if len(column) else np.zeros(0, dtype=np.int64)
+        return column
+
+    def price_mask(self, max_price: int):
+        """Mask of the games whose discountPrice is at or below max_price"""
+        np = self._numpy()
+        prices = self._number_column(self.prices, np)
+        if np is not None:
+            return prices <= max_price
+        return [price <= max_price for price in prices]
+
+    def free_mask(self):
+        """Mask of the games whose discountPrice is 0"""
+        return self.price_mask(0)
+
+    def discount_mask(self, min_percent: int):
+        """Mask of the games discounted by at least min_percent off their original price"""
+        np = self._numpy()
+        prices = self._number_column(self.prices, np)
+        original_prices = self._number_column(self.original_prices, np)
+        if np is not None:
+            return (original_prices > 0) & ((original_prices - prices) * 100 >= original_prices * min_percent)
+        return [original > 0 and (original - price) * 100 >= original * min_percent
+                for price, original in zip(prices, original_prices)]
+
+    def _free_window_starts(self) -> tuple[array, array]:
+        """Get the start of every free promotion window and the index of its game, as two parallel arrays"""
+        owners = array("q")
+        starts = array("q")
+        for index, (current, upcoming) in enumerate(zip(self.promotion_windows, self.upcoming_windows)):
+            for start, _, discount in current + upcoming:
+                if discount == 0:
+                    owners.append(index)
+                    starts.append(start)
+        return owners, starts
+
+    def upcoming_free_mask(self, now: int, within: (int | None) = None):
+        """Mask of the games that will be free in a promotion window starting after now, as found by Game.next_free_window
+
+        Only windows starting within the given number of seconds are included when within is set
+        """
+        owners, starts = self._free_window_starts()
+        latest_start = None if within is None else now + within
+        np = self._numpy()
+        if np is not None:
+            starts = self._number_column(starts, np)
+            selected = starts > now
+            if latest_start is not None:
+                selected &= starts <= latest_start
+            mask = np.zeros(len(self), dtype=bool)
+            mask[self._number_column(owners, np)[selected]] = True
+            return mask
+        mask = [False] * len(self)
+        for owner, start in zip(owners, starts):
+            if start > now and (latest_start is None or start <= latest_start):
+                mask[owner] = True
+        return mask
+
+    def price_dropped_mask(self, previous: "GameBatch"):
+        """Mask of the games cheaper now than in previous, matched by product url"""
+        previous_prices = dict(zip(previous.product_urls, previous.prices))
+        np = self._numpy()
+        prices = self._number_column(self.prices, np)
+        before = [previous_prices.get(url, -1) for url in self.product_urls]
+        if np is not None:
+            before = np.array(before, dtype=np.int64)
+            return prices < before
+        return [price < old_price for price, old_price in zip(prices, before)]
+
+    def filter_price(self, max_price: int) -> "GameBatch":
+        """Get the games priced at or below max_price"""
+        return self.compress(self.price_mask(max_price))
+
+    def free_games(self) -> "GameBatch":
+        """Get the games that are free"""
+        return self.compress(self.free_mask())
+
+    def free_at_mask(self, now: int) -> list[bool]:
+        """Mask of the games made free by a promotion window containing now"""
+        return [any(discount == 0 and start <= now < end for start, end, discount in current + upcoming)
+                for current, upcoming in zip(self.promotion_windows, self.upcoming_windows)]
+
+    def to_columns(self) -> dict[str, list]:
+        """Get the batch as a dictionary of columns, ready for serialization"""
+        names = self.TEXT_COLUMNS + self.NUMBER_COLUMNS + self.RECORD_COLUMNS
+        return {name: list(column) for name, column in zip(names, self.columns())}
+
+    @staticmethod
+    def from_columns(columns: dict[str, list]) -> "GameBatch":
+        """Rebuild a batch from the output of to_columns"""
+        batch = GameBatch()
+        names = GameBatch.TEXT_COLUMNS + GameBatch.NUMBER_COLUMNS + GameBatch.RECORD_COLUMNS
+        try:
+            count = len(columns["title"])
+            # Batches serialized before these columns existed get empty values for them
+            defaults = {"currency_code": [None] * count,
+                        "promotion_windows": [()] * count,
+                        "upcoming_windows": [()] * count,
+                        "images": [{} for _ in range(count)]}
+            for name, column in zip(names, batch.columns()):
+                values = columns.get(name, defaults[name]) if name in defaults else columns[name]
+                if name in ("promotion_windows", "upcoming_windows"):
+                    # JSON turns the window tuples into lists
+                    values = [tuple(tuple(window) for window in windows) for windows in values]
+                column.extend(values)
+        except (KeyError, TypeError, ValueError, OverflowError):
+            raise ProductDecodeException("Game columns are invalid")
+        if len({len(column) for column in batch.columns()}) != 1:
+            raise ProductDecodeException("Game columns have different lengths")
+        return batch
+
+
+class EpicFreeGames:
+
+    def __init__(self,
+                 country: str = DEFAULT_COUNTRY,
+                 locale: str = DEFAULT_LOCALE,
+                 base_url: str = PROMOTIONS_URL,
+                 cache=None,
+                 diff_index=None,
+                 decoder=None,
+                 decode_report: bool = False) -> None:
         self.free_games: list[Game] = []
-        self.URL_FOR_CHECK = "https://store-site-backend-static-ipv4.ak.epicgames.com/freeGamesPromotions?locale=en-US&country=GB&allowCountries=GB"
+        self.country = country
+        self.locale = locale
+        self.URL_FOR_CHECK = EpicFreeGames.build_url(country, locale, base_url)
+        # Optional promotion_cache.PromotionCache used to skip fetching and decoding
+        self.cache = cache
+        # Optional game_diff.FreeGamesIndex, which fills changes with what differs from the last poll
+        self.diff_index = diff_index
+        self.changes = []
+        # Optional object with process_payload and process_payload_with_report methods, such as parallel_decode.ParallelDecoder
+        self.decoder = decoder
+        # With decode_report, decode failures are collected into last_report instead of logged one by one
+        self.decode_report = decode_report
+        self.last_report: (DecodeReport | None) = None
+
+    @staticmethod
+    def build_url(country: str, locale: str, base_url: str = PROMOTIONS_URL) -> str:
+        """Build the promotions URL for a country and locale"""
+        return f"{base_url}?locale={locale}&country={country}&allowCountries={country}"
+
+    def make_request(self, session=None, timeout=DEFAULT_TIMEOUT) -> bool:
+        """Make a request to epic games API and discover free games
 
-    def make_request(self):
-        """Make a request to epic games API and discover free games"""
-        response = requests.get(self.URL_FOR_CHECK)
+        A requests.Session, or a resilient_fetch.ResilientFetcher, can be passed in to reuse
+        pooled connections across calls. Returns whether the free games were updated
+        """
+        if self.cache is not None:
+            cached_games = self.cache.get(self.URL_FOR_CHECK)
+            if cached_games is not None:
+                logging.info(f"Using cached free games for {self.URL_FOR_CHECK}")
+                self.set_free_games(cached_games)
+                return True
+        import requests
+        http = requests if session is None else session
+        stats = instrumentation.current
+        try:
+            with stats.stage("fetch"):
+                response = http.get(self.URL_FOR_CHECK, timeout=timeout)
+        except requests.RequestException as err:
+            logging.warning(f"Request failed with: {err}")
+            return False
+        if stats.enabled:
+            # requests times the connection and the wait for the response headers,
+            # the rest of the fetch stage is the body transfer
+            stats.record("fetch.until_headers", response.elapsed.total_seconds())
+        return self.process_response(response)
+
+    def set_free_games(self, free_games: list[Game]) -> None:
+        """Replace the free games with already decoded ones"""
+        if self.diff_index is not None:
+            self.changes = self.diff_index.update_games(free_games)
+        self.free_games = free_games
+
+    def process_response(self, response) -> bool:
+        """Decode the free games from a response to the promotions URL, returns whether they were updated"""
         if response.ok:
-            try:
-                json_data = response.json()
-                try:
-                    products = EpicFreeGames().get_products_from_response(json_data)
-                    if products is not None:
-                        self.free_games = EpicFreeGames().process_products(products)
-                except ProductDecodeException as err:
-                    logging.error(err)
-            except requests.JSONDecodeError as err:
-                logging.warning(f"Convert to json failed with: {err}")
+            if self.cache is not None:
+                import hashlib
+                payload_hash = hashlib.sha256(response.content).hexdigest()
+                cached_games = self.cache.get_by_hash(self.URL_FOR_CHECK, payload_hash)
+                if cached_games is not None:
+                    logging.info(f"Promotions for {self.URL_FOR_CHECK} unchanged since last decode")
+                    self.set_free_games(cached_games)
+                    self.cache.put(self.URL_FOR_CHECK, payload_hash, cached_games)
+                    return True
+            if self.process_payload(response.content):
+                if self.cache is not None:
+                    self.cache.put(self.URL_FOR_CHECK, payload_hash, self.free_games)
+                return True
         else:
             logging.warning(f"Request failed with code: {response.status_code}")
+        return False
+
+    def process_payload(self, payload: (bytes | str)) -> bool:
+        """Decode the free games from the body of a promotions response, returns whether they were updated"""
+        stats = instrumentation.current
+        try:
+            if self.decoder is not None and self.diff_index is None:
+                # The decoder parses the body itself, so it can be handed to other processes as is
+                with stats.stage("decode"):
+                    if self.decode_report:
+                        self.free_games, self.last_report = self.decoder.process_payload_with_report(payload)
+                    else:
+                        self.free_games = self.decoder.process_payload(payload)
+                return True
+            if json_backend.supports_pointer():
+                with stats.stage("json_decode"):
+                    products = self.get_products_from_payload(payload)
+            else:
+                with stats.stage("json_decode"):
+                    json_data = json_backend.loads(payload)
+                with stats.stage("extract_elements"):
+                    products = self.get_products_from_response(json_data)
+            if products is not None:
+                with stats.stage("decode"):
+                    if self.diff_index is not None:
+                        report = DecodeReport() if self.decode_report else None
+                        self.changes = self.diff_index.update(products, report)
+                        self.free_games = self.diff_index.free_games
+                        if report is not None:
+                            report.log()
+                            self.last_report = report
+                    elif self.decode_report:
+                        self.free_games, self.last_report = self.process_products_with_report(products)
+                    else:
+                        self.free_games = self.process_products(products)
+                return True
+        except ProductDecodeException as err:
+            logging.error(err)
+        except json_backend.DECODE_ERRORS as err:
+            logging.warning(f"Convert to json failed with: {err}")
+        return False
 
     @staticmethod
     def get_title_of_product(product) -> str:
@@ -71,7 +721,7 @@ class EpicFreeGames:
         """Get the price of a product from product data"""
         try:
             price_found = product["price"]["totalPrice"]["discountPrice"]
-            if (isinstance(price_found, int)):
+            if _is_int64(price_found):
                 return price_found
             else:
                 raise ProductDecodeException("Price data malformed")
@@ -83,23 +733,31 @@ class EpicFreeGames:
     @staticmethod
     def get_thumbnail_of_product(product):
         """Get the thumbnail of a product, if it exists, from product data"""
+        return EpicFreeGames.get_images_of_product(product).get("Thumbnail")
+
+    @staticmethod
+    def get_images_of_product(product) -> dict[str, str]:
+        """Get the first URL of every keyImages type from product data
+
+        Entries without a string type and url are skipped
+        """
         try:
-            images = product["keyImages"]
-            for image in images:
-                if image["type"] == "Thumbnail":
-                    image_found = image["url"]
-                    if (isinstance(image_found, str)):
-                        return image_found
-                    else:
-                        continue
-                else:
-                    continue
-            return None
+            key_images = product["keyImages"]
         except KeyError:
             logging.info("Could not find images in product data")
-            return None
+            return {}
         except TypeError:
             raise ProductDecodeException("Invalid product input")
+        if not isinstance(key_images, list):
+            raise ProductDecodeException("Invalid product input")
+        images = {}
+        for image in key_images:
+            if isinstance(image, dict):
+                image_type = image.get("type")
+                image_found = image.get("url")
+                if isinstance(image_type, str) and isinstance(image_found, str):
+                    images.setdefault(image_type, image_found)
+        return images
 
     @staticmethod
     def get_products_from_response(json_data):
@@ -113,11 +771,24 @@ class EpicFreeGames:
                     return products_found
                 else:
                     raise ProductDecodeException("Product data found is invalid type")
-            except KeyError:
+            except (KeyError, TypeError):
                 raise ProductDecodeException("JSON data is invalid")
         else:
             raise ProductDecodeException("Input data invalid")
 
+    @staticmethod
+    def get_products_from_payload(payload: bytes):
+        """Get the products straight from the raw body of a response, decoding nothing else"""
+        if not json_backend.supports_pointer():
+            return EpicFreeGames.get_products_from_response(json_backend.loads(payload))
+        try:
+            products_found = json_backend.load_pointer(payload, ELEMENTS_POINTER)
+        except (KeyError, IndexError, TypeError):
+            raise ProductDecodeException("JSON data is invalid")
+        if isinstance(products_found, list):
+            return products_found
+        raise ProductDecodeException("Product data found is invalid type")
+
     @staticmethod
     def get_description_of_product(product) -> str:
         """Get the description of a product from product data"""
@@ -151,33 +822,215 @@ class EpicFreeGames:
         except KeyError:
             raise ProductDecodeException(f"{URL_FIELD_KEY} does not exist in product data")
 
+    @staticmethod
+    def get_original_price_of_product(product) -> (int | None):
+        """Get the price of a product before any discount, if it exists, from product data"""
+        if not isinstance(product, dict):
+            raise ProductDecodeException("Invalid product input")
+        try:
+            price_found = product["price"]["totalPrice"]["originalPrice"]
+            if _is_int64(price_found):
+                return price_found
+            return None
+        except (KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def get_currency_of_product(product) -> (str | None):
+        """Get the currency code of the prices of a product, if it exists, from product data"""
+        if not isinstance(product, dict):
+            raise ProductDecodeException("Invalid product input")
+        try:
+            currency_found = product["price"]["totalPrice"]["currencyCode"]
+            if isinstance(currency_found, str):
+                return currency_found
+            return None
+        except (KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def parse_timestamp(value) -> int:
+        """Convert an ISO 8601 timestamp from product data into epoch seconds"""
+        if not isinstance(value, str):
+            raise ProductDecodeException(f"Timestamp: {value} is invalid")
+        try:
+            return _epoch_seconds(value)
+        except ValueError:
+            raise ProductDecodeException(f"Timestamp: {value} is invalid")
+
+    @staticmethod
+    def get_window_of_offer(offer) -> tuple[int, int, int]:
+        """Get the start, end and discount percentage of one promotional offer"""
+        try:
+            discount = offer["discountSetting"]["discountPercentage"]
+            if not _is_int64(discount):
+                raise ProductDecodeException(f"Discount: {discount} is invalid")
+            return (EpicFreeGames.parse_timestamp(offer["startDate"]),
+                    EpicFreeGames.parse_timestamp(offer["endDate"]),
+                    discount)
+        except (KeyError, TypeError):
+            raise ProductDecodeException("Promotional offer is invalid")
+
+    @staticmethod
+    def get_promotion_windows_of_product(product) -> tuple[tuple, tuple]:
+        """Get the current and the upcoming promotions of a product as (start, end, discount percentage) windows
+
+        A list of offers that cannot be read is logged and left empty
+        """
+        if not isinstance(product, dict):
+            raise ProductDecodeException("Invalid product input")
+        promotions = product.get("promotions")
+        if promotions is None:
+            return (), ()
+        windows = []
+        for offers_key in ("promotionalOffers", "upcomingPromotionalOffers"):
+            found = []
+            try:
+                for offer_group in promotions[offers_key]:
+                    for offer in offer_group["promotionalOffers"]:
+                        found.append(EpicFreeGames.get_window_of_offer(offer))
+            except (KeyError, TypeError, ProductDecodeException) as err:
+                logging.info(f"Could not find a promotion in product data: {err}")
+                found = []
+            windows.append(tuple(found))
+        return windows[0], windows[1]
+
+    @staticmethod
+    def get_promotion_of_product(product) -> (tuple[int, int, int] | None):
+        """Get the start, end and discount percentage of the current, or else the next, promotion of a product"""
+        current, upcoming = EpicFreeGames.get_promotion_windows_of_product(product)
+        return (current or upcoming or (None,))[0]
+
+    @staticmethod
+    def extract_product_fields(product, timer=None) -> tuple:
+        """Pull every field of a Game out of raw product data in one pass, timestamps included
+
+        An instrumentation.LapTimer can be passed in to time each group of fields
+        """
+        fields = _required_fields(product)
+        if not isinstance(fields, list):
+            raise ProductDecodeException(_failure_message(*fields))
+        if timer is not None:
+            timer.lap("decode.required_fields")
+        return EpicFreeGames.extract_optional_fields(product, fields, timer)
+
+    @staticmethod
+    def extract_optional_fields(product, fields: list, timer=None) -> tuple:
+        """Finish the fields of extract_product_fields given the values of the PRODUCT_FIELD_SPEC fields"""
+        # keyImages->(Where type=Thumbnail), keeping every other type alongside it
+        images = EpicFreeGames.get_images_of_product(product)
+        fields.append(images.get("Thumbnail"))
+        if timer is not None:
+            timer.lap("decode.thumbnail")
+        # The required fields have already found price -> totalPrice
+        total_price = product["price"]["totalPrice"]
+        original_price = total_price.get("originalPrice")
+        currency_code = total_price.get("currencyCode")
+        fields.append(original_price if _is_int64(original_price) else None)
+        current, upcoming = EpicFreeGames.get_promotion_windows_of_product(product)
+        fields.extend((current or upcoming or ((None, None, None),))[0])
+        fields.extend((currency_code if isinstance(currency_code, str) else None, current, upcoming, images))
+        if timer is not None:
+            timer.lap("decode.promotion")
+        return tuple(fields)
+
+    @staticmethod
+    def iter_product_fields(products,
+                            report: (DecodeReport | None) = None,
+                            free_only: bool = False,
+                            errors: (list[str] | None) = None,
+                            start: int = 0,
+                            skipped: (list[int] | None) = None,
+                            keep_free_windows: bool = False):
+        """Yield the extract_product_fields tuple of every product that decodes
+
+        Each failure is logged as an error, or when a report is given, recorded in it instead.
+        When an errors list is given the messages are appended to it instead of being logged.
+        With free_only, products whose price is not 0 are dropped as soon as their required
+        fields are found, without reading their images or promotions, and their indexes are
+        appended to skipped when it is given. With keep_free_windows, free_only also keeps
+        paid products with a current or upcoming free promotion. Elements are numbered from start
+        """
+        stats = instrumentation.current
+        for index, product in enumerate(products, start):
+            timer = stats.lap_timer()
+            fields = _required_fields(product)
+            if isinstance(fields, list):
+                if timer is not None:
+                    timer.lap("decode.required_fields")
+                if free_only and fields[2] != 0 and not (keep_free_windows and _has_free_offer(product)):
+                    if report is not None:
+                        report.decoded += 1
+                    if skipped is not None:
+                        skipped.append(index)
+                    continue
+                try:
+                    fields = EpicFreeGames.extract_optional_fields(product, fields, timer)
+                except ProductDecodeException as err:
+                    # Only keyImages can fail once the required fields are found
+                    field_path, reason, message = "keyImages", NOT_A_CONTAINER, err.msg
+                else:
+                    if report is not None:
+                        report.decoded += 1
+                    yield fields
+                    continue
+            else:
+                spec_index, reason, value = fields
+                field_path = "" if spec_index is None else FIELD_PATHS[spec_index]
+                message = None
+            if report is None:
+                message = message or _failure_message(spec_index, reason, value)
+                if errors is not None:
+                    errors.append(message)
+                    continue
+                logging.error(message)
+                stats.count("decode_failures", message)
+            else:
+                report.add(index, field_path, reason)
+                stats.count("decode_failures", f"{field_path or 'element'} {reason}")
+
     @staticmethod
     def decode_product(product) -> (Game | None):
         """Convert raw product data into a Game object"""
         try:
-            # title, description,
-            # price->totalPrice->discountPrice, offerMappings->0->pageSlug,
-            # keyImages->(Where type=Thumbnail)
-            title = EpicFreeGames().get_title_of_product(product)
-            description = EpicFreeGames().get_description_of_product(product)
-            price = EpicFreeGames().get_price_of_product(product)
-            product_url = EpicFreeGames().get_product_url(product)
-            thumbnail_url = EpicFreeGames().get_thumbnail_of_product(product)
-            return Game(title, description, price, product_url, thumbnail_url)
+            return Game(*EpicFreeGames.extract_product_fields(product, instrumentation.current.lap_timer()))
         except ProductDecodeException as err:
             logging.error(err)
+            instrumentation.current.count("decode_failures", err.msg)
             return None
 
     @staticmethod
-    def process_products(products) -> list[Game]:
-        """Decode a list of products and return a list of free games"""
+    def iter_free_games(products, report: (DecodeReport | None) = None):
+        """Decode products lazily, yielding only the free games
+
+        With a report, failures are added to it instead of logged
+        """
+        # Only the free products are fully decoded, and only they become Game objects
+        for fields in EpicFreeGames.iter_product_fields(products, report, free_only=True):
+            game = Game(*fields)
+            logging.info(f"{game.title} is free")
+            yield game
+
+    @staticmethod
+    def _decode_free_games(products, report: (DecodeReport | None)) -> list[Game]:
         try:
-            free_games: list[Game] = []
-            for product in products:
-                game_decoded = EpicFreeGames().decode_product(product)
-                if game_decoded is not None and game_decoded.free:
-                    logging.info(f"{game_decoded.title} is free")
-                    free_games.append(game_decoded)
-            return free_games
+            return list(EpicFreeGames.iter_free_games(products, report))
         except TypeError:
             raise ProductDecodeException("Products list invalid")
+
+    @staticmethod
+    def process_products(products) -> list[Game]:
+        """Decode a list of products and return a list of free games"""
+        return EpicFreeGames._decode_free_games(products, None)
+
+    @staticmethod
+    def process_products_with_report(products) -> tuple[list[Game], DecodeReport]:
+        """Decode a list of products and return the free games and a DecodeReport of the failures
+
+        Failures are not logged one by one, the summary of the report is logged instead at
+        most once every DECODE_SUMMARY_INTERVAL seconds
+        """
+        report = DecodeReport()
+        free_games = EpicFreeGames._decode_free_games(products, report)
+        report.log()
+        return free_games, report
@@ -0,0 +1,77 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from product_decode import Game, GameBatch, ProductDecodeException, expiry_for
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "epic-free-games", "promotions.sqlite3")
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 600
+
+
+class PromotionCache:
+    """On-disk cache of decoded free games, keyed by the promotions URL of a region
+
+    Each entry records the hash of the payload it was decoded from and expires at the
+    earliest end of its promotions, or after default_ttl seconds, whichever comes first.
+    Once more than max_entries regions are stored the least recently used are evicted
+    """
+
+    def __init__(self,
+                 path: str = DEFAULT_CACHE_PATH,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 default_ttl: int = DEFAULT_TTL,
+                 clock=time.time) -> None:
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS promotions ("
+                "url TEXT PRIMARY KEY, payload_hash TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "last_used REAL NOT NULL, games TEXT NOT NULL)")
+
+    def expiry_for(self, games: list[Game]) -> float:
+        """Get when a set of free games goes stale: the first promotion end, capped at default_ttl"""
+        return expiry_for(games, self.clock(), self.default_ttl)
+
+    def _load(self, url: str, query: str, parameter) -> (list[Game] | None):
+        with self._lock:
+            row = self._connection.execute(query, (url, parameter)).fetchone()
+            if row is None:
+                return None
+            with self._connection:
+                self._connection.execute("UPDATE promotions SET last_used = ? WHERE url = ?", (self.clock(), url))
+        try:
+            return list(GameBatch.from_columns(json.loads(row[0])))
+        except (ValueError, ProductDecodeException):
+            return None
+
+    def get(self, url: str) -> (list[Game] | None):
+        """Get the cached free games for a URL, if they have not expired"""
+        return self._load(url, "SELECT games FROM promotions WHERE url = ? AND expires_at > ?", self.clock())
+
+    def get_by_hash(self, url: str, payload_hash: str) -> (list[Game] | None):
+        """Get the cached free games for a URL if they were decoded from the same payload, even if expired"""
+        return self._load(url, "SELECT games FROM promotions WHERE url = ? AND payload_hash = ?", payload_hash)
+
+    def put(self, url: str, payload_hash: str, games: list[Game]) -> None:
+        """Store the free games decoded from a payload, evicting the least recently used entries"""
+        games_data = json.dumps(GameBatch.from_games(games).to_columns())
+        now = self.clock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO promotions (url, payload_hash, expires_at, last_used, games) VALUES (?, ?, ?, ?, ?)",
+                (url, payload_hash, self.expiry_for(games), now, games_data))
+            self._connection.execute(
+                "DELETE FROM promotions WHERE url NOT IN "
+                "(SELECT url FROM promotions ORDER BY last_used DESC LIMIT ?)", (self.max_entries,))
+
+    def close(self) -> None:
+        self._connection.close()
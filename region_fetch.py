@@ -0,0 +1,47 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from epic_session import EpicSession, make_pooled_session
+from product_decode import PROMOTIONS_URL, EpicFreeGames, Game
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def fetch_regions(targets: list[tuple[str, str]],
+                  max_workers: int = DEFAULT_MAX_WORKERS,
+                  base_url: str = PROMOTIONS_URL,
+                  session: (requests.Session | EpicSession | None) = None) -> dict[tuple[str, str], list[Game]]:
+    """Fetch the free games for each (country, locale) target concurrently
+
+    All requests share one pooled session, so connections to the promotions host are reused
+    between regions. Passing an EpicSession also makes each request conditional.
+    Returns the free games found for each target, keyed by the target
+    """
+    if not targets:
+        return {}
+    workers = max(1, min(max_workers, len(targets)))
+    owns_session = session is None
+    if owns_session:
+        session = make_pooled_session(workers)
+
+    def fetch(target: tuple[str, str]) -> list[Game]:
+        country, locale = target
+        manager = EpicFreeGames(country, locale, base_url)
+        try:
+            if isinstance(session, EpicSession):
+                session.fetch(manager)
+            else:
+                manager.make_request(session)
+        except requests.RequestException as err:
+            logging.warning(f"Request for {country}/{locale} failed with: {err}")
+        return manager.free_games
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(fetch, targets)
+            return dict(zip(targets, results))
+    finally:
+        if owns_session:
+            session.close()
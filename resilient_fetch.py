@@ -0,0 +1,339 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import requests
+
+import instrumentation
+from product_decode import DEFAULT_TIMEOUT, PROMOTIONS_URL, EpicFreeGames, Game
+from epic_session import make_pooled_session
+
+# The same promotions are served by the host without the ipv4 suffix
+ALTERNATE_PROMOTIONS_URL = "https://store-site-backend-static.ak.epicgames.com/freeGamesPromotions"
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 8.0
+# Seconds get may take in total, across every attempt and wait between them
+DEFAULT_DEADLINE = 30.0
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 60.0
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+DEFAULT_LATENCY_WINDOW = 200
+# Attempts that may run at once, counting those abandoned at the deadline that have not finished yet
+DEFAULT_MAX_ATTEMPTS = 8
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of making a request while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops requests to a failing endpoint for a while
+
+    Opens after failure_threshold consecutive failed fetches. Once reset_timeout seconds
+    have passed a single trial fetch is let through, which closes the circuit again if it
+    succeeds and reopens it if it fails
+    """
+
+    def __init__(self,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+                 clock=time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: (float | None) = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self) -> bool:
+        """Whether a fetch may be made now"""
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+class LatencyTracker:
+    """Keeps the latencies of the most recent successful requests"""
+
+    def __init__(self, window: int = DEFAULT_LATENCY_WINDOW) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, fraction: float, min_samples: int = 1) -> (float | None):
+        """Get the latency below which fraction of the samples fall, None with fewer than min_samples"""
+        with self._lock:
+            if len(self.samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ResilientFetcher:
+    """Fetches the promotions with timeouts, retries, a circuit breaker and optional hedging
+
+    Connection errors, timeouts and RETRY_STATUSES responses are retried up to max_retries
+    times, waiting a random time of up to backoff * 2 ** attempt seconds (or the Retry-After
+    the server asked for) capped at max_backoff. While the circuit breaker is open no
+    request is made. When a request to base_url takes longer than the hedge_percentile of
+    recent latencies, the same request is also sent to alternate_base_url and whichever
+    answers first is used. The alternate defaults to ALTERNATE_PROMOTIONS_URL, which only
+    mirrors the default base_url, so pass None when fetching from anywhere else.
+
+    The timeout only bounds the connection and each read, so a server trickling bytes could
+    hold a request much longer. get gives up with a Timeout once deadline seconds have
+    passed instead, and makes no retry that could not start before then. The abandoned
+    request keeps running until its own timeout, and while max_attempts of them are still
+    running a new attempt fails at once with a ConnectionError rather than queueing behind
+    them, and no hedge is sent
+
+    get can stand in for a requests.Session in EpicFreeGames.make_request and fetch_regions,
+    and fetch for an EpicSession in watch
+    """
+
+    def __init__(self,
+                 session: (requests.Session | None) = None,
+                 timeout=DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF,
+                 deadline: (float | None) = DEFAULT_DEADLINE,
+                 breaker: (CircuitBreaker | None) = None,
+                 base_url: str = PROMOTIONS_URL,
+                 alternate_base_url: (str | None) = ALTERNATE_PROMOTIONS_URL,
+                 hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+                 hedge_min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 rng: (random.Random | None) = None,
+                 clock=time.monotonic,
+                 sleep=time.sleep) -> None:
+        self.session = session or make_pooled_session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.base_url = base_url
+        self.alternate_base_url = alternate_base_url
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.max_attempts = max_attempts
+        self.latencies = LatencyTracker()
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self.sleep = sleep
+        self._last_good: dict[str, list[Game]] = {}
+        self._executor: (ThreadPoolExecutor | None) = None
+        self._attempt_slots = threading.BoundedSemaphore(max_attempts)
+        self._lock = threading.Lock()
+
+    def get(self, url: str, timeout=None, **kwargs) -> requests.Response:
+        """Get a URL like requests.Session.get, retrying and hedging as configured
+
+        Raises CircuitOpenError while the circuit breaker is open, and the last error once
+        the retries or the deadline run out
+        """
+        stats = instrumentation.current
+        if not self.breaker.allow():
+            stats.count("fetch_circuit_open")
+            raise CircuitOpenError(f"Circuit open, not requesting {url}")
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if self.deadline is None else self.clock() + self.deadline
+        attempt = 0
+        while True:
+            try:
+                response = self._hedged_get(url, timeout, kwargs, deadline)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                delay = self._retry_delay(attempt, None, deadline)
+                if delay is None:
+                    self.breaker.record_failure()
+                    raise
+                logging.info(f"Retrying {url} after: {err}")
+                stats.count("fetch_retries", type(err).__name__)
+                self.sleep(delay)
+            except requests.RequestException:
+                self.breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                delay = self._retry_delay(attempt, response.headers.get("Retry-After"), deadline)
+                if delay is None:
+                    self.breaker.record_failure()
+                    return response
+                logging.info(f"Retrying {url} after code: {response.status_code}")
+                stats.count("fetch_retries", str(response.status_code))
+                self.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, attempt: int, retry_after: (str | None), deadline: (float | None)) -> (float | None):
+        """Get the seconds to wait before retrying, None when no retry can start before the deadline"""
+        if attempt >= self.max_retries:
+            return None
+        delay = self._backoff_delay(attempt, retry_after)
+        if deadline is not None and self.clock() + delay >= deadline:
+            return None
+        return delay
+
+    def _remaining(self, deadline: (float | None)) -> (float | None):
+        return None if deadline is None else max(0.0, deadline - self.clock())
+
+    def _backoff_delay(self, attempt: int, retry_after: (str | None)) -> float:
+        if retry_after is not None:
+            try:
+                return min(self.max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return self.rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def alternate_url(self, url: str) -> (str | None):
+        """Get the same URL on the alternate host, None when hedging does not apply"""
+        if self.alternate_base_url is None or not url.startswith(self.base_url):
+            return None
+        return self.alternate_base_url + url[len(self.base_url):]
+
+    def _timed_get(self, url: str, timeout, kwargs: dict) -> requests.Response:
+        start = time.perf_counter()
+        response = self.session.get(url, timeout=timeout, **kwargs)
+        if response.status_code not in RETRY_STATUSES:
+            self.latencies.add(time.perf_counter() - start)
+        return response
+
+    def _hedged_get(self, url: str, timeout, kwargs: dict, deadline: (float | None)) -> requests.Response:
+        alternate_url = self.alternate_url(url)
+        hedge_after = None
+        if alternate_url is not None:
+            hedge_after = self.latencies.percentile(self.hedge_percentile, self.hedge_min_samples)
+        if hedge_after is None and deadline is None:
+            return self._timed_get(url, timeout, kwargs)
+        # Requests run on the executor so that waiting for them can stop at the deadline
+        first = self._submit(url, timeout, kwargs)
+        if first is None:
+            instrumentation.current.count("fetch_attempts_busy")
+            raise requests.ConnectionError(f"{self.max_attempts} earlier attempts are still running, not requesting {url}")
+        pending = {first}
+        done = set()
+        remaining = self._remaining(deadline)
+        if hedge_after is not None and (remaining is None or hedge_after < remaining):
+            done, pending = wait(pending, timeout=hedge_after)
+            hedge = None if done else self._submit(alternate_url, timeout, kwargs)
+            if hedge is not None:
+                logging.info(f"No response from {url} after {hedge_after:.3f} seconds, also requesting {alternate_url}")
+                instrumentation.current.count("fetch_hedged")
+                pending.add(hedge)
+        error = None
+        failed_response = None
+        while True:
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as err:
+                    error = err
+                    continue
+                if response.status_code not in RETRY_STATUSES:
+                    # The slower request is left to finish in the background
+                    return response
+                failed_response = response
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=self._remaining(deadline), return_when=FIRST_COMPLETED)
+            if not done:
+                # The requests still running are left to time out in the background
+                raise requests.Timeout(f"No response from {url} before the deadline")
+        if failed_response is not None:
+            return failed_response
+        raise error
+
+    def _submit(self, url: str, timeout, kwargs: dict) -> (Future | None):
+        """Start an attempt on the executor, None when max_attempts are already running"""
+        if not self._attempt_slots.acquire(blocking=False):
+            return None
+        try:
+            future = self._get_executor().submit(self._timed_get, url, timeout, kwargs)
+        except BaseException:
+            self._attempt_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._attempt_slots.release())
+        return future
+
+    def fetch(self, manager: EpicFreeGames) -> bool:
+        """Update the free games of manager, serving the last good ones while the circuit is open
+
+        Returns whether the free games were updated from a fresh response
+        """
+        url = manager.URL_FOR_CHECK
+        try:
+            response = self.get(url)
+        except CircuitOpenError as err:
+            with self._lock:
+                last_good = self._last_good.get(url)
+            logging.warning(f"{err}, serving the last good free games")
+            if last_good is not None:
+                manager.set_free_games(list(last_good))
+            return False
+        if not manager.process_response(response):
+            return False
+        with self._lock:
+            self._last_good[url] = list(manager.free_games)
+        return True
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # One worker per slot, so an attempt never waits in the queue for a free worker
+                self._executor = ThreadPoolExecutor(max_workers=self.max_attempts)
+            return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
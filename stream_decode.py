@@ -0,0 +1,150 @@
+import codecs
+import json
+import logging
+
+import requests
+
+from product_decode import DEFAULT_TIMEOUT, DecodeReport, EpicFreeGames, ProductDecodeException
+
+ELEMENTS_PATH = ("data", "Catalog", "searchStore", "elements")
+DEFAULT_CHUNK_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
+
+_json_decoder = json.JSONDecoder()
+
+
+class ChunkReader:
+    """Incrementally decodes JSON values from an iterable of byte or text chunks
+
+    Only the unconsumed tail of the input is kept in memory, plus whatever the value
+    currently being decoded needs
+    """
+
+    def __init__(self, chunks) -> None:
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Drop consumed text and append the next chunk, returns False at the end of the input"""
+        if self.eof:
+            return False
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        for chunk in self._chunks:
+            text = self._text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buffer += text
+                return True
+        self.eof = True
+        text = self._text_decoder.decode(b"", final=True)
+        self.buffer += text
+        return bool(text)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or an empty string at the end of the input"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consume char, which must be the next non whitespace character"""
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number ending at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def _find_key(reader: ChunkReader, key: str) -> None:
+    """Advance the reader to the value of key in the object starting at the reader"""
+    if reader.peek() != "{":
+        raise ProductDecodeException("JSON data is invalid")
+    reader.pos += 1
+    if reader.peek() == "}":
+        raise ProductDecodeException("JSON data is invalid")
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            return
+        reader.value()
+        if reader.peek() == "}":
+            raise ProductDecodeException("JSON data is invalid")
+        reader.expect(",")
+
+
+def seek_elements(reader: ChunkReader, path: tuple[str, ...] = ELEMENTS_PATH) -> None:
+    """Advance the reader past the opening bracket of the list at path"""
+    if reader.peek() != "{":
+        raise ProductDecodeException("Input data invalid")
+    for key in path:
+        _find_key(reader, key)
+    if reader.peek() != "[":
+        raise ProductDecodeException("Product data found is invalid type")
+    reader.pos += 1
+
+
+def iter_elements(chunks, path: tuple[str, ...] = ELEMENTS_PATH):
+    """Yield the products in data -> Catalog -> searchStore -> elements one at a time
+
+    The chunks are read as they are needed, so the full document is never held in memory
+    """
+    reader = ChunkReader(chunks)
+    seek_elements(reader, path)
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == "]":
+            return
+        reader.expect(",")
+
+
+def stream_free_games(manager: EpicFreeGames,
+                      session=None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      timeout=DEFAULT_TIMEOUT) -> bool:
+    """Update the free games of manager by decoding the response while it downloads
+
+    Returns whether the free games were updated
+    """
+    http = requests if session is None else session
+    with http.get(manager.URL_FOR_CHECK, stream=True, timeout=timeout) as response:
+        if not response.ok:
+            logging.warning(f"Request failed with code: {response.status_code}")
+            return False
+        try:
+            # Decoded and reported the same way as a buffered response
+            report = DecodeReport() if manager.decode_report else None
+            elements = iter_elements(response.iter_content(chunk_size))
+            manager.set_free_games(list(EpicFreeGames.iter_free_games(elements, report)))
+            if report is not None:
+                report.log()
+                manager.last_report = report
+            return True
+        except ProductDecodeException as err:
+            logging.error(err)
+        except json.JSONDecodeError as err:
+            logging.warning(f"Convert to json failed with: {err}")
+    return False
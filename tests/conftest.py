@@ -0,0 +1,65 @@
+import pytest
+
+import image_cache
+import product_decode
+import promotion_cache
+
+
+class FakeClock:
+    """Clock that stays at now, or moves step seconds forward every time it is read"""
+
+    def __init__(self, now: float = 1000.0, step: float = 0.0) -> None:
+        self.now = now
+        self.step = step
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def games() -> list[product_decode.Game]:
+    """A free, a discounted and a full price game with only the required fields"""
+    return [
+        product_decode.Game("free", "description", 0, "free-url", "thumb"),
+        product_decode.Game("cheap", "description", 499, "cheap-url", None),
+        product_decode.Game("full", "description", 1999, "full-url", "thumb")
+    ]
+
+
+@pytest.fixture
+def detailed_games() -> list[product_decode.Game]:
+    """A free game with every field set and text that needs escaping, and a paid game with only the required fields"""
+    return [
+        product_decode.Game("Free, \"quoted\"", "Line one\nline two", 0, "free-url", "thumb", 1999, 100, 200, 0, "GBP",
+                            ((100, 200, 0),), ((300, 400, 50),), {"Thumbnail": "thumb", "OfferImageWide": "wide"}),
+        product_decode.Game("Café ☕", "description", 499, "cafe-url", None)
+    ]
+
+
+@pytest.fixture
+def promoted_games() -> list[product_decode.Game]:
+    """A game free until 1300, after the time the clock fixture starts at"""
+    return [product_decode.Game("free", "description", 0, "free-url", "thumb", 1999, 900, 1300, 0)]
+
+
+@pytest.fixture
+def make_promotion_cache(tmp_path, clock):
+    """Factory of PromotionCache objects sharing one file in tmp_path and the clock fixture"""
+    def make(max_entries: int = 8) -> promotion_cache.PromotionCache:
+        return promotion_cache.PromotionCache(str(tmp_path / "cache.sqlite3"), max_entries=max_entries,
+                                              default_ttl=600, clock=clock)
+    return make
+
+
+@pytest.fixture
+def make_image_cache(tmp_path):
+    """Factory of ImageCache objects in tmp_path whose clock ticks on every read, so uses are ordered"""
+    def make(max_bytes: int = 1024 * 1024) -> image_cache.ImageCache:
+        return image_cache.ImageCache(str(tmp_path / "images"), max_bytes=max_bytes, clock=FakeClock(step=1))
+    return make
@@ -0,0 +1,67 @@
+import epic_session
+import product_decode
+import pytest
+import requests
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import StubPromotionsServer
+
+
+class TestCachedPromotions:
+    """Test cases for the conditional_headers function."""
+
+    def test_no_validators_gives_no_headers(self):
+        """Test that a response without validators adds no conditional headers."""
+        assert epic_session.CachedPromotions(None, None, []).conditional_headers() == {}
+
+    def test_validators_give_conditional_headers(self):
+        """Test that the ETag and Last-Modified values are sent back."""
+        cached = epic_session.CachedPromotions('"abc"', "Wed, 21 Oct 2015 07:28:00 GMT", [])
+        assert cached.conditional_headers() == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"}
+
+
+class TestEpicSessionFetch:
+    """Test cases for the EpicSession.fetch function."""
+
+    def test_not_modified_reuses_free_games(self):
+        """Test that a 304 response keeps the free games decoded from the first response."""
+        with StubPromotionsServer(encode_payload(make_payload(8)), etag='"v1"') as server:
+            with epic_session.EpicSession() as session:
+                first = product_decode.EpicFreeGames(base_url=server.base_url)
+                session.fetch(first)
+                second = product_decode.EpicFreeGames(base_url=server.base_url)
+                session.fetch(second)
+            assert server.not_modified_count == 1
+        assert [game.title for game in first.free_games] == ["Game 0", "Game 4"]
+        assert [game.title for game in second.free_games] == ["Game 0", "Game 4"]
+
+    def test_changed_etag_decodes_new_response(self):
+        """Test that a new ETag makes the body be decoded again."""
+        with StubPromotionsServer(encode_payload(make_payload(8)), etag='"v1"') as server:
+            with epic_session.EpicSession() as session:
+                manager = product_decode.EpicFreeGames(base_url=server.base_url)
+                session.fetch(manager)
+                server.body = encode_payload(make_payload(8, free_every=2))
+                server.etag = '"v2"'
+                session.fetch(manager)
+            assert server.not_modified_count == 0
+        assert len(manager.free_games) == 4
+
+    def test_no_validators_always_decodes(self):
+        """Test that responses without validators are never cached."""
+        with StubPromotionsServer(encode_payload(make_payload(4))) as server:
+            with epic_session.EpicSession() as session:
+                manager = product_decode.EpicFreeGames(base_url=server.base_url)
+                session.fetch(manager)
+                session.fetch(manager)
+            assert server.request_count == 2
+            assert server.not_modified_count == 0
+        assert len(manager.free_games) == 1
+
+    def test_slow_response_times_out(self):
+        """Test that a response slower than the read timeout raises a Timeout instead of hanging."""
+        with StubPromotionsServer(encode_payload(make_payload(4)), faults=[2.0]) as server:
+            with epic_session.EpicSession(timeout=(1, 0.5)) as session:
+                with pytest.raises(requests.Timeout):
+                    session.fetch(product_decode.EpicFreeGames(base_url=server.base_url))
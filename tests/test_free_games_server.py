@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import free_games_server
+import product_decode
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import StubPromotionsServer
+
+PAYLOAD = encode_payload(make_payload(8, free_every=2))
+
+
+async def fetch(port: int, target: str, method: str = "GET") -> tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode("ascii"))
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head[9:12]), body
+
+
+def run_requests(service: free_games_server.FreeGamesService, targets: list[str], method: str = "GET") -> list:
+    """Serve the targets concurrently from one server and return each (status, body)"""
+    async def run():
+        server = await service.serve("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await asyncio.gather(*(fetch(port, target, method) for target in targets))
+    return asyncio.run(run())
+
+
+def make_service(upstream: StubPromotionsServer, **kwargs) -> free_games_server.FreeGamesService:
+    return free_games_server.FreeGamesService(upstream.base_url, **kwargs)
+
+
+class TestFreeGamesService:
+    """Test cases for the FreeGamesService class."""
+
+    def test_serves_free_games_of_a_region(self):
+        """Test that a region's free games are served as JSON."""
+        with StubPromotionsServer(PAYLOAD) as upstream:
+            service = make_service(upstream)
+            [(status, body)] = run_requests(service, ["/free-games?country=gb&locale=en-GB"])
+            service.close()
+        assert status == 200
+        document = json.loads(body)
+        assert (document["country"], document["locale"]) == ("GB", "en-GB")
+        assert [game["product_url"] for game in document["free_games"]] == ["game-0", "game-2", "game-4", "game-6"]
+
+    def test_concurrent_requests_share_one_fetch(self):
+        """Test that concurrent requests for an uncached region make a single upstream fetch."""
+        with StubPromotionsServer(PAYLOAD, latency=0.2) as upstream:
+            service = make_service(upstream)
+            responses = run_requests(service, ["/free-games?country=US&locale=en-US"] * 20)
+            service.close()
+        assert {status for status, _ in responses} == {200}
+        assert len({body for _, body in responses}) == 1
+        assert upstream.request_count == 1
+
+    def test_regions_are_fetched_separately(self):
+        """Test that each region is fetched once and then served from the cache."""
+        with StubPromotionsServer(PAYLOAD) as upstream:
+            service = make_service(upstream)
+            run_requests(service, ["/free-games?country=US&locale=en-US", "/free-games?country=GB&locale=en-GB"])
+            run_requests(service, ["/free-games?country=US&locale=en-US", "/free-games?country=GB&locale=en-GB"])
+            service.close()
+        assert upstream.request_count == 2
+
+    def test_expired_region_is_fetched_again(self, clock):
+        """Test that a region is fetched again once its ttl has passed."""
+        with StubPromotionsServer(PAYLOAD) as upstream:
+            service = make_service(upstream, ttl=60, clock=clock)
+            run_requests(service, ["/free-games"])
+            clock.now += 61
+            run_requests(service, ["/free-games"])
+            service.close()
+        assert upstream.request_count == 2
+
+    def test_failed_refresh_serves_expired_response(self, clock):
+        """Test that the expired response is served when the upstream fetch fails."""
+        with StubPromotionsServer(PAYLOAD, faults=[None, 500]) as upstream:
+            service = make_service(upstream, ttl=60, clock=clock)
+            [first] = run_requests(service, ["/free-games"])
+            clock.now += 61
+            [second] = run_requests(service, ["/free-games"])
+            service.close()
+        assert second == first
+
+    def test_failed_refresh_is_retried_after_retry_interval(self, clock):
+        """Test that requests after a failed refresh get the expired response without a new upstream call until retry_interval passes."""
+        with StubPromotionsServer(PAYLOAD, faults=[None, 500]) as upstream:
+            service = make_service(upstream, ttl=60, clock=clock, retry_interval=30)
+            [first] = run_requests(service, ["/free-games"])
+            clock.now += 61
+            run_requests(service, ["/free-games"])
+            [second] = run_requests(service, ["/free-games"])
+            assert (second, upstream.request_count) == (first, 2)
+            clock.now += 31
+            run_requests(service, ["/free-games"])
+            service.close()
+        assert upstream.request_count == 3
+
+    def test_failed_fetch_without_cache_is_bad_gateway(self):
+        """Test that a 502 is returned when the upstream fails and nothing is cached."""
+        with StubPromotionsServer(PAYLOAD, faults=[500]) as upstream:
+            service = make_service(upstream)
+            [(status, _)] = run_requests(service, ["/free-games"])
+            service.close()
+        assert status == 502
+
+    def test_least_recently_used_region_is_evicted(self):
+        """Test that only max_regions regions are kept."""
+        with StubPromotionsServer(PAYLOAD) as upstream:
+            service = make_service(upstream, max_regions=1)
+            run_requests(service, ["/free-games?country=US&locale=en-US"])
+            run_requests(service, ["/free-games?country=GB&locale=en-GB"])
+            run_requests(service, ["/free-games?country=US&locale=en-US"])
+            service.close()
+        assert upstream.request_count == 3
+
+    def test_invalid_requests_are_rejected(self):
+        """Test that bad regions, unknown paths and other methods get an error without a fetch."""
+        with StubPromotionsServer(PAYLOAD) as upstream:
+            service = make_service(upstream)
+            responses = run_requests(service, ["/free-games?country=USA", "/free-games?locale=../x", "/other"])
+            [(post_status, _)] = run_requests(service, ["/free-games"], method="POST")
+            service.close()
+        assert [status for status, _ in responses] == [400, 400, 404]
+        assert post_status == 405
+        assert upstream.request_count == 0
+
+
+class TestExpiryFor:
+    """Test cases for the expiry_for method."""
+
+    def test_expires_when_first_promotion_ends(self, clock):
+        """Test that a promotion ending before the ttl brings the expiry forward."""
+        with StubPromotionsServer(PAYLOAD) as upstream:
+            service = make_service(upstream, ttl=300, clock=clock)
+            game = product_decode.Game("free", "description", 0, "url", None, 1999, 900, 1100, 0)
+            assert service.expiry_for([game]) == 1100
+            assert service.expiry_for([]) == 1300
+            service.close()
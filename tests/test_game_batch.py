@@ -0,0 +1,181 @@
+import json
+
+import pytest
+import product_decode
+from benchmarks.payloads import make_payload
+
+
+@pytest.fixture(params=["numpy", "python"])
+def vector_backend(request, monkeypatch):
+    """Run a test with NumPy columns and again with the plain Python fallback."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(product_decode, "NUMPY_MIN_BATCH", 0)
+    else:
+        monkeypatch.setattr(product_decode, "numpy", None)
+    return request.param
+
+
+def make_promotion_games() -> list[product_decode.Game]:
+    return [
+        product_decode.Game("free now", "description", 0, "free-now", None, 1999, 100, 200, 0,
+                            promotion_windows=((100, 200, 0),)),
+        product_decode.Game("free soon", "description", 1999, "free-soon", None, 1999, 300, 400, 0,
+                            upcoming_windows=((300, 400, 0),)),
+        product_decode.Game("half off soon", "description", 1999, "half-off", None, 1999, 300, 400, 50,
+                            upcoming_windows=((300, 400, 50),)),
+        product_decode.Game("ninety off", "description", 199, "ninety-off", None, 1999),
+        product_decode.Game("free later", "description", 1999, "free-later", None, 1999, 900, 1000, 0,
+                            upcoming_windows=((900, 1000, 0),))
+    ]
+
+
+class TestGame:
+    """Test cases for the Game class."""
+
+    def test_game_has_no_instance_dict(self, games):
+        """Test that a Game stores its attributes in slots."""
+        assert not hasattr(games[0], "__dict__")
+
+    def test_free_follows_price(self, games):
+        """Test that a game is free only when its price is 0."""
+        free_game, cheap_game, _ = games
+        assert free_game.free
+        assert not cheap_game.free
+
+
+class TestGameBatch:
+    """Test cases for the GameBatch class."""
+
+    def test_games_round_trip(self, games):
+        """Test that games stored in a batch come back with the same attributes."""
+        batch = product_decode.GameBatch.from_games(games)
+        assert len(batch) == 3
+        assert [(game.title, game.price, game.product_url, game.thumbnail_url) for game in batch] == [
+            ("free", 0, "free-url", "thumb"), ("cheap", 499, "cheap-url", None), ("full", 1999, "full-url", "thumb")]
+        assert batch[1].title == "cheap"
+
+    def test_filter_price_keeps_cheaper_games(self, games):
+        """Test that filtering by price keeps games at or below the limit."""
+        batch = product_decode.GameBatch.from_games(games).filter_price(499)
+        assert batch.titles == ["free", "cheap"]
+
+    def test_free_games_keeps_free_games(self, games):
+        """Test that only free games are kept."""
+        assert product_decode.GameBatch.from_games(games).free_games().titles == ["free"]
+
+    def test_from_products_skips_invalid_products(self):
+        """Test that products which fail to decode are left out of the batch."""
+        products = make_payload(4)["data"]["Catalog"]["searchStore"]["elements"] + [None]
+        batch = product_decode.GameBatch.from_products(products)
+        assert batch.product_urls == ["game-0", "game-1", "game-2", "game-3"]
+
+    def test_missing_promotion_round_trips_as_none(self, games):
+        """Test that games without a promotion come back with None promotion fields."""
+        game = product_decode.GameBatch.from_games(games)[0]
+        assert (game.promotion_start, game.promotion_end, game.promotion_discount) == (None, None, None)
+        assert game.original_price == 0
+
+    def test_columns_round_trip_through_json(self, games):
+        """Test that a batch serialized as columns is rebuilt unchanged."""
+        batch = product_decode.GameBatch.from_games(games)
+        rebuilt = product_decode.GameBatch.from_columns(json.loads(json.dumps(batch.to_columns())))
+        assert rebuilt.to_columns() == batch.to_columns()
+
+    def test_uneven_columns_raise_exception(self, games):
+        """Test that columns of different lengths raise a ProductDecodeException."""
+        columns = product_decode.GameBatch.from_games(games).to_columns()
+        columns["title"].pop()
+        with pytest.raises(product_decode.ProductDecodeException):
+            product_decode.GameBatch.from_columns(columns)
+
+    def test_promotion_windows_round_trip_through_json(self):
+        """Test that windows, currency and images come back as tuples and dicts after serializing."""
+        game = product_decode.Game("free", "description", 0, "free-url", "thumb", 1999, 100, 200, 0, "GBP",
+                                   ((100, 200, 0),), ((300, 400, 50),), {"Thumbnail": "thumb"})
+        columns = json.loads(json.dumps(product_decode.GameBatch.from_games([game]).to_columns()))
+        rebuilt = product_decode.GameBatch.from_columns(columns)[0]
+        assert rebuilt.currency_code == "GBP"
+        assert rebuilt.promotion_windows == ((100, 200, 0),)
+        assert rebuilt.upcoming_windows == ((300, 400, 50),)
+        assert rebuilt.images == {"Thumbnail": "thumb"}
+
+    def test_columns_without_promotion_windows_are_filled(self, games):
+        """Test that columns serialized before the windows, currency and images existed still load."""
+        columns = product_decode.GameBatch.from_games(games).to_columns()
+        for name in ("currency_code",) + product_decode.GameBatch.RECORD_COLUMNS:
+            del columns[name]
+        game = product_decode.GameBatch.from_columns(columns)[0]
+        assert (game.currency_code, game.promotion_windows, game.upcoming_windows, game.images) == (None, (), (), {})
+
+
+class TestGameBatchMasks:
+    """Test cases for the vectorized GameBatch filters."""
+
+    def test_free_mask_selects_discount_price_zero(self, vector_backend):
+        """Test that the free filter keeps games whose discountPrice is 0."""
+        batch = product_decode.GameBatch.from_games(make_promotion_games())
+        assert batch.free_games().titles == ["free now"]
+
+    def test_discount_mask_selects_large_discounts(self, vector_backend):
+        """Test that games at least 90% off are selected."""
+        batch = product_decode.GameBatch.from_games(make_promotion_games())
+        assert batch.compress(batch.discount_mask(90)).titles == ["free now", "ninety off"]
+
+    def test_upcoming_free_mask_selects_future_free_promotions(self, vector_backend):
+        """Test that only free promotions starting after now are selected."""
+        batch = product_decode.GameBatch.from_games(make_promotion_games())
+        assert batch.compress(batch.upcoming_free_mask(250)).titles == ["free soon", "free later"]
+        assert batch.compress(batch.upcoming_free_mask(250, within=100)).titles == ["free soon"]
+
+    def test_upcoming_free_mask_matches_next_free_window(self, vector_backend):
+        """Test that a game discounted now and free in a later window is selected, as next_free_window finds it."""
+        game = product_decode.Game("half off then free", "description", 999, "later-free", None, 1999, 100, 200, 50,
+                                   promotion_windows=((100, 200, 50),), upcoming_windows=((300, 400, 0),))
+        batch = product_decode.GameBatch.from_games([game] + make_promotion_games())
+        assert game.next_free_window(150) == (300, 400, 0)
+        assert batch.compress(batch.upcoming_free_mask(150)).titles == ["half off then free", "free soon", "free later"]
+        assert list(batch.upcoming_free_mask(150)) == [game.next_free_window(150) is not None for game in batch]
+
+    def test_price_dropped_mask_compares_with_previous_batch(self, vector_backend):
+        """Test that games cheaper than in the previous batch are selected and new games are not."""
+        previous = product_decode.GameBatch.from_games(make_promotion_games()[1:])
+        current = product_decode.GameBatch.from_games(make_promotion_games())
+        previous.prices[2] = 1999
+        assert current.compress(current.price_dropped_mask(previous)).titles == ["ninety off"]
+
+    def test_free_at_mask_selects_games_in_a_free_window(self):
+        """Test that only games with a free promotion window containing now are selected."""
+        games = [
+            product_decode.Game("free now", "description", 0, "free-now", None, 1999, promotion_windows=((100, 200, 0),)),
+            product_decode.Game("free soon", "description", 1999, "free-soon", None, 1999, upcoming_windows=((300, 400, 0),)),
+            product_decode.Game("half off", "description", 999, "half-off", None, 1999, promotion_windows=((100, 200, 50),))
+        ]
+        batch = product_decode.GameBatch.from_games(games)
+        assert batch.free_at_mask(150) == [True, False, False]
+        assert batch.free_at_mask(350) == [False, True, False]
+
+    def test_masks_on_empty_batch_select_nothing(self, vector_backend):
+        """Test that filtering an empty batch returns an empty batch."""
+        batch = product_decode.GameBatch()
+        assert len(batch.free_games()) == 0
+        assert len(batch.compress(batch.upcoming_free_mask(0))) == 0
+
+
+class TestLoadNumpy:
+    """Test cases for loading NumPy on first use."""
+
+    def test_small_batches_do_not_load_numpy(self, monkeypatch, games):
+        """Test that filtering a batch below NUMPY_MIN_BATCH leaves NumPy unloaded."""
+        monkeypatch.setattr(product_decode, "numpy", product_decode._NOT_LOADED)
+        batch = product_decode.GameBatch.from_games(games)
+        assert [game.title for game in batch.free_games()] == ["free"]
+        assert product_decode.numpy is product_decode._NOT_LOADED
+
+    def test_large_batches_load_numpy(self, monkeypatch, games):
+        """Test that filtering a batch of NUMPY_MIN_BATCH games loads NumPy when installed."""
+        numpy_module = pytest.importorskip("numpy")
+        monkeypatch.setattr(product_decode, "numpy", product_decode._NOT_LOADED)
+        batch = product_decode.GameBatch.from_games(games * product_decode.NUMPY_MIN_BATCH)
+        assert len(batch.free_games()) == product_decode.NUMPY_MIN_BATCH
+        assert product_decode.numpy is numpy_module
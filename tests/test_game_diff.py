@@ -0,0 +1,140 @@
+import game_diff
+import product_decode
+from benchmarks.payloads import encode_payload, make_offers, make_product, wrap_elements
+
+
+def kinds(events) -> list[tuple[str, str]]:
+    return sorted((event.kind, event.game.product_url) for event in events)
+
+
+class TestElementFingerprint:
+    """Test cases for the element_fingerprint function."""
+
+    def test_invalid_product_returns_none(self):
+        """Test that an unreadable product has no fingerprint."""
+        assert game_diff.element_fingerprint(None) is None
+        assert game_diff.element_fingerprint({"offerMappings": []}) is None
+
+    def test_fingerprint_follows_price(self):
+        """Test that the fingerprint changes with the price but not with unrelated fields."""
+        product = make_product(1, 0)
+        slug, fingerprint = game_diff.element_fingerprint(product)
+        assert slug == "game-1"
+        product["description"] = "changed"
+        assert game_diff.element_fingerprint(product)[1] == fingerprint
+        product["price"]["totalPrice"]["discountPrice"] = 999
+        assert game_diff.element_fingerprint(product)[1] != fingerprint
+
+    def test_fingerprint_follows_upcoming_promotions(self):
+        """Test that adding an upcoming offer after the current one changes the fingerprint."""
+        fingerprint = game_diff.element_fingerprint(make_product(1, 0))[1]
+        product = make_product(1, 0)
+        product["promotions"]["upcomingPromotionalOffers"] = make_offers("2024-01-11T16:00:00.000Z", "2024-01-18T16:00:00.000Z", 0)
+        assert game_diff.element_fingerprint(product)[1] != fingerprint
+
+
+class TestFreeGamesIndex:
+    """Test cases for the FreeGamesIndex class."""
+
+    def test_first_poll_adds_every_free_game(self):
+        """Test that the first poll reports each free game as added."""
+        index = game_diff.FreeGamesIndex()
+        events = index.update([make_product(0, 0), make_product(1, 1999), make_product(2, 0)])
+        assert kinds(events) == [("added", "game-0"), ("added", "game-2")]
+
+    def test_unchanged_poll_has_no_events_and_skips_decode(self, monkeypatch):
+        """Test that an identical poll reports nothing and reuses the previous games."""
+        index = game_diff.FreeGamesIndex()
+        index.update([make_product(0, 0), make_product(1, 1999)])
+        previous_games = index.free_games
+        decoded = []
+        iter_product_fields = product_decode.EpicFreeGames.iter_product_fields
+
+        def spy(products, *args, **kwargs):
+            decoded.extend(products)
+            return iter_product_fields(products, *args, **kwargs)
+
+        monkeypatch.setattr(product_decode.EpicFreeGames, "iter_product_fields", spy)
+        assert index.update([make_product(0, 0), make_product(1, 1999)]) == []
+        assert index.free_games == previous_games
+        assert decoded == []
+
+    def test_changes_between_polls_are_reported(self):
+        """Test that new, ended and changed free games produce events."""
+        index = game_diff.FreeGamesIndex()
+        index.update([make_product(0, 0), make_product(1, 0), make_product(2, 1999)])
+        changed = make_product(1, 0)
+        changed["price"]["totalPrice"]["originalPrice"] = 2999
+        events = index.update([changed, make_product(2, 0)])
+        assert kinds(events) == [("added", "game-2"), ("changed", "game-1"), ("removed", "game-0")]
+
+    def test_invalid_products_are_skipped(self):
+        """Test that products which fail to decode produce no events."""
+        assert game_diff.FreeGamesIndex().update([None, {"title": "title"}]) == []
+
+    def test_failures_are_recorded_in_report(self):
+        """Test that with a report, failures are recorded at their element index and reused products count as decoded."""
+        index = game_diff.FreeGamesIndex()
+        index.update([make_product(0, 0), make_product(1, 1999)])
+        report = product_decode.DecodeReport()
+        events = index.update([make_product(0, 0), None, make_product(2, 0), {"title": "title"}], report)
+        assert kinds(events) == [("added", "game-2")]
+        assert report.failures == [(1, "", product_decode.NOT_A_PRODUCT), (3, "description", product_decode.MISSING_FIELD)]
+        assert (report.decoded, report.failed) == (2, 2)
+
+    def test_paid_products_are_not_fully_decoded(self, monkeypatch):
+        """Test that paid products stop at their required fields, as in process_products."""
+        monkeypatch.setattr(product_decode.EpicFreeGames, "extract_optional_fields", None)
+        index = game_diff.FreeGamesIndex()
+        assert index.update([make_product(1, 1999)]) == []
+        assert list(index.fingerprints) == ["game-1"]
+
+    def test_paid_game_with_upcoming_free_window_is_kept(self):
+        """Test that a paid game whose upcoming promotion is free is kept apart from the free games."""
+        product = make_product(1, 1999)
+        product["promotions"] = {"promotionalOffers": [],
+                                 "upcomingPromotionalOffers": make_offers("2024-01-11T16:00:00.000Z", "2024-01-18T16:00:00.000Z", 0)}
+        index = game_diff.FreeGamesIndex()
+        assert index.update([product, make_product(2, 1999)]) == []
+        assert index.free_games == []
+        assert [game.upcoming_windows for game in index.upcoming_free_games] == [((1704988800, 1705593600, 0),)]
+        index.update([product, make_product(2, 1999)])
+        assert [game.product_url for game in index.upcoming_free_games] == ["game-1"]
+
+    def test_unchanged_failures_are_logged_once(self, caplog):
+        """Test that a product failing the same way again is counted in the report but not logged again."""
+        index = game_diff.FreeGamesIndex()
+        broken = {"title": "title"}
+        index.update([make_product(0, 0), broken])
+        caplog.clear()
+        report = product_decode.DecodeReport()
+        index.update([make_product(0, 0), dict(broken)], report)
+        assert report.failures == [(1, "description", product_decode.MISSING_FIELD)]
+        index.update([make_product(0, 0), dict(broken)])
+        assert "Description" not in caplog.text
+        assert (report.decoded, report.failed) == (1, 1)
+
+    def test_update_games_diffs_decoded_games(self):
+        """Test that already decoded games are compared with the previous poll."""
+        index = game_diff.FreeGamesIndex()
+        index.update([make_product(0, 0)])
+        game = product_decode.Game("Game 1", "", 0, "game-1", None)
+        assert kinds(index.update_games([game])) == [("added", "game-1"), ("removed", "game-0")]
+
+
+class TestMakeRequestWithDiffIndex:
+    """Test cases for process_response with a FreeGamesIndex."""
+
+    def test_changes_are_set_on_manager(self):
+        """Test that processing a response fills changes with the events of the poll."""
+
+        class FakeResponse:
+            ok = True
+            content = encode_payload(wrap_elements([make_product(0, 0)]))
+
+        manager = product_decode.EpicFreeGames(diff_index=game_diff.FreeGamesIndex())
+        manager.process_response(FakeResponse())
+        assert kinds(manager.changes) == [("added", "game-0")]
+        manager.process_response(FakeResponse())
+        assert manager.changes == []
+        assert [game.product_url for game in manager.free_games] == ["game-0"]
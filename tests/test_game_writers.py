@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+
+import game_writers
+import json_backend
+import product_decode
+import pytest
+
+
+def write_snapshot_file(tmp_path, games) -> str:
+    path = str(tmp_path / "games.snapshot")
+    with open(path, "wb") as output:
+        game_writers.write_snapshot(games, output)
+    return path
+
+
+class TestWriteJsonl:
+    """Test cases for the write_jsonl function."""
+
+    @pytest.mark.parametrize("backend", json_backend.AVAILABLE)
+    def test_every_game_is_a_json_line(self, backend, monkeypatch, detailed_games):
+        """Test that each game is written as one line of JSON with every field."""
+        monkeypatch.setattr(json_backend, "backend", backend)
+        stream = io.StringIO()
+        assert game_writers.write_jsonl(detailed_games, stream) == 2
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert records[0]["description"] == "Line one\nline two"
+        assert records[0]["upcoming_windows"] == [[300, 400, 50]]
+        assert records[1]["title"] == "Café ☕"
+        assert records[1]["thumbnail_url"] is None
+
+    def test_chunks_are_written_together(self, monkeypatch, detailed_games):
+        """Test that lines are written in chunks of WRITE_CHUNK rather than one by one."""
+        monkeypatch.setattr(game_writers, "WRITE_CHUNK", 2)
+        writes = []
+
+        class Stream:
+            def write(self, text: str) -> None:
+                writes.append(text)
+
+        assert game_writers.write_jsonl(detailed_games * 2 + detailed_games[:1], Stream()) == 5
+        assert [text.count("\n") for text in writes] == [2, 2, 1]
+
+
+class TestWriteCsv:
+    """Test cases for the write_csv function."""
+
+    def test_rows_follow_header(self, detailed_games):
+        """Test that a header row is followed by one row per game, with special characters quoted."""
+        stream = io.StringIO(newline="")
+        assert game_writers.write_csv(detailed_games, stream) == 2
+        rows = list(csv.reader(io.StringIO(stream.getvalue(), newline="")))
+        assert tuple(rows[0]) == game_writers.CSV_FIELDS
+        assert rows[1][:4] == ["Free, \"quoted\"", "Line one\nline two", "0", "1999"]
+        assert rows[2][6] == ""
+
+
+class TestGameSnapshot:
+    """Test cases for writing and mapping binary snapshots."""
+
+    def test_games_round_trip(self, tmp_path, detailed_games):
+        """Test that every field of every game is read back from the snapshot."""
+        games = detailed_games
+        with game_writers.GameSnapshot(write_snapshot_file(tmp_path, games)) as snapshot:
+            assert len(snapshot) == 2
+            loaded = list(snapshot)
+        assert [game_writers.game_record(game) for game in loaded] == [game_writers.game_record(game) for game in games]
+
+    def test_to_batch_matches_written_batch(self, tmp_path, detailed_games):
+        """Test that loading a snapshot into a batch gives the same columns as the batch written."""
+        batch = product_decode.GameBatch.from_games(detailed_games)
+        with game_writers.GameSnapshot(write_snapshot_file(tmp_path, batch)) as snapshot:
+            assert snapshot.to_batch().to_columns() == batch.to_columns()
+
+    def test_repeated_strings_are_stored_once(self, tmp_path, detailed_games):
+        """Test that strings shared by games are stored once in the string table."""
+        with game_writers.GameSnapshot(write_snapshot_file(tmp_path, detailed_games * 10)) as snapshot:
+            assert len(snapshot) == 20
+            assert snapshot.string_count == len(set(snapshot.strings()))
+
+    def test_empty_snapshot_loads(self, tmp_path):
+        """Test that a snapshot of no games loads as an empty batch."""
+        with game_writers.GameSnapshot(write_snapshot_file(tmp_path, [])) as snapshot:
+            assert len(snapshot.to_batch()) == 0
+
+    def test_invalid_file_raises_exception(self, tmp_path):
+        """Test that a file which is not a snapshot raises a ProductDecodeException."""
+        path = tmp_path / "games.snapshot"
+        path.write_bytes(b"not a snapshot")
+        with pytest.raises(product_decode.ProductDecodeException):
+            game_writers.GameSnapshot(str(path))
+
+
+class TestWriteGames:
+    """Test cases for the write_games function."""
+
+    def test_unknown_format_raises_error(self, detailed_games):
+        """Test that an unsupported format raises a ValueError."""
+        with pytest.raises(ValueError):
+            game_writers.write_games(detailed_games, "xml", io.StringIO())
+
+    def test_text_matches_display(self, capsys, detailed_games):
+        """Test that the text format prints the same as Game.display."""
+        stream = io.StringIO()
+        game_writers.write_games(detailed_games, "text", stream)
+        for game in detailed_games:
+            game.display()
+        assert stream.getvalue() == capsys.readouterr().out
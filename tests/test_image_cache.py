@@ -0,0 +1,86 @@
+import os
+import sys
+
+import image_cache
+import product_decode
+from benchmarks.stub_server import StubPromotionsServer
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+
+
+def games_with_thumbnails(base_url: str, count: int) -> list[product_decode.Game]:
+    return [product_decode.Game(f"Game {i}", "", 0, f"game-{i}", f"{base_url}?image={i}") for i in range(count)]
+
+
+def count_objects(cache: image_cache.ImageCache) -> int:
+    return sum(len(files) for _, _, files in os.walk(os.path.join(cache.directory, "objects")))
+
+
+class TestImageCache:
+    """Test cases for the ImageCache class."""
+
+    def test_missing_url_returns_none(self, make_image_cache):
+        """Test that an empty cache has no images."""
+        cache = make_image_cache()
+        assert cache.get("url") is None
+        assert cache.path_for("url") is None
+
+    def test_stored_image_is_returned(self, make_image_cache):
+        """Test that a stored image is read back from disk."""
+        cache = make_image_cache()
+        path = cache.put("url", IMAGE)
+        assert cache.get("url") == IMAGE
+        assert cache.path_for("url") == path
+
+    def test_same_content_is_stored_once(self, make_image_cache):
+        """Test that identical images from different URLs share one file."""
+        cache = make_image_cache()
+        assert cache.put("url-1", IMAGE) == cache.put("url-2", IMAGE)
+        assert count_objects(cache) == 1
+
+    def test_least_recently_used_images_are_evicted(self, make_image_cache):
+        """Test that going over max_bytes deletes the least recently used image."""
+        cache = make_image_cache(max_bytes=(len(IMAGE) + 1) * 2)
+        cache.put("url-1", IMAGE + b"1")
+        cache.put("url-2", IMAGE + b"2")
+        cache.get("url-1")
+        cache.put("url-3", IMAGE + b"3")
+        assert cache.path_for("url-2") is None
+        assert cache.get("url-1") == IMAGE + b"1"
+        assert cache.get("url-3") == IMAGE + b"3"
+
+    def test_variant_without_pillow_returns_none(self, monkeypatch, make_image_cache):
+        """Test that asking for a resized image without Pillow installed returns None."""
+        monkeypatch.setitem(sys.modules, "PIL", None)
+        cache = make_image_cache()
+        cache.put("url", IMAGE)
+        assert cache.variant("url", 64, 64) is None
+
+
+class TestPrefetchImages:
+    """Test cases for the prefetch_images function."""
+
+    def test_images_are_downloaded_once(self, make_image_cache):
+        """Test that images are downloaded on the first prefetch and served from disk afterwards."""
+        cache = make_image_cache()
+        with StubPromotionsServer(IMAGE) as server:
+            games = games_with_thumbnails(server.base_url, 3)
+            paths = image_cache.prefetch_images(games + games, cache)
+            assert server.request_count == 3
+            assert image_cache.prefetch_images(games, cache) == paths
+            assert server.request_count == 3
+        assert cache.get(games[0].thumbnail_url) == IMAGE
+
+    def test_failed_downloads_are_skipped(self, caplog, make_image_cache):
+        """Test that an unreachable image is logged and left out of the result."""
+        cache = make_image_cache()
+        games = games_with_thumbnails("http://127.0.0.1:9/missing", 1)
+        assert image_cache.prefetch_images(games, cache, timeout=1) == {}
+        assert "failed with" in caplog.text
+
+    def test_other_key_image_types_are_used(self):
+        """Test that image_urls picks the given keyImages type and drops duplicates."""
+        games = [product_decode.Game("Game", "", 0, "game", "thumb", images={"Thumbnail": "thumb", "OfferImageWide": "wide"}),
+                 product_decode.Game("Copy", "", 0, "copy", "thumb", images={"OfferImageWide": "wide"})]
+        assert image_cache.image_urls(games, "OfferImageWide") == ["wide"]
+        assert image_cache.image_urls(games) == ["thumb"]
@@ -0,0 +1,74 @@
+import io
+import json
+
+import instrumentation
+import product_decode
+import pytest
+from benchmarks.payloads import make_payload
+
+
+@pytest.fixture
+def stats():
+    sink = instrumentation.StatsSink()
+    instrumentation.enable(sink)
+    yield sink
+    instrumentation.disable()
+
+
+class TestStatsSink:
+    """Test cases for the StatsSink class."""
+
+    def test_stage_times_are_aggregated(self, stats):
+        """Test that each stage keeps its call count, total and maximum."""
+        instrumentation.current.record("fetch", 0.5)
+        instrumentation.current.record("fetch", 1.5)
+        assert stats.stages["fetch"].count == 2
+        assert stats.stages["fetch"].total == 2.0
+        assert stats.stages["fetch"].max == 1.5
+
+    def test_prometheus_output_escapes_labels(self, stats):
+        """Test that counters are written as Prometheus counters with escaped labels."""
+        instrumentation.current.count("decode_failures", 'URL: "x" is invalid')
+        assert 'epic_decode_failures_total{reason="URL: \\"x\\" is invalid"} 1' in stats.prometheus()
+
+    def test_breakdown_lists_stages_and_counters(self, stats):
+        """Test that the breakdown table has a row per stage and counter."""
+        with instrumentation.current.stage("json_decode"):
+            pass
+        instrumentation.current.count("decode_failures", "Title value is invalid", 2)
+        breakdown = stats.breakdown()
+        assert "json_decode" in breakdown
+        assert "decode_failures [Title value is invalid]: 2" in breakdown
+
+
+class TestDecodeInstrumentation:
+    """Test cases for the instrumentation of the decode path."""
+
+    def test_decode_stages_and_failures_are_recorded(self, stats):
+        """Test that decoding records per field group timings and counts failures by message."""
+        products = make_payload(3, free_every=1)["data"]["Catalog"]["searchStore"]["elements"] + [{"title": 2}, {"title": 3}]
+        product_decode.EpicFreeGames.process_products(products)
+        assert stats.stages["decode.required_fields"].count == 3
+        assert stats.stages["decode.promotion"].count == 3
+        assert stats.counters[("decode_failures", "Title value is invalid")] == 2
+
+    def test_disabled_instrumentation_records_nothing(self):
+        """Test that the default instrumentation ignores everything it is given."""
+        assert not instrumentation.current.enabled
+        with instrumentation.current.stage("fetch"):
+            instrumentation.current.count("decode_failures")
+        assert instrumentation.current.lap_timer() is None
+
+
+class TestJsonLinesSink:
+    """Test cases for the JsonLinesSink class."""
+
+    def test_events_are_written_as_json_lines(self):
+        """Test that every timing and counter is written as its own JSON line."""
+        stream = io.StringIO()
+        recorder = instrumentation.Instrumentation(instrumentation.JsonLinesSink(stream))
+        recorder.record("fetch", 0.25)
+        recorder.count("decode_failures", "Price data malformed")
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert lines == [{"stage": "fetch", "seconds": 0.25},
+                         {"counter": "decode_failures", "label": "Price data malformed", "amount": 1}]
@@ -0,0 +1,80 @@
+import json_backend
+import product_decode
+import pytest
+from benchmarks.payloads import encode_payload, make_payload
+
+
+@pytest.fixture(params=json_backend.AVAILABLE)
+def backend(request):
+    """Run a test once with every installed JSON backend."""
+    previous = json_backend.backend
+    json_backend.use(request.param)
+    yield request.param
+    json_backend.use(previous)
+
+
+class FakeResponse:
+    ok = True
+
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+
+
+class TestJsonBackend:
+    """Test cases for the json_backend module."""
+
+    def test_unknown_backend_raises_error(self):
+        """Test that selecting a backend that is not installed raises a ValueError."""
+        with pytest.raises(ValueError):
+            json_backend.use("yaml")
+
+    def test_loads_decodes_document(self, backend):
+        """Test that every backend decodes a document into plain dicts and lists."""
+        assert json_backend.loads(b'{"a": [1, "b", null]}') == {"a": [1, "b", None]}
+
+    def test_dumps_round_trips(self, backend):
+        """Test that encoded JSON decodes back to the same value."""
+        value = {"title": "Café", "windows": [[1, 2, 0]], "thumbnail": None}
+        assert json_backend.loads(json_backend.dumps(value)) == value
+
+    def test_invalid_json_raises_decode_error(self, backend):
+        """Test that every backend reports malformed JSON as one of DECODE_ERRORS."""
+        with pytest.raises(json_backend.DECODE_ERRORS):
+            json_backend.loads(b'{"a": ')
+
+
+class TestGetProductsFromPayload:
+    """Test cases for the get_products_from_payload function."""
+
+    def test_products_are_returned(self, backend):
+        """Test that the elements list is decoded as plain dicts."""
+        payload = make_payload(3)
+        products = product_decode.EpicFreeGames.get_products_from_payload(encode_payload(payload))
+        assert products == payload["data"]["Catalog"]["searchStore"]["elements"]
+
+    def test_missing_field_raises_exception(self, backend):
+        """Test that a payload without the elements path raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            product_decode.EpicFreeGames.get_products_from_payload(b'{"data": {"Catalog": null}}')
+
+    def test_invalid_elements_type_raises_exception(self, backend):
+        """Test that elements which are not a list raise a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            product_decode.EpicFreeGames.get_products_from_payload(b'{"data": {"Catalog": {"searchStore": {"elements": 0}}}}')
+
+
+class TestProcessResponse:
+    """Test cases for process_response with each JSON backend."""
+
+    def test_free_games_are_decoded(self, backend):
+        """Test that a valid response gives the free games."""
+        manager = product_decode.EpicFreeGames()
+        assert manager.process_response(FakeResponse(encode_payload(make_payload(8))))
+        assert [game.title for game in manager.free_games] == ["Game 0", "Game 4"]
+
+    def test_invalid_json_is_reported(self, backend, caplog):
+        """Test that malformed JSON is logged as a warning and leaves the free games unchanged."""
+        manager = product_decode.EpicFreeGames()
+        assert not manager.process_response(FakeResponse(b'{"data": '))
+        assert manager.free_games == []
+        assert "Convert to json failed" in caplog.text
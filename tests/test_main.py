@@ -0,0 +1,88 @@
+import json
+import os
+import subprocess
+import sys
+
+import game_writers
+from benchmarks.payloads import RECORDED_PAYLOAD_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Prints the modules loaded by running main.py on a saved payload, after its own output
+LOADED_MODULES_SCRIPT = """
+import runpy, sys
+sys.argv = ["main.py", "--from-file", sys.argv[1]]
+runpy.run_path("main.py", run_name="__main__")
+print(",".join(sorted(sys.modules)))
+"""
+
+
+def run_main(*args: str, stdin: (bytes | None) = None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, input=stdin, capture_output=True, check=True)
+
+
+class TestFromFile:
+    """Test cases for decoding a saved payload with main.py --from-file."""
+
+    def test_saved_payload_displays_free_games(self):
+        """Test that the free games in a saved payload are displayed."""
+        output = run_main("main.py", "--from-file", RECORDED_PAYLOAD_PATH).stdout.decode()
+        assert "Product page: lantern-keepers" in output
+        assert "Product page: orbital-foundry" in output
+
+    def test_dash_reads_payload_from_stdin(self):
+        """Test that a path of - reads the payload from stdin."""
+        with open(RECORDED_PAYLOAD_PATH, "rb") as payload_file:
+            output = run_main("main.py", "--from-file", "-", stdin=payload_file.read()).stdout.decode()
+        assert "Product page: lantern-keepers" in output
+
+    def test_missing_file_is_a_usage_error(self):
+        """Test that an unreadable file exits with a usage error instead of a traceback."""
+        result = subprocess.run([sys.executable, "main.py", "--from-file", os.path.join(ROOT, "missing.json")],
+                                cwd=ROOT, capture_output=True)
+        assert result.returncode == 2
+        assert "cannot read --from-file" in result.stderr.decode()
+        assert "Traceback" not in result.stderr.decode()
+
+    def test_cache_options_are_rejected(self):
+        """Test that --cache and --no-cache cannot be combined with --from-file."""
+        for option in (["--cache", "cache.db"], ["--no-cache"]):
+            result = subprocess.run([sys.executable, "main.py", "--from-file", RECORDED_PAYLOAD_PATH, *option],
+                                    cwd=ROOT, capture_output=True)
+            assert result.returncode == 2
+            assert "cannot be used with --from-file" in result.stderr.decode()
+
+    def test_network_and_optional_modules_are_not_imported(self):
+        """Test that decoding a saved payload never imports requests, sqlite3, NumPy or a JSON backend."""
+        output = run_main("-c", LOADED_MODULES_SCRIPT, RECORDED_PAYLOAD_PATH).stdout.decode()
+        loaded = set(output.splitlines()[-1].split(","))
+        assert not loaded & {"requests", "urllib3", "sqlite3", "numpy", "orjson", "simdjson"}
+
+
+class TestDecodeReport:
+    """Test cases for the --decode-report option of main.py."""
+
+    def test_report_is_printed_to_stderr(self):
+        """Test that the decode report of a saved payload is printed as JSON after the logs."""
+        result = run_main("main.py", "--from-file", RECORDED_PAYLOAD_PATH, "--decode-report")
+        report = json.loads(result.stderr.decode().splitlines()[-1])
+        assert (report["total"], report["failed"]) == (6, 1)
+        assert report["failures"] == [{"index": 2, "field": "offerMappings[0].pageSlug", "reason": "empty_list"}]
+        assert "Product page: lantern-keepers" in result.stdout.decode()
+
+
+class TestOutputFormat:
+    """Test cases for the --format and --output options of main.py."""
+
+    def test_jsonl_is_written_to_output_file(self, tmp_path):
+        """Test that the free games are written as JSON Lines to the output file."""
+        output = tmp_path / "games.jsonl"
+        run_main("main.py", "--from-file", RECORDED_PAYLOAD_PATH, "--format", "jsonl", "--output", str(output))
+        lines = output.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["product_url"] for line in lines] == ["lantern-keepers", "orbital-foundry"]
+
+    def test_snapshot_written_to_stdout_can_be_mapped(self, tmp_path):
+        """Test that a snapshot written to stdout loads with GameSnapshot."""
+        output = tmp_path / "games.snapshot"
+        output.write_bytes(run_main("main.py", "--from-file", RECORDED_PAYLOAD_PATH, "--format", "snapshot").stdout)
+        with game_writers.GameSnapshot(str(output)) as snapshot:
+            assert [game.product_url for game in snapshot] == ["lantern-keepers", "orbital-foundry"]
@@ -0,0 +1,110 @@
+import logging
+
+import parallel_decode
+import product_decode
+import pytest
+from benchmarks.payloads import encode_payload, make_payload
+
+
+@pytest.fixture(scope="module")
+def decoder():
+    with parallel_decode.ParallelDecoder(threshold_bytes=0, max_workers=2) as parallel_decoder:
+        yield parallel_decoder
+
+
+def make_products(count: int, malformed_ratio: float = 0.0) -> list:
+    return make_payload(count, malformed_ratio=malformed_ratio)["data"]["Catalog"]["searchStore"]["elements"]
+
+
+class TestParallelDecoder:
+    """Test cases for the ParallelDecoder class."""
+
+    def test_invalid_data_type_raises_exception(self, decoder):
+        """Test that passing an invalid data type raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            decoder.process_products(None)
+
+    def test_empty_list_returns_empty_list(self, decoder):
+        """Tests that passing an empty list of products returns an empty list"""
+        assert decoder.process_products([]) == []
+        assert decoder.process_payload(encode_payload(make_payload(0))) == []
+
+    def test_results_match_serial_decode(self, decoder):
+        """Test that the parallel decode returns the same free games in the same order."""
+        payload = make_payload(50, malformed_ratio=0.3)
+        serial = product_decode.EpicFreeGames.process_products(product_decode.EpicFreeGames.get_products_from_response(payload))
+        parallel = decoder.process_payload(encode_payload(payload))
+        assert [game.product_url for game in parallel] == [game.product_url for game in serial]
+        assert [game.promotion_end for game in parallel] == [game.promotion_end for game in serial]
+
+    def test_errors_are_logged_in_serial_order(self, decoder, caplog):
+        """Test that decode errors are logged in the same order as the serial decode."""
+        payload = make_payload(50, malformed_ratio=0.3)
+        with caplog.at_level(logging.ERROR):
+            product_decode.EpicFreeGames.process_products(product_decode.EpicFreeGames.get_products_from_response(payload))
+            serial_messages = [record.getMessage() for record in caplog.records]
+            caplog.clear()
+            decoder.process_payload(encode_payload(payload))
+            parallel_messages = [record.getMessage() for record in caplog.records]
+        assert serial_messages
+        assert parallel_messages == serial_messages
+
+    def test_report_matches_serial_report(self, decoder, monkeypatch):
+        """Test that the reports of the workers are merged into the report of the serial decode."""
+        monkeypatch.setattr(product_decode, "decode_summary_limiter", product_decode.LogRateLimiter(0))
+        payload = make_payload(50, malformed_ratio=0.3)
+        serial_games, serial = product_decode.EpicFreeGames.process_products_with_report(
+            product_decode.EpicFreeGames.get_products_from_response(payload))
+        parallel_games, parallel = decoder.process_payload_with_report(encode_payload(payload))
+        assert [game.product_url for game in parallel_games] == [game.product_url for game in serial_games]
+        assert serial.failures
+        assert parallel.failures == serial.failures
+        assert parallel.counts == serial.counts
+        assert parallel.decoded == serial.decoded
+
+    def test_invalid_payloads_raise_like_the_serial_decode(self, decoder):
+        """Test that invalid JSON, data after the document and a missing elements list raise like the serial decode."""
+        with pytest.raises(ValueError):
+            decoder.process_payload(b"{not json")
+        with pytest.raises(ValueError):
+            decoder.process_payload(encode_payload(make_payload(20)) + b"{}")
+        with pytest.raises(product_decode.ProductDecodeException):
+            decoder.process_payload(b'{"data": {}}')
+
+    def test_workers_parse_only_their_range(self, decoder, monkeypatch):
+        """Test that a splittable body is never parsed whole, and each worker range holds whole elements."""
+        payload = encode_payload(make_payload(50))
+        monkeypatch.setattr(product_decode.EpicFreeGames, "get_products_from_payload", None)
+        assert len(decoder.process_payload(payload)) == 13
+        [point] = parallel_decode._split_points(payload, 2)
+        first = parallel_decode._parse_range(payload[:point].decode(), True, False)
+        second = parallel_decode._parse_range(payload[point:].decode(), False, True)
+        assert first + second == make_products(50)
+
+    def test_ranges_not_split_between_elements_are_decoded_serially(self, decoder, monkeypatch):
+        """Test that a split point inside an element, or a repeated elements key, falls back to the serial decode."""
+        payload = encode_payload(make_payload(50, malformed_ratio=0.3))
+        [point] = parallel_decode._split_points(payload, 2)
+        serial = [game.product_url for game in product_decode.EpicFreeGames.process_products(make_products(50, 0.3))]
+        monkeypatch.setattr(parallel_decode, "_split_points", lambda data, parts: [point + 5])
+        assert [game.product_url for game in decoder.process_payload(payload)] == serial
+        monkeypatch.undo()
+        repeated = payload.replace(b"]}}}", b'], "elements": []}}}', 1)
+        assert decoder.process_payload(repeated) == []
+
+    def test_small_payloads_are_decoded_serially(self, monkeypatch):
+        """Test that payloads below the threshold never reach the process pool."""
+        small_decoder = parallel_decode.ParallelDecoder(threshold_bytes=1 << 20, max_workers=2)
+        monkeypatch.setattr(small_decoder, "_get_executor", None)
+        assert len(small_decoder.process_payload(encode_payload(make_payload(8)))) == 2
+
+    def test_manager_uses_decoder(self, decoder):
+        """Test that a manager given a decoder decodes responses with it."""
+
+        class FakeResponse:
+            ok = True
+            content = encode_payload(make_payload(12))
+
+        manager = product_decode.EpicFreeGames(decoder=decoder)
+        assert manager.process_response(FakeResponse())
+        assert [game.title for game in manager.free_games] == ["Game 0", "Game 4", "Game 8"]
@@ -1,5 +1,6 @@
 import pytest
 import product_decode
+from benchmarks.payloads import encode_payload, load_recorded_payload, make_payload, scale_payload
 
 
 class TestGetTitleOfProduct:
@@ -113,6 +114,13 @@ class TestGetProductThumbnail:
         assert product_decode.EpicFreeGames().get_thumbnail_of_product(
             sample_data) is None
 
+    def test_malformed_entries_are_skipped(self):
+        """Test that entries without a url, with an unhashable type or that are not objects do not hide the thumbnail."""
+        sample_data = {"keyImages": [
+            {"type": "Image"}, {"type": ["Image"], "url": "list"}, "entry", {"type": "Thumbnail", "url": "valid"}]}
+        assert product_decode.EpicFreeGames().get_thumbnail_of_product(sample_data) == "valid"
+        assert product_decode.EpicFreeGames.get_images_of_product(sample_data) == {"Thumbnail": "valid"}
+
 
 class TestProductURL:
     """Test cases for the get_product_url function."""
@@ -265,6 +273,122 @@ class TestProcessProducts:
         free_games = product_decode.EpicFreeGames().process_products([])
         assert len(free_games) == 0
 
+    def test_prices_beyond_64_bits_do_not_crash(self):
+        """Test that a price too large for a 64 bit column fails that product alone and a large original price is dropped."""
+        valid = {"title": "title", "description": "description", "price": {"totalPrice": {"discountPrice": 0}},
+                 "offerMappings": [{"pageSlug": "url"}]}
+        huge_price = {**valid, "price": {"totalPrice": {"discountPrice": 2 ** 63}}}
+        huge_original = {**valid, "price": {"totalPrice": {"discountPrice": 0, "originalPrice": 2 ** 64}}}
+        free_games = product_decode.EpicFreeGames().process_products([huge_price, huge_original])
+        assert [game.price for game in free_games] == [0]
+        assert product_decode.EpicFreeGames.extract_product_fields(huge_original)[5] is None
+        with pytest.raises(product_decode.ProductDecodeException, match="Price data malformed"):
+            product_decode.EpicFreeGames.extract_product_fields(huge_price)
+
+
+class TestDecodeReport:
+    """Test cases for decoding with a DecodeReport."""
+
+    @pytest.fixture(autouse=True)
+    def limiter(self, monkeypatch):
+        limiter = product_decode.LogRateLimiter(60, clock=lambda: 1000.0)
+        monkeypatch.setattr(product_decode, "decode_summary_limiter", limiter)
+        return limiter
+
+    def test_failures_are_recorded_by_field_and_reason(self):
+        """Test that each malformed element is recorded with its index, field path and reason code."""
+        products = make_payload(8, malformed_ratio=0.5, seed=1)["data"]["Catalog"]["searchStore"]["elements"]
+        products.append({"title": "title", "description": "description", "price": {"totalPrice": {"discountPrice": 0}},
+                         "offerMappings": [{"pageSlug": "url"}], "keyImages": None})
+        free_games, report = product_decode.EpicFreeGames.process_products_with_report(products)
+        expected = product_decode.EpicFreeGames.process_products(products)
+        assert [game.product_url for game in free_games] == [game.product_url for game in expected]
+        assert report.total == 9
+        assert report.decoded == len(products) - report.failed
+        reasons = {(field_path, reason) for _, field_path, reason in report.failures}
+        assert ("keyImages", product_decode.NOT_A_CONTAINER) in reasons
+        assert report.failures[-1] == (8, "keyImages", product_decode.NOT_A_CONTAINER)
+        assert sum(report.counts.values()) == len(report.failures)
+
+    def test_reason_codes(self):
+        """Test that each kind of malformed element gets its own reason code."""
+        valid = {"title": "title", "description": "description", "price": {"totalPrice": {"discountPrice": 0}},
+                 "offerMappings": [{"pageSlug": "url"}]}
+        products = [None, {**valid, "offerMappings": []}, {**valid, "price": {"totalPrice": {"discountPrice": 0.0}}},
+                    {key: value for key, value in valid.items() if key != "description"}, {**valid, "offerMappings": None}]
+        _, report = product_decode.EpicFreeGames.process_products_with_report(products)
+        assert report.failures == [
+            (0, "", product_decode.NOT_A_PRODUCT),
+            (1, "offerMappings[0].pageSlug", product_decode.EMPTY_LIST),
+            (2, "price.totalPrice.discountPrice", product_decode.WRONG_TYPE),
+            (3, "description", product_decode.MISSING_FIELD),
+            (4, "offerMappings[0].pageSlug", product_decode.NOT_A_CONTAINER)
+        ]
+
+    def test_failures_are_not_logged_one_by_one(self, caplog):
+        """Test that a report logs one summary warning instead of an error per element."""
+        with caplog.at_level("INFO"):
+            product_decode.EpicFreeGames.process_products_with_report([None] * 10)
+        assert [record.levelname for record in caplog.records] == ["WARNING"]
+        assert "10 of 10 products failed to decode (element not_a_product: 10)" in caplog.text
+
+    def test_summaries_are_rate_limited(self, limiter, caplog):
+        """Test that summaries within the limiter interval are held back and then counted."""
+        for _ in range(3):
+            product_decode.EpicFreeGames.process_products_with_report([None])
+        limiter.clock = lambda: 1060.0
+        product_decode.EpicFreeGames.process_products_with_report([None])
+        messages = [record.getMessage() for record in caplog.records]
+        assert len(messages) == 2
+        assert messages[1].endswith("2 earlier summaries were not logged")
+
+    def test_manager_keeps_last_report(self):
+        """Test that a manager created with decode_report keeps the report of its last decode."""
+        payload = encode_payload(make_payload(8, malformed_ratio=0.5, seed=1))
+        manager = product_decode.EpicFreeGames(decode_report=True)
+        assert manager.process_payload(payload)
+        _, expected = product_decode.EpicFreeGames.process_products_with_report(
+            product_decode.EpicFreeGames.get_products_from_payload(payload))
+        assert manager.last_report.failures == expected.failures
+        assert product_decode.EpicFreeGames().last_report is None
+
+    def test_merge_keeps_max_records(self):
+        """Test that merging reports adds their counts and keeps at most max_records failures."""
+        report = product_decode.DecodeReport(max_records=2)
+        other = product_decode.DecodeReport()
+        other.decoded = 4
+        for index in range(3):
+            other.add(index, "title", product_decode.MISSING_FIELD)
+        report.merge(other)
+        assert report.failures == [(0, "title", "missing_field"), (1, "title", "missing_field")]
+        assert (report.decoded, report.failed) == (4, 3)
+
+    def test_records_are_capped(self):
+        """Test that failures beyond max_records are counted but not kept."""
+        report = product_decode.DecodeReport(max_records=2)
+        for index in range(5):
+            report.add(index, "title", product_decode.MISSING_FIELD)
+        assert len(report.failures) == 2
+        assert report.failed == 5
+
+    def test_to_dict(self):
+        """Test that the report serializes its reasons and records."""
+        report = product_decode.DecodeReport()
+        report.decoded = 1
+        report.add(3, "title", product_decode.WRONG_TYPE)
+        assert report.to_dict() == {
+            "total": 2, "failed": 1,
+            "reasons": [{"field": "title", "reason": "wrong_type", "count": 1}],
+            "failures": [{"index": 3, "field": "title", "reason": "wrong_type"}]
+        }
+
+    def test_extract_product_fields_messages_are_unchanged(self):
+        """Test that the exceptions raised without a report keep their messages."""
+        with pytest.raises(product_decode.ProductDecodeException, match="URL: 5 is invalid"):
+            product_decode.EpicFreeGames.extract_product_fields(
+                {"title": "t", "description": "d", "price": {"totalPrice": {"discountPrice": 0}},
+                 "offerMappings": [{"pageSlug": 5}]})
+
 
 class TestGetProductsFromResponse:
     """Test cases for the get_products_from_response function."""
@@ -312,3 +436,223 @@ class TestGetProductsFromResponse:
         products = product_decode.EpicFreeGames().get_products_from_response(raw_data)
         assert isinstance(products, list)
         assert len(products) == 2
+
+
+class TestExtractProductFields:
+    """Test cases for the extract_product_fields function."""
+
+    def test_valid_product_returns_fields_in_game_order(self):
+        """Test that a valid product returns every Game field, with no original price or promotion."""
+        test_valid_product = {
+            "title": "title",
+            "description": "description",
+            "price": {"totalPrice": {"discountPrice": 1000}},
+            "offerMappings": [{"pageSlug": "url1"}],
+            "keyImages": [{"type": "Thumbnail", "url": "valid"}]
+        }
+        assert product_decode.EpicFreeGames.extract_product_fields(test_valid_product) == (
+            "title", "description", 1000, "url1", "valid", None, None, None, None, None, (), (), {"Thumbnail": "valid"})
+
+    def test_promotion_windows_prices_and_images_are_extracted(self):
+        """Test that the original price, currency, every promotion window and every image type are extracted."""
+        product = {
+            "title": "title",
+            "description": "description",
+            "price": {"totalPrice": {"discountPrice": 0, "originalPrice": 1999, "currencyCode": "GBP"}},
+            "offerMappings": [{"pageSlug": "url1"}],
+            "keyImages": [{"type": "OfferImageWide", "url": "wide"}, {"type": "Thumbnail", "url": "thumb"}],
+            "promotions": {
+                "promotionalOffers": TestGetPromotionOfProduct.make_offers(
+                    "2024-01-04T16:00:00.000Z", "2024-01-11T16:00:00.000Z", 0),
+                "upcomingPromotionalOffers": TestGetPromotionOfProduct.make_offers(
+                    "2024-01-11T16:00:00.000Z", "2024-01-18T16:00:00.000Z", 50)}
+        }
+        assert product_decode.EpicFreeGames.extract_product_fields(product) == (
+            "title", "description", 0, "url1", "thumb", 1999, 1704384000, 1704988800, 0, "GBP",
+            ((1704384000, 1704988800, 0),), ((1704988800, 1705593600, 50),), {"OfferImageWide": "wide", "Thumbnail": "thumb"})
+
+    def test_invalid_data_type_raises_exception(self):
+        """Test that passing an invalid data type raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException, match="Invalid product input"):
+            product_decode.EpicFreeGames.extract_product_fields(["title"])
+
+    def test_missing_product_page_matches_getter_message(self):
+        """Test that an empty offerMappings list raises the same error as get_product_url."""
+        product = {
+            "title": "title",
+            "description": "description",
+            "price": {"totalPrice": {"discountPrice": 0}},
+            "offerMappings": []
+        }
+        with pytest.raises(product_decode.ProductDecodeException, match="Could not find product page in product"):
+            product_decode.EpicFreeGames.extract_product_fields(product)
+
+    def test_invalid_url_includes_value(self):
+        """Test that an invalid pageSlug is reported with its value."""
+        product = {
+            "title": "title",
+            "description": "description",
+            "price": {"totalPrice": {"discountPrice": 0}},
+            "offerMappings": [{"pageSlug": 2}]
+        }
+        with pytest.raises(product_decode.ProductDecodeException, match="URL: 2 is invalid"):
+            product_decode.EpicFreeGames.extract_product_fields(product)
+
+
+class TestGetOriginalPriceOfProduct:
+    """Test cases for the get_original_price_of_product function."""
+
+    def test_invalid_data_type_raises_exception(self):
+        """Test that passing an invalid data type raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            product_decode.EpicFreeGames.get_original_price_of_product("Test")
+
+    def test_missing_field_returns_none(self):
+        """Test that a product without an originalPrice returns None."""
+        assert product_decode.EpicFreeGames.get_original_price_of_product(
+            {"price": {"totalPrice": {"discountPrice": 0}}}) is None
+
+    def test_valid_field_returns_price(self):
+        """Test that a valid originalPrice is returned."""
+        assert product_decode.EpicFreeGames.get_original_price_of_product(
+            {"price": {"totalPrice": {"discountPrice": 0, "originalPrice": 1999}}}) == 1999
+
+
+class TestGetPromotionOfProduct:
+    """Test cases for the get_promotion_of_product function."""
+
+    @staticmethod
+    def make_offers(start: str, end: str, discount: int) -> list:
+        return [{"promotionalOffers": [
+            {"startDate": start, "endDate": end, "discountSetting": {"discountPercentage": discount}}]}]
+
+    def test_invalid_data_type_raises_exception(self):
+        """Test that passing an invalid data type raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            product_decode.EpicFreeGames.get_promotion_of_product(None)
+
+    def test_no_promotions_returns_none(self):
+        """Test that a product with null promotions returns None."""
+        assert product_decode.EpicFreeGames.get_promotion_of_product({"promotions": None}) is None
+
+    def test_current_promotion_is_preferred(self):
+        """Test that the current promotion is returned before an upcoming one."""
+        product = {"promotions": {
+            "promotionalOffers": self.make_offers("2024-01-04T16:00:00.000Z", "2024-01-11T16:00:00.000Z", 0),
+            "upcomingPromotionalOffers": self.make_offers("2024-01-11T16:00:00.000Z", "2024-01-18T16:00:00.000Z", 50)}}
+        assert product_decode.EpicFreeGames.get_promotion_of_product(product) == (1704384000, 1704988800, 0)
+
+    def test_upcoming_promotion_is_used_when_none_current(self):
+        """Test that the upcoming promotion is returned when nothing is on offer now."""
+        product = {"promotions": {
+            "promotionalOffers": [],
+            "upcomingPromotionalOffers": self.make_offers("2024-01-11T16:00:00.000Z", "2024-01-18T16:00:00.000Z", 0)}}
+        assert product_decode.EpicFreeGames.get_promotion_of_product(product) == (1704988800, 1705593600, 0)
+
+    def test_invalid_timestamp_returns_none(self):
+        """Test that a promotion with an unreadable date is ignored."""
+        product = {"promotions": {
+            "promotionalOffers": self.make_offers("soon", "2024-01-11T16:00:00.000Z", 0),
+            "upcomingPromotionalOffers": []}}
+        assert product_decode.EpicFreeGames.get_promotion_of_product(product) is None
+
+
+class TestGetPromotionWindowsOfProduct:
+    """Test cases for the get_promotion_windows_of_product function."""
+
+    def test_invalid_data_type_raises_exception(self):
+        """Test that passing an invalid data type raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            product_decode.EpicFreeGames.get_promotion_windows_of_product("promotions")
+
+    def test_no_promotions_returns_empty_windows(self):
+        """Test that a product with null promotions has no current or upcoming windows."""
+        assert product_decode.EpicFreeGames.get_promotion_windows_of_product({"promotions": None}) == ((), ())
+
+    def test_every_offer_is_returned(self):
+        """Test that every offer of every group is returned, current and upcoming kept apart."""
+        offers = (TestGetPromotionOfProduct.make_offers("2024-01-04T16:00:00.000Z", "2024-01-11T16:00:00.000Z", 0)
+                  + TestGetPromotionOfProduct.make_offers("2024-01-05T16:00:00.000Z", "2024-01-06T16:00:00.000Z", 25))
+        product = {"promotions": {"promotionalOffers": offers, "upcomingPromotionalOffers": []}}
+        assert product_decode.EpicFreeGames.get_promotion_windows_of_product(product) == (
+            ((1704384000, 1704988800, 0), (1704470400, 1704556800, 25)), ())
+
+    def test_unreadable_offers_leave_only_their_list_empty(self):
+        """Test that an invalid upcoming offer does not drop the current ones."""
+        product = {"promotions": {
+            "promotionalOffers": TestGetPromotionOfProduct.make_offers("2024-01-04T16:00:00.000Z", "2024-01-11T16:00:00.000Z", 0),
+            "upcomingPromotionalOffers": [{"promotionalOffers": [{"startDate": "2024-01-11T16:00:00.000Z"}]}]}}
+        assert product_decode.EpicFreeGames.get_promotion_windows_of_product(product) == (
+            ((1704384000, 1704988800, 0),), ())
+
+
+class TestGetCurrencyOfProduct:
+    """Test cases for the get_currency_of_product function."""
+
+    def test_invalid_data_type_raises_exception(self):
+        """Test that passing an invalid data type raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            product_decode.EpicFreeGames.get_currency_of_product(None)
+
+    def test_missing_field_returns_none(self):
+        """Test that a product without a currency code returns None."""
+        assert product_decode.EpicFreeGames.get_currency_of_product({"price": {"totalPrice": {}}}) is None
+
+    def test_valid_field_returns_code(self):
+        """Test that the currency code of the total price is returned."""
+        product = {"price": {"totalPrice": {"currencyCode": "GBP"}}}
+        assert product_decode.EpicFreeGames.get_currency_of_product(product) == "GBP"
+
+
+class TestGameFreeWindow:
+    """Test cases for telling currently free games from upcoming free ones."""
+
+    @staticmethod
+    def make_game() -> product_decode.Game:
+        return product_decode.Game("title", "description", 1999, "url", None, 1999,
+                                   promotion_windows=((100, 200, 50),), upcoming_windows=((300, 400, 0), (500, 600, 0)))
+
+    def test_free_window_contains_now(self):
+        """Test that the free window containing now is returned, ignoring discounted ones."""
+        assert self.make_game().free_window(350) == (300, 400, 0)
+        assert self.make_game().free_window(150) is None
+
+    def test_next_free_window_starts_after_now(self):
+        """Test that the earliest free window starting after now is returned."""
+        assert self.make_game().next_free_window(150) == (300, 400, 0)
+        assert self.make_game().next_free_window(350) == (500, 600, 0)
+        assert self.make_game().next_free_window(500) is None
+
+
+class TestExpiryFor:
+    """Test cases for the expiry_for function."""
+
+    def test_first_promotion_end_before_ttl(self):
+        """Test that the earliest promotion end inside the ttl is the expiry."""
+        games = [product_decode.Game("free", "description", 0, "url", None, 1999, 900, end, 0) for end in (1200, 1100)]
+        assert product_decode.expiry_for(games, 1000, 300) == 1100
+
+    def test_no_promotion_end_uses_ttl(self):
+        """Test that ended, missing or later promotion ends leave the expiry at now + ttl."""
+        games = [product_decode.Game("ended", "description", 0, "url", None, 1999, 900, 1000, 0),
+                 product_decode.Game("later", "description", 0, "url", None, 1999, 900, 1400, 0),
+                 product_decode.Game("none", "description", 1999, "url", None)]
+        assert product_decode.expiry_for(games, 1000, 300) == 1300
+        assert product_decode.expiry_for([], 1000, 300) == 1300
+
+
+class TestRecordedPayload:
+    """Test cases decoding the recorded promotions payload fixture."""
+
+    def test_recorded_payload_returns_current_free_games(self):
+        """Test that only the games free right now are returned, skipping the mystery placeholder."""
+        products = product_decode.EpicFreeGames.get_products_from_response(load_recorded_payload())
+        free_games = product_decode.EpicFreeGames.process_products(products)
+        assert [game.product_url for game in free_games] == ["lantern-keepers", "orbital-foundry"]
+
+    def test_scaled_payload_has_unique_slugs(self):
+        """Test that scaling the recorded payload gives every decodable copy its own slug."""
+        products = product_decode.EpicFreeGames.get_products_from_response(scale_payload(load_recorded_payload(), 60))
+        batch = product_decode.GameBatch.from_products(products)
+        assert len(products) == 60
+        assert len(set(batch.product_urls)) == len(batch) == 50
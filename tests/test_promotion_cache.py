@@ -0,0 +1,79 @@
+import product_decode
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import StubPromotionsServer
+
+
+class TestPromotionCache:
+    """Test cases for the PromotionCache class."""
+
+    def test_missing_url_returns_none(self, make_promotion_cache):
+        """Test that an empty cache has no games."""
+        assert make_promotion_cache().get("url") is None
+
+    def test_fresh_entry_returns_games(self, make_promotion_cache, promoted_games):
+        """Test that stored games are returned with all their fields."""
+        cache = make_promotion_cache()
+        cache.put("url", "hash", promoted_games)
+        games = cache.get("url")
+        assert [(game.title, game.price, game.promotion_end) for game in games] == [("free", 0, 1300)]
+
+    def test_entry_expires_at_promotion_end(self, clock, make_promotion_cache, promoted_games):
+        """Test that an entry expires when its promotion ends, before the default ttl."""
+        cache = make_promotion_cache()
+        cache.put("url", "hash", promoted_games)
+        clock.now = 1299
+        assert cache.get("url") is not None
+        clock.now = 1300
+        assert cache.get("url") is None
+
+    def test_expired_entry_is_found_by_hash(self, clock, make_promotion_cache, promoted_games):
+        """Test that an expired entry is still reused for an identical payload."""
+        cache = make_promotion_cache()
+        cache.put("url", "hash", promoted_games)
+        clock.now = 5000
+        assert cache.get_by_hash("url", "hash") is not None
+        assert cache.get_by_hash("url", "other") is None
+
+    def test_least_recently_used_entry_is_evicted(self, clock, make_promotion_cache):
+        """Test that the entry used longest ago is evicted once the cache is full."""
+        cache = make_promotion_cache(max_entries=2)
+        cache.put("first", "hash", [])
+        clock.now += 1
+        cache.put("second", "hash", [])
+        clock.now += 1
+        cache.get("first")
+        clock.now += 1
+        cache.put("third", "hash", [])
+        assert cache.get("first") == []
+        assert cache.get("second") is None
+        assert cache.get("third") == []
+
+    def test_cache_persists_on_disk(self, make_promotion_cache, promoted_games):
+        """Test that a new cache on the same file sees earlier entries."""
+        make_promotion_cache().put("url", "hash", promoted_games)
+        assert len(make_promotion_cache().get("url")) == 1
+
+
+class TestMakeRequestWithCache:
+    """Test cases for make_request with a PromotionCache."""
+
+    def test_warm_cache_skips_network(self, make_promotion_cache):
+        """Test that a second manager is served from the cache without a request."""
+        with StubPromotionsServer(encode_payload(make_payload(8))) as server:
+            first = product_decode.EpicFreeGames(base_url=server.base_url, cache=make_promotion_cache())
+            first.make_request()
+            second = product_decode.EpicFreeGames(base_url=server.base_url, cache=make_promotion_cache())
+            second.make_request()
+            assert server.request_count == 1
+        assert [game.title for game in second.free_games] == ["Game 0", "Game 4"]
+
+    def test_unchanged_payload_is_not_decoded_again(self, monkeypatch, clock, make_promotion_cache):
+        """Test that an expired entry with the same payload hash skips the JSON decode."""
+        with StubPromotionsServer(encode_payload(make_payload(8))) as server:
+            manager = product_decode.EpicFreeGames(base_url=server.base_url, cache=make_promotion_cache())
+            manager.make_request()
+            clock.now += 10_000
+            monkeypatch.setattr(product_decode.EpicFreeGames, "process_products", None)
+            manager.make_request()
+            assert server.request_count == 2
+        assert [game.title for game in manager.free_games] == ["Game 0", "Game 4"]
@@ -0,0 +1,41 @@
+import product_decode
+import region_fetch
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import StubPromotionsServer
+
+
+class TestBuildUrl:
+    """Test cases for the build_url function."""
+
+    def test_default_url_matches_gb_region(self):
+        """Test that the default manager checks the en-US/GB promotions."""
+        assert product_decode.EpicFreeGames().URL_FOR_CHECK == (
+            "https://store-site-backend-static-ipv4.ak.epicgames.com/freeGamesPromotions?locale=en-US&country=GB&allowCountries=GB")
+
+    def test_region_is_used_in_url(self):
+        """Test that the country and locale are placed in the query string."""
+        url = product_decode.EpicFreeGames.build_url("DE", "de-DE", "http://localhost/promotions")
+        assert url == "http://localhost/promotions?locale=de-DE&country=DE&allowCountries=DE"
+
+
+class TestFetchRegions:
+    """Test cases for the fetch_regions function."""
+
+    def test_no_targets_returns_empty_dict(self):
+        """Test that passing no targets makes no requests."""
+        assert region_fetch.fetch_regions([]) == {}
+
+    def test_each_target_returns_free_games(self):
+        """Test that every target gets its own list of free games."""
+        targets = [("GB", "en-US"), ("DE", "de-DE"), ("FR", "fr-FR")]
+        with StubPromotionsServer(encode_payload(make_payload(8))) as server:
+            results = region_fetch.fetch_regions(targets, max_workers=2, base_url=server.base_url)
+            assert server.request_count == 3
+        assert list(results) == targets
+        for free_games in results.values():
+            assert [game.title for game in free_games] == ["Game 0", "Game 4"]
+
+    def test_unreachable_host_returns_empty_list(self):
+        """Test that a failed connection is logged and gives no free games."""
+        results = region_fetch.fetch_regions([("GB", "en-US")], base_url="http://127.0.0.1:9/promotions")
+        assert results == {("GB", "en-US"): []}
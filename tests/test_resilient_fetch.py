@@ -0,0 +1,182 @@
+import random
+import time
+
+import product_decode
+import pytest
+import requests
+import resilient_fetch
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import DROP, StubPromotionsServer
+
+PAYLOAD = encode_payload(make_payload(8))
+
+
+class LongestJitter(random.Random):
+    """Random whose backoff jitter always picks the longest wait"""
+
+    def uniform(self, a: float, b: float) -> float:
+        return b
+
+
+def make_fetcher(server: StubPromotionsServer, **kwargs) -> resilient_fetch.ResilientFetcher:
+    options = {"timeout": (1, 0.5), "base_url": server.base_url, "alternate_base_url": None, "sleep": lambda seconds: None}
+    options.update(kwargs)
+    return resilient_fetch.ResilientFetcher(**options)
+
+
+class TestCircuitBreaker:
+    """Test cases for the CircuitBreaker class."""
+
+    def test_opens_after_consecutive_failures(self, clock):
+        """Test that the circuit opens once failure_threshold fetches fail in a row."""
+        breaker = resilient_fetch.CircuitBreaker(failure_threshold=2, reset_timeout=60, clock=clock)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == resilient_fetch.OPEN
+        assert not breaker.allow()
+
+    def test_half_open_allows_one_trial(self, clock):
+        """Test that after reset_timeout a single trial is allowed and its result decides the state."""
+        breaker = resilient_fetch.CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+        breaker.record_failure()
+        clock.now += 60
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == resilient_fetch.OPEN
+        clock.now += 60
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == resilient_fetch.CLOSED
+
+
+class TestLatencyTracker:
+    """Test cases for the LatencyTracker class."""
+
+    def test_percentile_needs_min_samples(self):
+        """Test that no percentile is given before min_samples latencies are recorded."""
+        tracker = resilient_fetch.LatencyTracker()
+        tracker.add(1.0)
+        assert tracker.percentile(0.5, min_samples=2) is None
+
+    def test_percentile_of_samples(self):
+        """Test that the percentile is taken from the recorded latencies."""
+        tracker = resilient_fetch.LatencyTracker()
+        for i in range(1, 101):
+            tracker.add(i / 100)
+        assert tracker.percentile(0.95) == 0.96
+
+
+class TestResilientFetcher:
+    """Test cases for the ResilientFetcher class."""
+
+    def test_server_errors_are_retried(self):
+        """Test that 5xx responses and dropped connections are retried until one succeeds."""
+        with StubPromotionsServer(PAYLOAD, faults=[503, DROP]) as server:
+            manager = product_decode.EpicFreeGames(base_url=server.base_url)
+            assert make_fetcher(server).fetch(manager)
+            assert server.request_count == 3
+        assert [game.title for game in manager.free_games] == ["Game 0", "Game 4"]
+
+    def test_retries_are_bounded(self):
+        """Test that the last error response is returned once max_retries run out."""
+        with StubPromotionsServer(PAYLOAD, faults=[503, 503, 503, 503]) as server:
+            response = make_fetcher(server, max_retries=2).get(server.base_url)
+            assert response.status_code == 503
+            assert server.request_count == 3
+
+    def test_slow_response_times_out(self):
+        """Test that a response slower than the read timeout raises a Timeout after the retries."""
+        with StubPromotionsServer(PAYLOAD, faults=[2.0]) as server:
+            with pytest.raises(requests.Timeout):
+                make_fetcher(server, max_retries=0).get(server.base_url)
+
+    def test_deadline_bounds_a_trickling_response(self):
+        """Test that get gives up at the deadline even though no single read times out."""
+        with StubPromotionsServer(PAYLOAD, faults=[2.0]) as server:
+            fetcher = make_fetcher(server, timeout=(1, 5), max_retries=0, deadline=0.5)
+            start = time.perf_counter()
+            with pytest.raises(requests.Timeout):
+                fetcher.get(server.base_url)
+            assert time.perf_counter() - start < 1.5
+            fetcher.close()
+
+    def test_attempts_abandoned_at_the_deadline_do_not_block_new_ones(self):
+        """Test that once more attempts are stuck than max_attempts, new ones fail at once, and run again when they finish."""
+        with StubPromotionsServer(PAYLOAD, faults=[1.0, 1.0]) as server:
+            fetcher = make_fetcher(server, timeout=(1, 5), max_retries=0, deadline=0.2, max_attempts=2,
+                                   breaker=resilient_fetch.CircuitBreaker(failure_threshold=10))
+            for _ in range(2):
+                with pytest.raises(requests.Timeout):
+                    fetcher.get(server.base_url)
+            start = time.perf_counter()
+            with pytest.raises(requests.ConnectionError):
+                fetcher.get(server.base_url)
+            assert time.perf_counter() - start < 0.1
+            time.sleep(1.2)
+            assert fetcher.get(server.base_url).status_code == 200
+            fetcher.close()
+        assert server.request_count == 3
+
+    def test_no_retry_past_the_deadline(self, clock):
+        """Test that a retry whose backoff would end after the deadline is not made."""
+        def sleep(seconds: float) -> None:
+            clock.now += seconds
+
+        with StubPromotionsServer(PAYLOAD, faults=[503, 503, 503, 503]) as server:
+            fetcher = make_fetcher(server, max_retries=3, backoff=2, deadline=5, rng=LongestJitter(), clock=clock, sleep=sleep)
+            assert fetcher.get(server.base_url).status_code == 503
+            assert server.request_count == 2
+            fetcher.close()
+
+    def test_open_circuit_serves_last_good_games(self, clock):
+        """Test that while the circuit is open no request is made and the last good games are kept."""
+        breaker = resilient_fetch.CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+        with StubPromotionsServer(PAYLOAD, faults=[None, 500]) as server:
+            fetcher = make_fetcher(server, max_retries=0, breaker=breaker)
+            assert fetcher.fetch(product_decode.EpicFreeGames(base_url=server.base_url))
+            assert not fetcher.fetch(product_decode.EpicFreeGames(base_url=server.base_url))
+            manager = product_decode.EpicFreeGames(base_url=server.base_url)
+            assert not fetcher.fetch(manager)
+            assert server.request_count == 2
+        assert [game.title for game in manager.free_games] == ["Game 0", "Game 4"]
+
+    def test_slow_primary_is_hedged_to_alternate_host(self):
+        """Test that a request slower than the latency percentile is answered by the alternate host."""
+        with StubPromotionsServer(PAYLOAD, faults=[2.0]) as primary, StubPromotionsServer(PAYLOAD) as alternate:
+            fetcher = make_fetcher(primary, timeout=(1, 5), alternate_base_url=alternate.base_url, hedge_min_samples=1)
+            fetcher.latencies.add(0.05)
+            start = time.perf_counter()
+            response = fetcher.get(primary.base_url + "?country=GB")
+            assert time.perf_counter() - start < 1.5
+            assert response.url == alternate.base_url + "?country=GB"
+            fetcher.close()
+
+    def test_default_alternate_mirrors_default_base_url(self):
+        """Test that by default requests to the promotions host are hedged to the host without the ipv4 suffix."""
+        fetcher = resilient_fetch.ResilientFetcher()
+        assert fetcher.alternate_url(product_decode.EpicFreeGames.build_url("GB", "en-US")) == (
+            resilient_fetch.ALTERNATE_PROMOTIONS_URL + "?locale=en-US&country=GB&allowCountries=GB")
+        assert fetcher.alternate_url("http://127.0.0.1/freeGamesPromotions") is None
+        fetcher.close()
+
+    def test_make_request_accepts_fetcher(self):
+        """Test that make_request can use the fetcher in place of a session."""
+        with StubPromotionsServer(PAYLOAD, faults=[502]) as server:
+            manager = product_decode.EpicFreeGames(base_url=server.base_url)
+            assert manager.make_request(make_fetcher(server))
+        assert len(manager.free_games) == 2
+
+
+class TestMakeRequestErrors:
+    """Test cases for make_request when the request fails."""
+
+    def test_request_error_is_logged(self, caplog):
+        """Test that a failed request is logged and leaves the free games unchanged."""
+        manager = product_decode.EpicFreeGames(base_url="http://127.0.0.1:9/freeGamesPromotions")
+        assert not manager.make_request(timeout=1)
+        assert manager.free_games == []
+        assert "Request failed with" in caplog.text
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+import product_decode
+import requests
+import stream_decode
+from benchmarks.payloads import encode_payload, make_payload
+from benchmarks.stub_server import StubPromotionsServer
+
+
+def split_bytes(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterElements:
+    """Test cases for the iter_elements function."""
+
+    def test_elements_match_full_decode(self):
+        """Test that streaming yields the same elements as decoding the whole document."""
+        payload = make_payload(20)
+        payload["data"]["Catalog"]["searchStore"]["paging"] = {"count": 1000, "total": 20}
+        data = json.dumps(payload, indent=2).encode("utf-8")
+        elements = list(stream_decode.iter_elements(split_bytes(data, 7)))
+        assert elements == payload["data"]["Catalog"]["searchStore"]["elements"]
+
+    def test_values_split_across_chunks(self):
+        """Test that numbers and multi-byte characters split between chunks decode correctly."""
+        data = '{"data": {"Catalog": {"searchStore": {"elements": [12345, "café", 678]}}}}'.encode("utf-8")
+        assert list(stream_decode.iter_elements(split_bytes(data, 1))) == [12345, "café", 678]
+
+    def test_empty_elements_yields_nothing(self):
+        """Test that an empty elements list yields no elements."""
+        data = b'{"data": {"Catalog": {"searchStore": {"elements": []}}}}'
+        assert list(stream_decode.iter_elements([data])) == []
+
+    def test_invalid_input_raises_exception(self):
+        """Test that a document that is not an object raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            list(stream_decode.iter_elements([b'[1, 2]']))
+
+    def test_missing_field_raises_exception(self):
+        """Test that a document without the elements path raises a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            list(stream_decode.iter_elements([b'{"data": {"Catalog": {}}}']))
+
+    def test_invalid_elements_type_raises_exception(self):
+        """Test that elements which are not a list raise a ProductDecodeException."""
+        with pytest.raises(product_decode.ProductDecodeException):
+            list(stream_decode.iter_elements([b'{"data": {"Catalog": {"searchStore": {"elements": 0}}}}']))
+
+    def test_truncated_document_raises_decode_error(self):
+        """Test that a document cut off mid element raises a JSONDecodeError."""
+        with pytest.raises(json.JSONDecodeError):
+            list(stream_decode.iter_elements([b'{"data": {"Catalog": {"searchStore": {"elements": [{"title": ']))
+
+
+class TestStreamFreeGames:
+    """Test cases for the stream_free_games function."""
+
+    def test_free_games_are_decoded(self):
+        """Test that streaming a response finds the same free games as make_request."""
+        with StubPromotionsServer(encode_payload(make_payload(12))) as server:
+            manager = product_decode.EpicFreeGames(base_url=server.base_url)
+            stream_decode.stream_free_games(manager, chunk_size=64)
+        assert [game.title for game in manager.free_games] == ["Game 0", "Game 4", "Game 8"]
+
+    def test_failures_are_reported_as_in_buffered_decode(self):
+        """Test that with decode_report, a streamed response gives the same games and report as a buffered one."""
+        payload = make_payload(40, malformed_ratio=0.3)
+        with StubPromotionsServer(encode_payload(payload)) as server:
+            manager = product_decode.EpicFreeGames(base_url=server.base_url, decode_report=True)
+            assert stream_decode.stream_free_games(manager, chunk_size=64)
+        products = product_decode.EpicFreeGames.get_products_from_response(payload)
+        free_games, report = product_decode.EpicFreeGames.process_products_with_report(products)
+        assert [game.title for game in manager.free_games] == [game.title for game in free_games]
+        assert manager.last_report.failures and manager.last_report.to_dict() == report.to_dict()
+
+    def test_slow_response_times_out(self):
+        """Test that a response slower than the read timeout raises a Timeout instead of hanging."""
+        with StubPromotionsServer(encode_payload(make_payload(4)), faults=[2.0]) as server:
+            with pytest.raises(requests.Timeout):
+                stream_decode.stream_free_games(product_decode.EpicFreeGames(base_url=server.base_url), timeout=(1, 0.5))
@@ -0,0 +1,106 @@
+import random
+
+import product_decode
+import requests
+import watch
+from benchmarks.payloads import make_offers, make_product
+
+
+def make_scheduler() -> watch.AdaptiveScheduler:
+    return watch.AdaptiveScheduler(min_interval=60, max_interval=3600, retry_interval=15,
+                                   boundary_margin=600, jitter=0, rng=random.Random(0))
+
+
+class TestAdaptiveScheduler:
+    """Test cases for the AdaptiveScheduler class."""
+
+    def test_quiet_polls_back_off_exponentially(self):
+        """Test that polls far from any boundary double the interval up to the maximum."""
+        scheduler = make_scheduler()
+        delays = [scheduler.next_delay(0, [], True) for _ in range(8)]
+        assert delays == [120, 240, 480, 960, 1920, 3600, 3600, 3600]
+
+    def test_near_boundary_polls_at_min_interval(self):
+        """Test that polls close to a promotion boundary use the minimum interval."""
+        scheduler = make_scheduler()
+        for _ in range(5):
+            scheduler.next_delay(0, [], True)
+        assert scheduler.next_delay(10_000, [10_300], True) == 60
+
+    def test_delay_stops_at_next_boundary(self):
+        """Test that a long back off still wakes up just after the next boundary."""
+        scheduler = make_scheduler()
+        for _ in range(5):
+            scheduler.next_delay(0, [], True)
+        assert scheduler.next_delay(0, [1000], True) == 1000
+
+    def test_changes_reset_interval(self):
+        """Test that a poll with changes goes back to the minimum interval."""
+        scheduler = make_scheduler()
+        for _ in range(5):
+            scheduler.next_delay(0, [], True)
+        assert scheduler.next_delay(0, [], True, changed=True) == 60
+
+    def test_failures_retry_with_backoff(self):
+        """Test that consecutive failures double the retry delay and a success resets it."""
+        scheduler = make_scheduler()
+        assert [scheduler.next_delay(0, [], False) for _ in range(3)] == [15, 30, 60]
+        scheduler.next_delay(0, [], True)
+        assert scheduler.next_delay(0, [], False) == 15
+
+    def test_jitter_spreads_delay(self):
+        """Test that jitter keeps the delay within the configured fraction."""
+        scheduler = watch.AdaptiveScheduler(jitter=0.1, rng=random.Random(1))
+        delay = scheduler.next_delay(0, [], True)
+        assert 108 <= delay <= 132
+
+
+class FakeSession:
+    def __init__(self, polls) -> None:
+        self.polls = list(polls)
+
+    def fetch(self, manager) -> bool:
+        poll = self.polls.pop(0)
+        if poll is None:
+            raise requests.ConnectionError("unreachable")
+        manager.changes = manager.diff_index.update(poll)
+        manager.free_games = manager.diff_index.free_games
+        return True
+
+
+class TestPromotionBoundaries:
+    """Test cases for the promotion_boundaries function."""
+
+    def test_every_window_is_included(self):
+        """Test that the start and end of current and upcoming windows are all boundaries."""
+        game = product_decode.Game("title", "description", 0, "url", None, 1999, 100, 200, 0,
+                                   promotion_windows=((100, 200, 0),), upcoming_windows=((300, 400, 0),))
+        assert sorted(set(watch.promotion_boundaries([game]))) == [100, 200, 300, 400]
+
+
+class TestWatch:
+    """Test cases for the watch function."""
+
+    def test_changes_are_reported_and_failures_retried(self):
+        """Test that each poll with changes is reported and failed polls do not stop watching."""
+        reported = []
+        sleeps = []
+        session = FakeSession([[make_product(0, 0)], None, [make_product(0, 0)], [make_product(1, 0)]])
+        watch.watch(product_decode.EpicFreeGames(), session, make_scheduler(),
+                    on_changes=lambda events: reported.append(sorted(event.kind for event in events)),
+                    max_polls=4, clock=lambda: 0, sleep=sleeps.append)
+        assert reported == [["added"], ["added", "removed"]]
+        assert len(sleeps) == 3
+        assert sleeps[1] == 15
+
+    def test_upcoming_free_window_of_paid_game_is_polled(self):
+        """Test that a paid game's upcoming free promotion keeps polls at min_interval near its start, with no game free now."""
+        product = make_product(1, 1999)
+        product["promotions"] = {"promotionalOffers": [],
+                                 "upcomingPromotionalOffers": make_offers("2024-01-11T16:00:00.000Z", "2024-01-18T16:00:00.000Z", 0)}
+        manager = product_decode.EpicFreeGames()
+        sleeps = []
+        watch.watch(manager, FakeSession([[product], [product]]), make_scheduler(),
+                    max_polls=2, clock=lambda: 1704988800 - 100, sleep=sleeps.append)
+        assert manager.free_games == []
+        assert sleeps == [60]
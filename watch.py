@@ -0,0 +1,140 @@
+import argparse
+import logging
+import random
+import time
+
+import requests
+
+from epic_session import EpicSession
+from game_diff import REMOVED, FreeGamesIndex, GameEvent
+from product_decode import DEFAULT_COUNTRY, DEFAULT_LOCALE, EpicFreeGames, Game
+
+DEFAULT_MIN_INTERVAL = 60
+DEFAULT_MAX_INTERVAL = 3600
+DEFAULT_RETRY_INTERVAL = 15
+DEFAULT_BOUNDARY_MARGIN = 600
+DEFAULT_JITTER = 0.1
+
+
+class AdaptiveScheduler:
+    """Decides how long to wait before the next poll
+
+    Polls every min_interval seconds while a promotion boundary is within boundary_margin
+    seconds, and otherwise doubles the interval after every poll without changes, up to
+    max_interval, never sleeping past the next boundary. Failed polls are retried after
+    retry_interval seconds, doubling for each consecutive failure. Every delay is spread
+    by up to jitter (a fraction) so many watchers do not poll in lockstep
+    """
+
+    def __init__(self,
+                 min_interval: float = DEFAULT_MIN_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_INTERVAL,
+                 retry_interval: float = DEFAULT_RETRY_INTERVAL,
+                 boundary_margin: float = DEFAULT_BOUNDARY_MARGIN,
+                 jitter: float = DEFAULT_JITTER,
+                 rng: (random.Random | None) = None) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry_interval = retry_interval
+        self.boundary_margin = boundary_margin
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.interval = min_interval
+        self.failures = 0
+
+    def next_delay(self, now: float, boundaries: list[int], succeeded: bool, changed: bool = False) -> float:
+        """Get the seconds to wait after a poll at now, given the known promotion boundaries"""
+        if not succeeded:
+            self.failures += 1
+            delay = min(self.max_interval, self.retry_interval * 2 ** (self.failures - 1))
+            return self._spread(delay)
+        self.failures = 0
+        next_boundary = min((boundary for boundary in boundaries if boundary > now), default=None)
+        near_boundary = any(abs(boundary - now) <= self.boundary_margin for boundary in boundaries)
+        if changed or near_boundary:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+        delay = self._spread(self.interval)
+        if next_boundary is not None:
+            # Land just after the boundary, when the next promotion becomes visible
+            delay = min(delay, max(self.min_interval, next_boundary - now + self.min_interval * self.jitter))
+        return delay
+
+    def _spread(self, delay: float) -> float:
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+def promotion_boundaries(games: list[Game]) -> list[int]:
+    """Get the start and end times of every current and upcoming promotion of the games"""
+    boundaries = []
+    for game in games:
+        for start, end, _ in game.promotion_windows + game.upcoming_windows:
+            boundaries.append(start)
+            boundaries.append(end)
+        if game.promotion_start is not None:
+            boundaries.append(game.promotion_start)
+        if game.promotion_end is not None:
+            boundaries.append(game.promotion_end)
+    return boundaries
+
+
+def display_events(events: list[GameEvent]) -> None:
+    for event in events:
+        print(f"[{event.kind}]")
+        if event.kind == REMOVED:
+            print(f"Title:{event.game.title}")
+        else:
+            event.game.display()
+
+
+def watch(manager: EpicFreeGames,
+          session: EpicSession,
+          scheduler: (AdaptiveScheduler | None) = None,
+          on_changes=display_events,
+          max_polls: (int | None) = None,
+          clock=time.time,
+          sleep=time.sleep) -> None:
+    """Poll for free games until interrupted, passing each poll's changes to on_changes"""
+    if manager.diff_index is None:
+        manager.diff_index = FreeGamesIndex()
+    scheduler = scheduler or AdaptiveScheduler()
+    polls = 0
+    while max_polls is None or polls < max_polls:
+        manager.changes = []
+        try:
+            succeeded = session.fetch(manager)
+        except requests.RequestException as err:
+            logging.warning(f"Request failed with: {err}")
+            succeeded = False
+        polls += 1
+        if manager.changes:
+            on_changes(manager.changes)
+        # Paid games with an upcoming free promotion count too, so the watcher wakes when they become free
+        boundaries = promotion_boundaries(manager.free_games + manager.diff_index.upcoming_free_games)
+        delay = scheduler.next_delay(clock(), boundaries, succeeded, bool(manager.changes))
+        logging.info(f"Next poll in {delay:.0f} seconds")
+        if max_polls is None or polls < max_polls:
+            sleep(delay)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Watch the Epic Games store for changes to the free games")
+    parser.add_argument("--country", default=DEFAULT_COUNTRY)
+    parser.add_argument("--locale", default=DEFAULT_LOCALE)
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL, help="seconds between polls near a promotion boundary")
+    parser.add_argument("--max-interval", type=float, default=DEFAULT_MAX_INTERVAL, help="longest seconds between polls")
+    parser.add_argument("--decode-report", action="store_true",
+                        help="log a rate limited summary of the products that fail to decode instead of each failure")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with EpicSession(pool_size=1) as epic_session:
+        try:
+            watch(EpicFreeGames(args.country, args.locale, decode_report=args.decode_report), epic_session,
+                  AdaptiveScheduler(args.min_interval, args.max_interval))
+        except KeyboardInterrupt:
+            pass